@@ -0,0 +1,194 @@
+"""
+Inference Backends
+==================
+Pemilihan backend inference saat startup:
+    - ``torch`` (default): ``YOLO(best.pt)`` dari ultralytics seperti sebelumnya
+    - ``onnx``: ``best.pt`` di-export sekali ke ``best.onnx`` (disimpan di sebelah
+      weights dan dipakai ulang selama lebih baru dari ``best.pt``), lalu dijalankan
+      lewat onnxruntime. Di host CPU-only biasanya lebih cepat dan lebih hemat memori.
+    - ``engine``: network ``best.pt`` di-trace (TorchScript) dan dijalankan tanpa predictor
+      ultralytics, lihat ``engine.py``. Hasilnya ``Detections`` (array NumPy), bukan ``Results``.
+    - ``int8``: model INT8 ``best.int8.onnx`` hasil ``quantization.py``, lewat onnxruntime.
+      File ini hanya ditulis oleh gate akurasi ``testing/test_quantization.py``, jadi
+      tidak pernah di-export otomatis saat startup.
+
+``OnnxModel`` meniru bagian API ``YOLO`` yang dipakai server (``model(images,
+imgsz=..., verbose=False)``, ``names``, ``overrides``) dan mengembalikan
+``Detections`` (lihat ``postprocess.py``), jadi jalur onnx tidak perlu import torch
+maupun ultralytics saat startup.
+Letterbox dan NMS mengikuti default predictor ultralytics (conf 0.25, IoU 0.7).
+
+Konfigurasi (env):
+    SIBI_BACKEND            - "torch", "onnx", "engine" atau "int8" (default: torch)
+    SIBI_ORT_INTRA_THREADS  - thread intra-op onnxruntime per sesi (default: threads per worker)
+    SIBI_ORT_INTER_THREADS  - thread inter-op onnxruntime per sesi (default: 1)
+"""
+
+import ast
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np  # type: ignore[import]
+
+from postprocess import Detections
+
+BACKEND = os.environ.get("SIBI_BACKEND", "torch").strip().lower()
+DEFAULT_INTRA_THREADS = int(os.environ.get("SIBI_ORT_INTRA_THREADS", 0))
+DEFAULT_INTER_THREADS = int(os.environ.get("SIBI_ORT_INTER_THREADS", 1))
+
+# Default predictor ultralytics
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+MAX_DET = 300
+PAD_VALUE = (114, 114, 114)
+
+
+def onnx_path(weights) -> Path:
+    """Location of the cached ONNX export for a weights file."""
+    return Path(weights).with_suffix(".onnx")
+
+
+def quantized_path(weights) -> Path:
+    """Location of the gated INT8 model for a weights file (``best.pt`` -> ``best.int8.onnx``)."""
+    return Path(weights).with_suffix(".int8.onnx")
+
+
+def export_onnx(weights, imgsz: Optional[int] = None) -> Path:
+    """Export ``weights`` to ONNX once; reuse the cached file while it is newer than the weights."""
+    weights = Path(weights)
+    target = onnx_path(weights)
+    if target.exists() and target.stat().st_mtime >= weights.stat().st_mtime:
+        return target
+
+    from ultralytics import YOLO  # type: ignore[import]
+
+    print(f"🔄 Exporting {weights.name} to ONNX (sekali saja, hasil disimpan di {target.name})...")
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    exported = YOLO(str(weights)).export(format="onnx", dynamic=True, simplify=False, **kwargs)
+    return Path(exported)
+
+
+def letterbox(image: np.ndarray, new_shape: Tuple[int, int], auto: bool, stride: int):
+    """Resize + pad like ultralytics ``LetterBox``; returns (image, gain, (pad_x, pad_y))."""
+    h, w = image.shape[:2]
+    gain = min(new_shape[0] / h, new_shape[1] / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    dw, dh = new_shape[1] - new_w, new_shape[0] - new_h
+    if auto:
+        dw, dh = dw % stride, dh % stride
+    dw, dh = dw / 2, dh / 2
+
+    if (w, h) != (new_w, new_h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=PAD_VALUE)
+    return image, gain, (left, top)
+
+
+class OnnxModel:
+    """Minimal ``YOLO``-compatible wrapper around an onnxruntime session."""
+
+    def __init__(
+        self,
+        path,
+        intra_op_threads: int = DEFAULT_INTRA_THREADS,
+        inter_op_threads: int = DEFAULT_INTER_THREADS,
+    ):
+        import onnxruntime as ort  # type: ignore[import]
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(0, int(intra_op_threads))
+        options.inter_op_num_threads = max(0, int(inter_op_threads))
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.path = str(path)
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # Metadata ditulis oleh exporter ultralytics
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+        self.stride = int(meta.get("stride", 32))
+        imgsz = ast.literal_eval(meta["imgsz"]) if "imgsz" in meta else 640
+        self.overrides = {"imgsz": max(imgsz) if isinstance(imgsz, (list, tuple)) else int(imgsz)}
+
+    def preprocess(self, images: List[np.ndarray], imgsz: int):
+        """Letterbox BGR frames into one NCHW float32 RGB batch."""
+        # Sama seperti predictor: padding minimal (kelipatan stride) jika semua frame seukuran
+        auto = all(image.shape == images[0].shape for image in images)
+        letterboxed = [letterbox(image, (imgsz, imgsz), auto, self.stride) for image in images]
+        batch = np.stack([image for image, _, _ in letterboxed])
+        batch = np.ascontiguousarray(batch[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32)
+        batch /= 255.0
+        return batch, [(gain, pad) for _, gain, pad in letterboxed]
+
+    def postprocess(self, pred: np.ndarray, image: np.ndarray, gain: float, pad, conf: float, iou: float):
+        """Class-aware NMS on one raw output (4 + nc, N) and map boxes back to the frame."""
+        pred = pred.T
+        scores = pred[:, 4:]
+        cls = scores.argmax(axis=1)
+        confs = scores[np.arange(len(scores)), cls]
+        keep = confs > conf
+        xywh, cls, confs = pred[keep, :4], cls[keep], confs[keep]
+
+        det = np.zeros((0, 6), dtype=np.float32)
+        if len(confs):
+            tl_wh = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, 2:]], axis=1)
+            idx = cv2.dnn.NMSBoxesBatched(tl_wh.tolist(), confs.tolist(), cls.tolist(), conf, iou)
+            idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+            idx = idx[np.argsort(-confs[idx], kind="stable")][:MAX_DET]
+
+            h, w = image.shape[:2]
+            xyxy = np.concatenate([tl_wh[idx, :2], tl_wh[idx, :2] + tl_wh[idx, 2:]], axis=1)
+            xyxy = (xyxy - np.array([pad[0], pad[1], pad[0], pad[1]])) / gain
+            xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+            xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+            det = np.concatenate([xyxy, confs[idx, None], cls[idx, None]], axis=1).astype(np.float32)
+
+        return Detections(det[:, :4], det[:, 4], det[:, 5].astype(np.int64), image.shape[:2])
+
+    def __call__(self, source, imgsz: Optional[int] = None, conf: float = CONF_THRESHOLD,
+                 iou: float = IOU_THRESHOLD, verbose: bool = False):
+        images = source if isinstance(source, list) else [source]
+        batch, transforms = self.preprocess(images, int(imgsz or self.overrides["imgsz"]))
+        preds = self.session.run(None, {self.input_name: batch})[0]
+        return [
+            self.postprocess(pred, image, gain, pad, conf, iou)
+            for pred, image, (gain, pad) in zip(preds, images, transforms)
+        ]
+
+
+def load_backend(weights, backend: str = BACKEND, threads: Optional[int] = None):
+    """Build the inference model for ``backend``.
+
+    "torch" -> ``YOLO``, "onnx"/"int8" -> ``OnnxModel``, "engine" -> ``TracedEngine``.
+
+    Args:
+        weights: Path ke ``best.pt``
+        backend: Nama backend, default dari ``SIBI_BACKEND``
+        threads: Thread intra-op onnxruntime jika ``SIBI_ORT_INTRA_THREADS`` tidak di-set
+    """
+    if backend == "onnx":
+        return OnnxModel(export_onnx(weights), intra_op_threads=DEFAULT_INTRA_THREADS or threads or 0)
+    if backend == "engine":
+        from engine import TracedEngine
+
+        return TracedEngine(weights)
+    if backend == "int8":
+        path = quantized_path(weights)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"INT8 model not found: {path} (run testing/test_quantization.py to build and gate it)"
+            )
+        if path.stat().st_mtime < Path(weights).stat().st_mtime:
+            raise RuntimeError(f"INT8 model {path.name} is older than {Path(weights).name}; re-run the quantization gate")
+        return OnnxModel(path, intra_op_threads=DEFAULT_INTRA_THREADS or threads or 0)
+    if backend != "torch":
+        raise ValueError(f"Unknown SIBI_BACKEND '{backend}' (expected 'torch', 'onnx', 'engine' or 'int8')")
+
+    from ultralytics import YOLO  # type: ignore[import]
+
+    return YOLO(str(weights))
@@ -0,0 +1,328 @@
+"""
+Dynamic Micro-Batching
+======================
+Scheduler yang mengumpulkan request /detect yang datang dalam satu window
+(max batch size / max wait) lalu menjalankannya ke YOLO sebagai satu batch.
+Setiap caller tetap menerima hasilnya sendiri sesuai urutan submit.
+
+Antrean admission dibatasi: jika frame yang menunggu sudah mencapai
+``max_pending``, ``submit`` langsung menolak dengan ``QueueFull`` (berisi
+estimasi Retry-After) supaya latency tetap terbatas saat overload.
+
+Frame yang sudah tidak berguna dibuang sebelum inference:
+    - client pergi (future caller dibatalkan): frame dibuang dari antrean; jika
+      semua caller satu batch pergi sebelum worker mulai, job-nya ikut dibatalkan
+    - ``deadline`` (``time.monotonic()``): frame yang masih antre saat deadline
+      lewat gagal dengan ``FrameExpired``
+    - ``key`` (mis. session id): latest-frame-wins, frame baru dengan key yang sama
+      menggantikan frame lama yang masih antre; frame lama gagal dengan ``FrameSuperseded``
+
+Konfigurasi (env):
+    SIBI_BATCH_MAX_SIZE     - jumlah frame maksimum per batch (default: 8)
+    SIBI_BATCH_MAX_WAIT_MS  - waktu tunggu maksimum untuk mengisi batch (default: 5)
+    SIBI_MAX_PENDING        - frame maksimum yang boleh antre/diproses (default: 64)
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("SIBI_BATCH_MAX_SIZE", 8))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("SIBI_BATCH_MAX_WAIT_MS", 5))
+DEFAULT_MAX_PENDING = int(os.environ.get("SIBI_MAX_PENDING", 64))
+
+
+class QueueFull(Exception):
+    """Raised when the admission queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class FrameExpired(Exception):
+    """Raised when a frame's deadline passed before it reached inference."""
+
+
+class FrameSuperseded(Exception):
+    """Raised when a newer frame with the same key replaced this one in the queue."""
+
+
+class MicroBatcher:
+    """Collect concurrent inference requests into batched forward passes."""
+
+    def __init__(
+        self,
+        infer_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        concurrency: int = 1,
+    ):
+        """
+        Args:
+            infer_fn: Coroutine yang menerima list gambar dan mengembalikan
+                list hasil dengan urutan yang sama
+            max_batch_size: Jumlah frame maksimum per batch
+            max_wait_ms: Waktu tunggu maksimum (ms) setelah frame pertama masuk
+            max_pending: Batas frame yang antre + sedang diproses
+            concurrency: Jumlah batch yang boleh berjalan bersamaan
+                (biasanya = jumlah worker inference)
+        """
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_pending = max(1, int(max_pending))
+        self.concurrency = max(1, int(concurrency))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight: set = set()
+        self._pending = 0
+        self._rejected = 0
+        self._expired = 0
+        self._superseded = 0
+        self._cancelled = 0
+        self._abandoned = 0
+        # key -> future frame terbaru yang masih antre (latest-frame-wins)
+        self._latest: dict = {}
+
+        # Statistics
+        self._batches = 0
+        self._frames = 0
+        self._batch_sizes = Counter()
+        self._last_batch_ms = 0.0
+
+    async def start(self):
+        """Start the background batching loop on the running event loop."""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop and fail any request still waiting."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, fut, _, _ = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("Batcher stopped"))
+
+    def retry_after(self) -> int:
+        """Rough number of seconds until the current backlog is drained."""
+        batches = math.ceil(self._pending / self.max_batch_size) / self.concurrency
+        return max(1, math.ceil(batches * self._last_batch_ms / 1000.0))
+
+    async def submit(self, image: Any, deadline: Optional[float] = None, key: Optional[Any] = None) -> Any:
+        """Queue one image and wait for its own inference result.
+
+        Args:
+            image: Frame yang di-inference
+            deadline: ``time.monotonic()`` setelah itu frame tidak perlu di-inference lagi
+            key: Frame yang masih antre dengan key sama digantikan frame ini
+
+        Raises:
+            QueueFull: Jika antrean admission sudah penuh
+            FrameExpired: Jika deadline lewat sebelum frame masuk batch
+            FrameSuperseded: Jika frame lebih baru dengan key sama masuk antrean
+        """
+        if self._task is None:
+            await self.start()
+        if deadline is not None and time.monotonic() >= deadline:
+            self._expired += 1
+            raise FrameExpired()
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise QueueFull(self.retry_after())
+        if key is not None:
+            # Baru digantikan setelah frame ini pasti diterima: frame yang ditolak
+            # QueueFull tidak boleh membuang frame lama yang masih antre
+            previous = self._latest.get(key)
+            if previous is not None and not previous.done():
+                # Frame lama tidak ikut batch berikutnya (lihat ``_live``)
+                self._superseded += 1
+                previous.set_exception(FrameSuperseded())
+
+        self._pending += 1
+        try:
+            fut = asyncio.get_running_loop().create_future()
+            if key is not None:
+                self._latest[key] = fut
+            self._queue.put_nowait((image, fut, deadline, key))
+            return await fut
+        finally:
+            self._pending -= 1
+            if key is not None and self._latest.get(key) is fut:
+                del self._latest[key]
+
+    async def submit_batch(self, images: List[Any], deadline: Optional[float] = None) -> List[Any]:
+        """Run a client-provided group of frames as its own forward pass.
+
+        Frame-frame ini ikut dihitung di antrean admission dan memakai slot
+        worker yang sama dengan batch dinamis, tapi tidak dicampur dengan
+        request lain.
+
+        Raises:
+            QueueFull: Jika antrean admission tidak cukup untuk semua frame
+            FrameExpired: Jika ``deadline`` lewat sebelum worker tersedia
+        """
+        if self._task is None:
+            await self.start()
+        if self._pending + len(images) > self.max_pending:
+            self._rejected += len(images)
+            raise QueueFull(self.retry_after())
+
+        self._pending += len(images)
+        try:
+            async with self._slots:
+                if deadline is not None and time.monotonic() >= deadline:
+                    self._expired += len(images)
+                    raise FrameExpired()
+                start = time.perf_counter()
+                outputs = await self.infer_fn(images)
+                self._record(len(images), start)
+                return outputs
+        finally:
+            self._pending -= len(images)
+
+    def _record(self, size: int, start: float):
+        self._batches += 1
+        self._frames += size
+        self._batch_sizes[size] += 1
+        self._last_batch_ms = (time.perf_counter() - start) * 1000.0
+
+    def _live(self, item: Tuple[Any, asyncio.Future, Optional[float], Any], now: float) -> bool:
+        """False for frames that no longer need inference (cancelled, superseded or expired)."""
+        _, fut, deadline, key = item
+        if fut.done():
+            # Client pergi, atau frame digantikan frame lebih baru
+            if fut.cancelled():
+                self._cancelled += 1
+            return False
+        if deadline is not None and now >= deadline:
+            self._expired += 1
+            fut.set_exception(FrameExpired())
+            return False
+        if key is not None and self._latest.get(key) is fut:
+            # Sudah masuk batch: frame berikutnya dengan key ini tidak menggantikannya lagi
+            del self._latest[key]
+        return True
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future, Optional[float], Any]]:
+        """Wait for the first request and a free worker, then fill the batch until full or timed out."""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        # Tunggu worker kosong sebelum menutup batch, supaya frame yang datang
+        # selama menunggu ikut masuk batch yang sama
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self._queue.put_nowait(batch[0])
+            raise
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Window habis, tapi frame yang sudah antre tetap diambil
+                if self._queue.empty():
+                    break
+                batch.append(self._queue.get_nowait())
+                continue
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Client yang sudah pergi, frame yang digantikan dan frame kedaluwarsa tidak ikut di-inference
+        now = time.monotonic()
+        return [item for item in batch if self._live(item, now)]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, Optional[float], Any]]):
+        images = [image for image, _, _, _ in batch]
+        start = time.perf_counter()
+        infer = asyncio.ensure_future(self.infer_fn(images))
+        waiting = [len(batch)]
+
+        def _gone(fut: asyncio.Future):
+            # Semua caller batch ini pergi: batalkan job (dibuang dari pool jika belum mulai)
+            if fut.cancelled():
+                waiting[0] -= 1
+                if waiting[0] == 0:
+                    infer.cancel()
+
+        for _, fut, _, _ in batch:
+            fut.add_done_callback(_gone)
+        try:
+            await asyncio.wait({infer})
+        except asyncio.CancelledError:
+            infer.cancel()
+            raise
+        finally:
+            self._slots.release()
+
+        if infer.cancelled():
+            self._abandoned += len(batch)
+            return
+        if infer.exception() is not None:
+            for _, fut, _, _ in batch:
+                if not fut.done():
+                    fut.set_exception(infer.exception())
+            return
+
+        self._record(len(batch), start)
+
+        for (_, fut, _, _), output in zip(batch, infer.result()):
+            if not fut.done():
+                fut.set_result(output)
+            elif fut.cancelled():
+                # Hasil dibuang: caller pergi saat inference berjalan
+                self._abandoned += 1
+
+    def stats(self) -> dict:
+        """Queue depth and batch-size statistics."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000.0, 2),
+            "max_pending": self.max_pending,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "pending": self._pending,
+            "inflight_batches": len(self._inflight),
+            "rejected": self._rejected,
+            "expired": self._expired,
+            "superseded": self._superseded,
+            "cancelled": self._cancelled,
+            "abandoned": self._abandoned,
+            "batches": self._batches,
+            "frames": self._frames,
+            "avg_batch_size": round(self._frames / self._batches, 2) if self._batches else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            "last_batch_ms": round(self._last_batch_ms, 2),
+        }
@@ -0,0 +1,93 @@
+"""
+Box Carry-Forward
+=================
+Overlay deteksi untuk frame stream yang tidak di-inference. Inference berjalan
+dengan rate sendiri (lebih rendah dari fps stream); di antara dua inference,
+box terakhir dipakai lagi (carry-forward) atau diekstrapolasi linear dari dua
+deteksi terakhir kelas yang sama, berdasarkan timestamp capture frame.
+
+Ekstrapolasi dibatasi satu interval inference ke depan agar box tidak
+"terbang" saat tangan berhenti, dan box dibuang jika deteksi terakhir lebih tua
+dari ``SIBI_BOX_HOLD_S``.
+
+Konfigurasi (env):
+    SIBI_BOX_EXTRAPOLATE - 1 = ekstrapolasi linear, 0 = box terakhir apa adanya (default: 1)
+    SIBI_BOX_HOLD_S      - umur maksimum deteksi yang masih digambar, detik (default: 0.5)
+"""
+
+import os
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+BOX_EXTRAPOLATE = os.environ.get("SIBI_BOX_EXTRAPOLATE", "1") == "1"
+BOX_HOLD_S = float(os.environ.get("SIBI_BOX_HOLD_S", 0.5))
+
+
+class _Observation(NamedTuple):
+    t: float
+    xyxy: Tuple[float, float, float, float]
+    cls: int
+    conf: float
+
+
+class BoxTrack:
+    """Latest detections of one stream, replayed or extrapolated onto later frames.
+
+    Dipakai hanya dari thread pipeline, jadi tidak butuh lock.
+    """
+
+    def __init__(self, extrapolate: bool = BOX_EXTRAPOLATE, hold_s: float = BOX_HOLD_S):
+        """
+        Args:
+            extrapolate: Ekstrapolasi linear dari dua deteksi terakhir
+            hold_s: Umur maksimum deteksi yang masih digambar (detik)
+        """
+        self.extrapolate = extrapolate
+        self.hold_s = hold_s
+        self._previous: Optional[_Observation] = None
+        self._last: Optional[_Observation] = None
+
+        # Statistics
+        self.updates = 0
+        self.carried = 0
+        self.extrapolated = 0
+
+    def update(self, t: float, detection: Optional[tuple]):
+        """Record the inference result for the frame captured at ``t`` (None = no hand)."""
+        self.updates += 1
+        if self._last is not None and t < self._last.t:
+            return
+        if detection is None:
+            self._previous = self._last = None
+            return
+        xyxy, cls_idx, conf = detection
+        self._previous = self._last
+        self._last = _Observation(t, tuple(float(v) for v in xyxy), int(cls_idx), float(conf))
+
+    def predict(self, t: float) -> Optional[Tuple[Sequence[float], int, float]]:
+        """Detection to draw on the frame captured at ``t`` as (xyxy, cls_idx, conf), or None."""
+        last = self._last
+        if last is None or t - last.t > self.hold_s:
+            return None
+        dt = t - last.t
+        previous = self._previous
+        if dt <= 0:
+            return last.xyxy, last.cls, last.conf
+        if (self.extrapolate and previous is not None and previous.cls == last.cls
+                and 0 < last.t - previous.t <= self.hold_s):
+            span = last.t - previous.t
+            # Maksimum satu interval inference ke depan
+            scale = min(dt, span) / span
+            xyxy = tuple(b + (b - a) * scale for a, b in zip(previous.xyxy, last.xyxy))
+            self.extrapolated += 1
+            return xyxy, last.cls, last.conf
+        self.carried += 1
+        return last.xyxy, last.cls, last.conf
+
+    def stats(self) -> dict:
+        return {
+            "extrapolate": self.extrapolate,
+            "hold_s": self.hold_s,
+            "updates": self.updates,
+            "carried": self.carried,
+            "extrapolated": self.extrapolated,
+        }
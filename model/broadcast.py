@@ -0,0 +1,207 @@
+"""
+Frame Broadcast
+===============
+Fan-out hub untuk MJPEG stream: satu pipeline (capture -> inference -> encode)
+mem-publish setiap chunk multipart sekali, semua viewer ``/video_feed`` membaca
+chunk yang sama. Viewer tambahan tidak menambah ``camera.read()``, inference,
+maupun ``cv2.imencode``.
+
+Hub hanya menyimpan chunk terbaru beserta nomor urut: antrean kirim tiap viewer
+(``Subscriber``) berukuran satu slot. Viewer menunggu chunk dengan nomor lebih
+besar dari yang terakhir ia kirim, jadi viewer yang lambat (koneksi buruk, send
+tertahan flow control) langsung lompat ke chunk terbaru; producer tidak pernah
+menunggu viewer dan tidak ada buffer yang tumbuh. Viewer bisa membatasi fps-nya
+sendiri (``max_fps``). Chunk yang dilewati dihitung per viewer, terpisah:
+    - ``dropped``   - terbit saat viewer masih mengirim chunk sebelumnya (client lambat)
+    - ``throttled`` - terbit selama viewer sengaja menunggu karena ``max_fps``
+
+Producer adalah thread biasa; viewer adalah coroutine di event loop. Setiap
+publish hanya menjadwalkan satu callback ke event loop (``call_soon_threadsafe``)
+yang menyelesaikan satu future bersama, berapapun jumlah viewer, sehingga
+viewer tidak memakai thread dari threadpool.
+"""
+
+import asyncio
+import threading
+import time
+from itertools import count
+from typing import Dict, Optional
+
+FPS_WINDOW_S = 1.0
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Subscriber:
+    """One viewer: its position in the stream, fps limit and delivery counters."""
+
+    def __init__(self, subscriber_id: int, max_fps: float = 0.0, client: str = ""):
+        self.id = subscriber_id
+        self.client = client
+        self.max_fps = max(0.0, float(max_fps))
+        self.interval_s = 1.0 / self.max_fps if self.max_fps > 0 else 0.0
+        self.connected_at = time.monotonic()
+        self.last_seq = 0
+        self.next_at = 0.0
+
+        # Statistics
+        self.frames = 0
+        self.dropped = 0
+        self.throttled = 0
+        self.fps = 0.0
+        self._fps_start = self.connected_at
+        self._fps_count = 0
+
+    def _delivered(self, seq: int, now: float, ready_seq: int, waited: bool):
+        """Account for chunk ``seq``.
+
+        ``ready_seq`` adalah chunk terbaru saat viewer siap lagi (kirim sebelumnya selesai);
+        ``waited`` True jika viewer lalu menunggu karena ``max_fps``.
+        """
+        if self.last_seq:
+            skipped = max(0, seq - self.last_seq - 1)
+            # Yang terbit sebelum viewer siap hilang karena lambat; chunk ready_seq sendiri
+            # dan sesudahnya hanya terlewat karena jeda max_fps
+            slow = min(skipped, max(0, ready_seq - self.last_seq - 1)) if waited else skipped
+            self.dropped += slow
+            self.throttled += skipped - slow
+        self.last_seq = seq
+        self.frames += 1
+        self.next_at = now + self.interval_s
+        self._fps_count += 1
+        if now - self._fps_start >= FPS_WINDOW_S:
+            self.fps = self._fps_count / (now - self._fps_start)
+            self._fps_start, self._fps_count = now, 0
+
+    def stats(self) -> dict:
+        idle = time.monotonic() - self._fps_start >= 2 * FPS_WINDOW_S
+        return {
+            "id": self.id,
+            "client": self.client,
+            "max_fps": self.max_fps,
+            "connected_s": round(time.monotonic() - self.connected_at, 1),
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "throttled": self.throttled,
+            "fps": 0.0 if idle else round(self.fps, 2),
+        }
+
+
+class FrameHub:
+    """Latest-chunk fan-out: one producer publishes, any number of subscribers read."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Future bersama yang diselesaikan pada publish berikutnya
+        self._wakeup: Optional[asyncio.Future] = None
+        self._chunk: Optional[bytes] = None
+        self._seq = 0
+        self._closed = False
+
+        self._subscribers: Dict[int, Subscriber] = {}
+        self._ids = count(1)
+
+        # Statistics
+        self.peak_subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.fps = 0.0
+        self._fps_start = time.monotonic()
+        self._fps_count = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, max_fps: float = 0.0, client: str = "") -> Subscriber:
+        """Register a viewer, optionally limited to ``max_fps`` (0 = every published chunk)."""
+        with self._lock:
+            subscriber = Subscriber(next(self._ids), max_fps, client)
+            self._subscribers[subscriber.id] = subscriber
+            self.peak_subscribers = max(self.peak_subscribers, len(self._subscribers))
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.pop(subscriber.id, None)
+
+    def publish(self, chunk: bytes):
+        """Replace the latest chunk and wake every waiting subscriber (thread-safe)."""
+        now = time.monotonic()
+        with self._lock:
+            self._chunk = chunk
+            self._seq += 1
+            self.published += 1
+            self._fps_count += 1
+            if now - self._fps_start >= FPS_WINDOW_S:
+                self.fps = self._fps_count / (now - self._fps_start)
+                self._fps_start, self._fps_count = now, 0
+        self._wake()
+
+    def _wake(self):
+        with self._lock:
+            wakeup, self._wakeup = self._wakeup, None
+        if wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(_resolve, wakeup)
+            except RuntimeError:
+                # Event loop sudah ditutup (shutdown)
+                pass
+
+    async def next(self, subscriber: Subscriber, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Await the newest chunk the subscriber has not sent yet.
+
+        Chunk yang terlewat dihitung di ``subscriber.dropped`` (viewer lambat) atau
+        ``subscriber.throttled`` (jeda ``max_fps``). Returns None on timeout or after
+        ``close``. Semua viewer harus berada di event loop yang sama.
+        """
+        ready_seq = self._seq
+        delay = subscriber.next_at - time.monotonic()
+        waited = delay > 0
+        if waited:
+            await asyncio.sleep(delay)
+        while True:
+            with self._lock:
+                if self._closed:
+                    return None
+                if self._seq > subscriber.last_seq:
+                    self.delivered += 1
+                    subscriber._delivered(self._seq, time.monotonic(), ready_seq, waited)
+                    return self._chunk
+                if self._wakeup is None:
+                    if self._loop is None:
+                        self._loop = asyncio.get_running_loop()
+                    self._wakeup = self._loop.create_future()
+                wakeup = self._wakeup
+            try:
+                # shield: viewer yang disconnect tidak membatalkan future bersama
+                await asyncio.wait_for(asyncio.shield(wakeup), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        """Wake all subscribers and make further waits return immediately."""
+        with self._lock:
+            self._closed = True
+        self._wake()
+
+    def stats(self) -> dict:
+        with self._lock:
+            # fps basi jika pipeline berhenti publish
+            idle = time.monotonic() - self._fps_start >= 2 * FPS_WINDOW_S
+            return {
+                "subscribers": len(self._subscribers),
+                "peak_subscribers": self.peak_subscribers,
+                "published": self.published,
+                "delivered": self.delivered,
+                "fps": 0.0 if idle else round(self.fps, 2),
+                "clients": [subscriber.stats() for subscriber in self._subscribers.values()],
+            }
@@ -0,0 +1,133 @@
+"""
+Camera Capture
+==============
+Thread capture khusus untuk ``cv2.VideoCapture``: kamera dibaca terus-menerus
+ke buffer kecil berisi frame terbaru beserta timestamp capture-nya, sehingga
+frame tidak menumpuk di buffer driver selama inference berjalan. Pipeline
+selalu mengambil frame paling baru; frame yang tertimpa sebelum sempat diambil
+dihitung sebagai ``dropped``.
+
+Timestamp capture (``time.monotonic()`` saat ``read()`` selesai) ikut dibawa
+bersama frame agar latency capture -> tampil bisa diukur.
+
+Konfigurasi (env):
+    SIBI_CAPTURE_BUFFER - jumlah frame terakhir yang disimpan (default: 2)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+import cv2
+import numpy as np  # type: ignore[import]
+
+CAPTURE_BUFFER = int(os.environ.get("SIBI_CAPTURE_BUFFER", 2))
+FPS_WINDOW_S = 1.0
+
+
+class CapturedFrame(NamedTuple):
+    """A camera frame with its sequence number and capture time (``time.monotonic()``)."""
+    seq: int
+    frame: np.ndarray
+    captured_at: float
+
+
+class FrameGrabber:
+    """Drains a ``cv2.VideoCapture`` on its own thread into a latest-frame ring buffer."""
+
+    def __init__(self, capture: "cv2.VideoCapture", buffer_size: int = CAPTURE_BUFFER, name: str = "camera"):
+        """
+        Args:
+            capture: ``cv2.VideoCapture`` yang sudah terbuka
+            buffer_size: Jumlah frame terakhir yang disimpan
+            name: Nama thread capture
+        """
+        self.capture = capture
+        self._buffer: deque = deque(maxlen=max(1, int(buffer_size)))
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._last_taken = 0
+        self._stopped = False
+
+        # Statistics
+        self.captured = 0
+        self.taken = 0
+        self.dropped = 0
+        self.read_failures = 0
+        self.fps = 0.0
+        self._fps_start = time.monotonic()
+        self._fps_count = 0
+
+        # Buffer driver sekecil mungkin (tidak semua backend mendukung)
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._thread = threading.Thread(target=self._run, name=f"capture-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stopped:
+                ret, frame = self.capture.read()
+                now = time.monotonic()
+                if not ret or frame is None:
+                    self.read_failures += 1
+                    time.sleep(0.01)
+                    continue
+                with self._cond:
+                    self._seq += 1
+                    self._buffer.append(CapturedFrame(self._seq, frame, now))
+                    self.captured += 1
+                    self._fps_count += 1
+                    if now - self._fps_start >= FPS_WINDOW_S:
+                        self.fps = self._fps_count / (now - self._fps_start)
+                        self._fps_start, self._fps_count = now, 0
+                    self._cond.notify_all()
+        finally:
+            # Kamera hanya di-release dari thread capture, tidak pernah saat read() berjalan
+            self.capture.release()
+
+    def latest(self, after: int = 0, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """Newest frame with ``seq > after``, waiting up to ``timeout``; None on timeout or release."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > after or self._stopped, timeout):
+                return None
+            if self._stopped or not self._buffer:
+                return None
+            frame = self._buffer[-1]
+            # Frame di antara pengambilan sebelumnya dan yang ini tidak pernah diproses
+            if self._last_taken:
+                self.dropped += max(0, frame.seq - self._last_taken - 1)
+            self._last_taken = frame.seq
+            self.taken += 1
+            return frame
+
+    def isOpened(self) -> bool:
+        return not self._stopped and self.capture.isOpened()
+
+    def release(self, timeout: float = 2.0) -> bool:
+        """Stop the capture thread, which releases the camera after its current ``read()``.
+
+        Blocking (join sampai ``timeout``); jangan dipanggil dari event loop. Returns
+        False jika thread belum selesai dalam ``timeout`` (kamera di-release begitu
+        ``read()`` kembali).
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is threading.current_thread():
+            return False
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def stats(self) -> dict:
+        with self._cond:
+            idle = time.monotonic() - self._fps_start >= 2 * FPS_WINDOW_S
+            return {
+                "captured": self.captured,
+                "processed": self.taken,
+                "dropped": self.dropped,
+                "read_failures": self.read_failures,
+                "capture_fps": 0.0 if idle else round(self.fps, 2),
+                "buffer_size": self._buffer.maxlen,
+            }
@@ -1,6 +1,9 @@
 # ===== BARIS PALING ATAS =====
 import os
 import sys
+import time
+
+PROCESS_START = time.perf_counter()
 
 # SET ENVIRONMENT VARIABLES SEBELUM IMPORT APAPUN
 os.environ["OPENCV_IO_ENABLE_JASPER"] = "0"
@@ -14,21 +17,103 @@ os.environ["DISABLE_OPENCV_IO_FUNCTIONS"] = "1"
 print("🚀 Starting SIBI Detection API")
 print(f"Python version: {sys.version}")
 print(f"Current directory: {os.getcwd()}")
-print(f"Files in directory: {os.listdir('.')}")
+
+# Modul lokal (batching, dll.) harus bisa diimport baik lewat
+# `python detect_server.py` maupun `uvicorn model.detect_server:app`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # ===== IMPORT SETELAH ENV VARS =====
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-from typing import List, Tuple
-import base64
-import io
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import queue
+import struct
 from pathlib import Path
-from PIL import Image
-from ultralytics import YOLO  # type: ignore[import]
 import numpy as np  # type: ignore[import]
 
-app = FastAPI(title="InSignia SIBI Detection API")
+from backends import BACKEND, load_backend
+from batching import FrameExpired, FrameSuperseded, MicroBatcher, QueueFull
+from postprocess import as_detections, parse_class_thresholds, select
+import prefork  # sebelum inference_pool: mengatur default SIBI_WORKERS untuk mode pre-fork
+from inference_pool import InferencePool
+from encoding import BINARY, MSGPACK, encode, encode_batch, negotiate, parse_format
+from encoding import msgpack, pack_record
+from event_log import EventLog
+from imaging import ImageDecodeError, decode_base64, decode_image_bytes
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Counter, CounterFunc, Gauge, Histogram, Registry
+from result_cache import ResultCache, file_version, frame_key
+from motion_gate import MotionGate, motion_thumbnail
+from roi_tracking import ROI_IMGSZ, ROI_TRACKING, RoiTracker, crop
+from startup import FAST_START, StartupTimer, warm_up
+
+# Durasi setiap fase startup (log + /ready)
+startup_timer = StartupTimer(PROCESS_START)
+startup_timer.record("imports", (time.perf_counter() - PROCESS_START) * 1000.0)
+
+
+def create_replica(worker_index: int):
+    """Model replica for one inference worker (worker 0 reuses the global model), warmed up before serving."""
+    if worker_index == 0 and yolo_model is not None:
+        model = yolo_model
+    else:
+        model = load_backend(Path(__file__).with_name("best.pt"), threads=pool.threads_per_worker)
+    with startup_timer.phase(f"warmup worker {worker_index}"):
+        warm_up(model, warmup_sizes())
+    return model
+
+
+def warmup_sizes() -> List[int]:
+    """``imgsz`` values served at runtime: the model input size, plus the ROI crop size."""
+    return [model_input_size()] + ([ROI_IMGSZ] if ROI_TRACKING else [])
+
+
+# Worker pool: inference berjalan di luar event loop, satu replika model per worker
+pool = InferencePool(create_replica)
+
+
+async def run_batch(images: List[np.ndarray]) -> list:
+    """Run one batched YOLO forward pass on a pool worker."""
+    return await pool.run(lambda model: model(images, verbose=False))
+
+
+async def run_roi_batch(images: List[np.ndarray]) -> list:
+    """Batched forward pass for ROI crops at the smaller tracking ``imgsz``."""
+    return await pool.run(lambda model: model(images, imgsz=ROI_IMGSZ, verbose=False))
+
+
+# Scheduler yang menggabungkan request /detect yang datang bersamaan
+batcher = MicroBatcher(run_batch, concurrency=pool.workers)
+# Crop ROI punya imgsz berbeda, jadi tidak bisa satu batch dengan frame penuh
+roi_batcher = MicroBatcher(run_roi_batch, concurrency=pool.workers)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the inference pool and micro-batching scheduler.
+
+    With ``SIBI_FAST_START`` (default) the model is loaded and warmed up in the
+    background, so uvicorn binds immediately and ``/ready`` reports progress.
+    """
+    await batcher.start()
+    await roi_batcher.start()
+    startup_task = asyncio.ensure_future(run_in_threadpool(start_model))
+    if not FAST_START:
+        await startup_task
+    yield
+    await roi_batcher.stop()
+    await batcher.stop()
+    pool.shutdown()
+
+
+app = FastAPI(title="InSignia SIBI Detection API", lifespan=lifespan)
 
 origins = ["*"]
 
@@ -42,25 +127,24 @@ app.add_middleware(
 
 # Global model variable
 yolo_model = None
+# True setelah model dimuat dan semua replika selesai warm-up
+MODEL_LOADED = False
+# "loading" -> "ready" | "failed"
+startup_state = "loading"
 
 def load_model():
     """Load YOLO model with error handling."""
     global yolo_model
     try:
         MODEL_PATH = Path(__file__).with_name("best.pt")
-        print(f"📂 Looking for model at: {MODEL_PATH}")
-        print(f"📂 Absolute path: {MODEL_PATH.absolute()}")
-        print(f"📂 File exists: {MODEL_PATH.exists()}")
+        print(f"📂 Looking for model at: {MODEL_PATH.absolute()}")
         
         if not MODEL_PATH.exists():
-            # List semua file untuk debugging
-            print("📁 Listing all files in current dir:")
-            for f in Path('.').rglob('*'):
-                print(f"  - {f}")
+            print(f"📁 Files in {MODEL_PATH.parent}: {sorted(p.name for p in MODEL_PATH.parent.iterdir())}")
             raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
 
-        print("🔄 Loading YOLO model...")
-        yolo_model = YOLO(str(MODEL_PATH))
+        print(f"🔄 Loading YOLO model (backend: {BACKEND})...")
+        yolo_model = load_backend(MODEL_PATH, threads=pool.threads_per_worker)
         print(f"✅ Model loaded! Classes: {len(yolo_model.names)}")
         return True
     except Exception as e:
@@ -69,9 +153,58 @@ def load_model():
         traceback.print_exc()
         return False
 
-# Load model on startup
-print("⚙️ Loading model...")
-MODEL_LOADED = load_model()
+def model_input_size() -> int:
+    """Letterbox size used by the predictor (training ``imgsz``, default 640)."""
+    imgsz = yolo_model.overrides.get("imgsz", 640) if yolo_model is not None else 640
+    return max(imgsz) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+
+# JPEG di-decode langsung mendekati resolusi input model (set SIBI_REDUCED_DECODE=0
+# untuk decode resolusi penuh)
+REDUCED_DECODE = os.environ.get("SIBI_REDUCED_DECODE", "1") != "0"
+DECODE_SIZE = None
+
+# Versi model (+ backend) ikut jadi bagian key cache, supaya ganti best.pt tidak memakai hasil lama
+MODEL_VERSION = "none"
+
+def start_model():
+    """Load the model, start the pool (replicas load + warm up) and mark the server ready."""
+    global MODEL_LOADED, DECODE_SIZE, MODEL_VERSION, startup_state
+    # Mode pre-fork: model sudah dimuat master sebelum fork (halaman weights dibagi)
+    if yolo_model is not None:
+        loaded = True
+    else:
+        print("⚙️ Loading model...")
+        with startup_timer.phase("load model"):
+            loaded = load_model()
+    if not loaded:
+        startup_state = "failed"
+        return
+
+    DECODE_SIZE = model_input_size() if REDUCED_DECODE else None
+    MODEL_VERSION = f'{file_version(Path(__file__).with_name("best.pt"))}-{BACKEND}'
+    try:
+        with startup_timer.phase("start pool"):
+            pool.start()
+    except Exception as e:
+        print(f"❌ Failed to start inference pool: {str(e)}")
+        startup_state = "failed"
+        return
+
+    MODEL_LOADED = True
+    startup_state = "ready"
+    print(f"✅ Ready in {startup_timer.stats()['since_start_ms']:.0f} ms since process start")
+
+# Cache hasil untuk frame identik (ukuran entry diperkirakan dari JSON-nya,
+# dikali overhead objek Python)
+result_cache = ResultCache(sizeof=lambda response: 4 * len(response.model_dump_json()))
+# Deadline setiap caller yang menunggu hasil per key cache (lihat detect_cached)
+shared_deadlines: Dict[str, List[Optional[float]]] = {}
+
+# Mode sesi: frame yang hampir sama dengan frame sesi sebelumnya tidak di-inference ulang
+motion_gate = MotionGate()
+
+# Mode sesi: setelah tangan ditemukan, frame berikutnya cukup di-inference di sekitar box terakhir
+roi_tracker = RoiTracker()
 
 # Mapping kelas SIBI yang benar
 CORRECTED_CLASS_NAMES = {
@@ -82,6 +215,117 @@ CORRECTED_CLASS_NAMES = {
 
 CLASS_NAMES = CORRECTED_CLASS_NAMES
 
+# Postprocessing: threshold global, threshold per kelas (mis. "M=0.5,N=0.5") dan
+# jumlah box maksimum di response (box pertama selalu yang terbaik)
+CONFIDENCE_THRESHOLD = float(os.environ.get("SIBI_CONF_THRESHOLD", 0.2))
+CLASS_THRESHOLDS = parse_class_thresholds(os.environ.get("SIBI_CLASS_THRESHOLDS", ""), CLASS_NAMES)
+TOP_K = max(1, int(os.environ.get("SIBI_TOP_K", 1)))
+
+# Log event JSON lines (antrean non-blocking, sampling per event, error dibatasi)
+event_log = EventLog("detect")
+
+# Metrik Prometheus untuk /metrics (shard per thread, tanpa lock di hot path)
+metrics = Registry()
+stage_seconds = metrics.register(Histogram(
+    "sibi_detect_stage_seconds",
+    "Latency of each detect stage (inference includes micro-batch wait)",
+    ("stage",),
+))
+requests_total = metrics.register(Counter("sibi_detect_requests", "Detect requests (frames for batch and WebSocket)", ("endpoint",)))
+no_hand_total = metrics.register(Counter("sibi_detect_no_hand", "Frames without a hand above the confidence threshold", ("endpoint",)))
+errors_total = metrics.register(Counter("sibi_detect_errors", "Detect errors by type", ("type",)))
+responses_total = metrics.register(Counter("sibi_detect_responses", "Responses by negotiated encoding", ("format",)))
+dropped_total = metrics.register(Counter("sibi_detect_dropped", "Frames answered as stale without inference", ("reason",)))
+disconnects_total = metrics.register(Counter("sibi_detect_client_disconnects", "Requests (WebSocket frames) whose client left before the result", ("endpoint",)))
+metrics.register(Gauge("sibi_batch_queue_depth", "Frames pending in the micro-batchers", lambda: batcher.stats()["pending"] + roi_batcher.stats()["pending"]))
+metrics.register(Gauge("sibi_pool_queue_depth", "Jobs queued for the inference workers", lambda: pool.stats()["queued"]))
+metrics.register(Gauge("sibi_model_loaded", "1 once the model is loaded and warmed up", lambda: MODEL_LOADED))
+metrics.register(CounterFunc("sibi_cancelled_frames", "Frames removed from the batch queue after their client left", lambda: batcher.stats()["cancelled"] + roi_batcher.stats()["cancelled"]))
+metrics.register(CounterFunc("sibi_abandoned_frames", "Frames whose client left during inference (postprocessing skipped)", lambda: batcher.stats()["abandoned"] + roi_batcher.stats()["abandoned"]))
+metrics.register(CounterFunc("sibi_pool_cancelled_jobs", "Inference jobs dropped from the pool queue before a worker started them", lambda: pool.stats()["cancelled"]))
+
+# Jenis error untuk sibi_detect_errors_total
+ERROR_TYPES = {
+    400: "bad_request",
+    413: "too_large",
+    415: "unsupported_media_type",
+    422: "validation",
+    429: "queue_full",
+    500: "inference",
+    503: "unavailable",
+}
+
+def count_result(endpoint: str, response: "DetectResponse"):
+    """Count one detect result for ``/metrics``."""
+    if response.letter == "-" and not response.stale:
+        no_hand_total.inc(endpoint)
+
+def encoded_response(body: BaseModel, accept: Optional[str]) -> Response:
+    """Serialize a response model in the encoding negotiated from ``Accept`` (timed as the ``serialize`` stage)."""
+    media_type = negotiate(accept)
+    with stage_seconds.time("serialize"):
+        if isinstance(body, DetectBatchResponse):
+            content = encode_batch(body, media_type)
+        else:
+            content = encode(body, media_type)
+    responses_total.inc(media_type)
+    return Response(content, media_type=media_type, headers={"Vary": "Accept"})
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before its result was ready."""
+
+async def wait_for_disconnect(request: Request):
+    """Return once the client has disconnected (the request body must already be read)."""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+async def cancel_on_disconnect(request: Request, endpoint: str, work):
+    """Await ``work``, cancelling it if the client disconnects first.
+
+    Frame yang masih antre dibuang dari antrean; jika inference sudah berjalan,
+    hasilnya dibuang dan postprocessing dilewati.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if not task.done():
+        task.cancel()
+        disconnects_total.inc(endpoint)
+        event_log.event("client_disconnected", endpoint=endpoint)
+        raise ClientDisconnected()
+    return task.result()
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected(request: Request, exc: ClientDisconnected):
+    # Tidak ada yang membaca response ini (499 = client closed request)
+    return Response(status_code=499)
+
+@app.exception_handler(HTTPException)
+async def count_http_error(request: Request, exc: HTTPException):
+    error_type = ERROR_TYPES.get(exc.status_code, str(exc.status_code))
+    errors_total.inc(error_type)
+    if exc.status_code >= 500:
+        event_log.error(error_type, exc.__cause__, status=exc.status_code, path=request.url.path, detail=exc.detail)
+    return await http_exception_handler(request, exc)
+
+@app.exception_handler(RequestValidationError)
+async def count_validation_error(request: Request, exc: RequestValidationError):
+    errors_total.inc(ERROR_TYPES[422])
+    return await request_validation_exception_handler(request, exc)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of stage latencies, counters and gauges."""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     """Root endpoint untuk test."""
@@ -89,7 +333,7 @@ async def root():
         "message": "SIBI Detection API",
         "status": "running",
         "model_loaded": MODEL_LOADED,
-        "endpoints": ["/health", "/detect"]
+        "endpoints": ["/health", "/ready", "/metrics", "/detect", "/detect/upload", "/detect/batch", "/ws/detect"]
     }
 
 @app.get("/health")
@@ -98,12 +342,35 @@ async def health_check():
     return {
         "status": "healthy" if MODEL_LOADED else "unhealthy",
         "model_loaded": MODEL_LOADED,
+        "startup": startup_state,
         "model_path": str(Path(__file__).with_name("best.pt")),
-        "classes": len(CLASS_NAMES) if MODEL_LOADED else 0
+        "backend": BACKEND,
+        "classes": len(CLASS_NAMES) if MODEL_LOADED else 0,
+        "decode_size": DECODE_SIZE,
+        "batching": batcher.stats(),
+        "pool": pool.stats(),
+        "websocket": dict(ws_stats),
+        "cache": result_cache.stats(),
+        "motion_gate": motion_gate.stats(),
+        "roi_tracking": {**roi_tracker.stats(), "batching": roi_batcher.stats()},
+        "memory": prefork.memory_report(),
+        "logging": event_log.stats(),
     }
 
+@app.get("/ready")
+async def ready_check():
+    """Readiness probe: 200 only after the model is loaded and every replica is warmed up."""
+    body = {"ready": MODEL_LOADED, "state": startup_state, "backend": BACKEND, **startup_timer.stats()}
+    return JSONResponse(body, status_code=200 if MODEL_LOADED else 503)
+
 class DetectRequest(BaseModel):
     image: str
+    # Opsional: aktifkan motion-gating + ROI tracking untuk stream frame dari satu client
+    session_id: Optional[str] = None
+    # Opsional: sisa waktu (ms sejak request tiba) dan/atau waktu capture frame (unix ms);
+    # frame yang lewat deadline dijawab "stale" tanpa inference
+    deadline_ms: Optional[float] = None
+    captured_at: Optional[float] = None
 
 class Keypoint(BaseModel):
     x: float
@@ -121,58 +388,113 @@ class DetectResponse(BaseModel):
     keypoints: List[Keypoint]
     bones: List[Tuple[int, int]]
     boxes: List[Box]
+    # True jika hasil diambil dari frame sesi sebelumnya tanpa menjalankan YOLO
+    inference_skipped: bool = False
+    # True jika frame dibuang sebelum inference (deadline lewat / digantikan frame sesi yang lebih baru)
+    stale: bool = False
 
-def decode_image(data_url: str) -> Image.Image:
-    """Decode data URL (e.g. 'data:image/jpeg;base64,...') to PIL Image."""
-    if "," in data_url:
-        _, b64 = data_url.split(",", 1)
-    else:
-        b64 = data_url
+# Jumlah frame maksimum per panggilan /detect/batch
+BATCH_MAX_FRAMES = int(os.environ.get("SIBI_BATCH_MAX_FRAMES", 32))
 
-    try:
-        image_bytes = base64.b64decode(b64)
-    except (ValueError, TypeError) as exc:
-        raise HTTPException(status_code=400, detail="Invalid base64 image") from exc
+class DetectBatchRequest(BaseModel):
+    images: List[str]
+    deadline_ms: Optional[float] = None
+    captured_at: Optional[float] = None
+
+class DetectBatchItem(BaseModel):
+    index: int
+    result: Optional[DetectResponse] = None
+    error: Optional[str] = None
+
+class DetectBatchResponse(BaseModel):
+    results: List[DetectBatchItem]
+    succeeded: int
+    failed: int
+
+# Umur maksimum frame sejak capture (captured_at), 0 = abaikan captured_at
+MAX_FRAME_AGE_MS = float(os.environ.get("SIBI_MAX_FRAME_AGE_MS", 800))
+# Per sesi hanya frame terbaru yang boleh menunggu di antrean inference
+LATEST_FRAME_WINS = os.environ.get("SIBI_LATEST_FRAME_WINS", "1") != "0"
 
+def frame_deadline(deadline_ms: Optional[float] = None, captured_at: Optional[float] = None) -> Optional[float]:
+    """``time.monotonic()`` deadline from a client budget (ms from arrival) and/or capture time (unix ms)."""
+    now = time.monotonic()
+    deadlines = []
+    if deadline_ms is not None:
+        deadlines.append(now + deadline_ms / 1000.0)
+    if captured_at is not None and MAX_FRAME_AGE_MS > 0:
+        age_ms = time.time() * 1000.0 - captured_at
+        deadlines.append(now + (MAX_FRAME_AGE_MS - age_ms) / 1000.0)
+    return min(deadlines) if deadlines else None
+
+def header_float(request: Request, name: str) -> Optional[float]:
+    """Numeric request header, or None when absent."""
+    value = request.headers.get(name)
+    if value is None:
+        return None
     try:
-        return Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail="Invalid image data") from exc
+        return float(value)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} header") from exc
 
-@app.post("/detect", response_model=DetectResponse)
-async def detect(req: DetectRequest) -> DetectResponse:
-    """
-    Run SIBI detection on a single frame sent as base64 data URL.
-    """
-    if not MODEL_LOADED or yolo_model is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+def expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
 
-    image = decode_image(req.image)
-    
-    # Convert PIL to numpy array (RGB format for YOLO)
-    img_np = np.array(image)
-    
+def latest_deadline(deadlines) -> Optional[float]:
+    """Deadline that still covers every caller: None if any caller has no deadline."""
+    deadlines = list(deadlines)
+    if not deadlines or None in deadlines:
+        return None
+    return max(deadlines)
+
+def stale_response(session_id: Optional[str], reason: str) -> "DetectResponse":
+    """Cheap answer for a dropped frame: the session's last result, or an empty one, marked ``stale``."""
+    dropped_total.inc(reason)
+    event_log.event("stale", reason=reason, session=session_id)
+    previous = motion_gate.last_response(session_id) if session_id else None
+    if previous is not None:
+        return previous.model_copy(update={"inference_skipped": True, "stale": True})
+    return DetectResponse(letter="-", confidence=0.0, keypoints=[], bones=[], boxes=[], stale=True)
+
+def decode_data_url_timed(data_url: str) -> np.ndarray:
+    """Base64 + image decode of a data URL, each stage timed for ``/metrics``."""
+    with stage_seconds.time("base64_decode"):
+        buf = decode_base64(data_url)
+    with stage_seconds.time("image_decode"):
+        return decode_image_bytes(buf, DECODE_SIZE)
+
+def decode_frame(data_url: str) -> np.ndarray:
+    """Decode data URL to a BGR numpy array near model resolution (runs in the threadpool)."""
     try:
-        results = yolo_model(img_np, verbose=False)[0]
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Model inference failed: {exc!s}") from exc
-    
-    if results.boxes is None or len(results.boxes) == 0:
-        return DetectResponse(
-            letter="-",
-            confidence=0.0,
-            keypoints=[],
-            bones=[],
-            boxes=[],
-        )
-    
-    CONFIDENCE_THRESHOLD = 0.2
-    boxes_obj = results.boxes
-    confidences = boxes_obj.conf.cpu().numpy() if hasattr(boxes_obj.conf, "cpu") else boxes_obj.conf.numpy()
-    
-    valid_indices = [i for i, conf in enumerate(confidences) if conf >= CONFIDENCE_THRESHOLD]
+        return decode_data_url_timed(data_url)
+    except ImageDecodeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+def decode_frame_bytes(buf: bytes) -> np.ndarray:
+    """Decode raw JPEG/PNG bytes to a BGR numpy array near model resolution (runs in the threadpool)."""
+    try:
+        with stage_seconds.time("image_decode"):
+            return decode_image_bytes(buf, DECODE_SIZE)
+    except ImageDecodeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+def decode_frames(data_urls: List[str]) -> List[object]:
+    """Decode every frame independently; a corrupt frame yields its error message."""
+    frames: List[object] = []
+    for data_url in data_urls:
+        try:
+            frames.append(decode_data_url_timed(data_url))
+        except ImageDecodeError as exc:
+            errors_total.inc(ERROR_TYPES[400])
+            frames.append(str(exc))
+    return frames
+
+def build_response(results) -> DetectResponse:
+    """Convert one model result (``Detections`` or YOLO ``Results``) to a ``DetectResponse``."""
+    detections = select(as_detections(results), CONFIDENCE_THRESHOLD, CLASS_THRESHOLDS, TOP_K)
     
-    if not valid_indices:
+    # Detections sudah terurut dari confidence tertinggi
+    if len(detections) == 0:
         return DetectResponse(
             letter="-",
             confidence=0.0,
@@ -181,21 +503,16 @@ async def detect(req: DetectRequest) -> DetectResponse:
             boxes=[],
         )
     
-    best_idx = valid_indices[0]
-    for idx in valid_indices:
-        if confidences[idx] > confidences[best_idx]:
-            best_idx = idx
-    
-    best_box = boxes_obj[best_idx]
-    best_conf = float(confidences[best_idx])
+    best_conf = float(detections.conf[0])
     
-    cx, cy, w, h = best_box.xywhn[0].tolist()
-    bx = cx - (w / 2.0)
-    by = cy - (h / 2.0)
+    xywhn = detections.xywhn()
+    cx, cy, w, h = xywhn[0].tolist()
     
-    out_boxes = [Box(x=float(bx), y=float(by), w=float(w), h=float(h))]
+    # Semua box top-k sekaligus: (cx, cy, w, h) -> pojok kiri atas (x, y, w, h)
+    xywhn[:, :2] -= xywhn[:, 2:] / 2.0
+    out_boxes = [Box(x=x, y=y, w=bw, h=bh) for x, y, bw, bh in xywhn.tolist()]
     
-    cls_idx = int(best_box.cls.item())
+    cls_idx = int(detections.cls[0])
     letter = CLASS_NAMES.get(cls_idx, "?")
     
     keypoints: List[Keypoint] = [
@@ -205,7 +522,7 @@ async def detect(req: DetectRequest) -> DetectResponse:
     ]
     bones: List[Tuple[int, int]] = [(0, 1), (1, 2)]
     
-    print(f"✅ DETECTED: Letter '{letter}' with confidence {best_conf:.3f}")
+    event_log.event("detected", letter=letter, confidence=round(best_conf, 3))
     
     return DetectResponse(
         letter=letter,
@@ -215,8 +532,406 @@ async def detect(req: DetectRequest) -> DetectResponse:
         boxes=out_boxes,
     )
 
+async def run_inference(submit, payload, **kwargs):
+    """Call a batcher submit function, mapping overload and model errors to HTTP errors.
+
+    ``FrameExpired`` / ``FrameSuperseded`` are passed through (answered as stale, not errors).
+    """
+    try:
+        return await submit(payload, **kwargs)
+    except (FrameExpired, FrameSuperseded):
+        raise
+    except QueueFull as exc:
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy, inference queue full",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except queue.Full as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Inference workers saturated",
+            headers={"Retry-After": "1"},
+        ) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Model inference failed: {exc!s}") from exc
+
+async def detect_cached(img_np: np.ndarray, roi_crop: bool = False, deadline: Optional[float] = None,
+                        session_id: Optional[str] = None) -> DetectResponse:
+    """Detect one decoded frame (or ROI crop), served from the result cache when possible."""
+    submit = roi_batcher.submit if roi_crop else batcher.submit
+    # Key batcher (latest-frame-wins per sesi), terpisah dari key cache (hash isi frame)
+    session_key = session_id if LATEST_FRAME_WINS else None
+
+    async def infer(key: Optional[str] = session_key, deadline: Optional[float] = deadline) -> DetectResponse:
+        with stage_seconds.time("inference"):
+            results = await run_inference(submit, img_np, deadline=deadline, key=key)
+        with stage_seconds.time("postprocess"):
+            return build_response(results)
+
+    if not result_cache.enabled:
+        return await infer()
+    version = f"{MODEL_VERSION}:roi{ROI_IMGSZ}" if roi_crop else MODEL_VERSION
+    cache_key = await run_in_threadpool(frame_key, img_np, version)
+
+    async def infer_shared() -> DetectResponse:
+        try:
+            return await infer()
+        except (FrameSuperseded, FrameExpired):
+            # Frame identik dari sesi lain ikut menunggu komputasi ini: frame pemilik
+            # sudah digantikan frame baru atau deadline-nya lewat, tapi caller lain
+            # tetap butuh hasilnya selama deadline mereka belum lewat
+            if result_cache.waiters(cache_key) <= 1:
+                raise
+            retry_deadline = latest_deadline(shared_deadlines.get(cache_key, ()))
+            if expired(retry_deadline):
+                raise
+            return await infer(None, retry_deadline)
+
+    waiting = shared_deadlines.setdefault(cache_key, [])
+    waiting.append(deadline)
+    try:
+        return await result_cache.get_or_compute(cache_key, infer_shared)
+    finally:
+        waiting.remove(deadline)
+        if not waiting:
+            del shared_deadlines[cache_key]
+
+def box_pixels(response: DetectResponse, frame_w: int, frame_h: int) -> Optional[Tuple[float, float, float, float]]:
+    """Best box of a response as full-frame pixel xyxy, or None if nothing was detected."""
+    if not response.boxes:
+        return None
+    b = response.boxes[0]
+    return (b.x * frame_w, b.y * frame_h, (b.x + b.w) * frame_w, (b.y + b.h) * frame_h)
+
+def remap_response(response: DetectResponse, roi, frame_w: int, frame_h: int) -> DetectResponse:
+    """Map coordinates normalized to an ROI crop back to the full frame."""
+    ox, oy = roi[0] / frame_w, roi[1] / frame_h
+    sx, sy = (roi[2] - roi[0]) / frame_w, (roi[3] - roi[1]) / frame_h
+    return response.model_copy(update={
+        "boxes": [Box(x=ox + b.x * sx, y=oy + b.y * sy, w=b.w * sx, h=b.h * sy) for b in response.boxes],
+        "keypoints": [Keypoint(x=ox + k.x * sx, y=oy + k.y * sy) for k in response.keypoints],
+    })
+
+async def detect_tracked(img_np: np.ndarray, session_id: str, deadline: Optional[float] = None) -> DetectResponse:
+    """Infer on a crop around the session's last hand box, falling back to the full frame."""
+    frame_h, frame_w = img_np.shape[:2]
+    roi = roi_tracker.roi_for(session_id, frame_w, frame_h)
+    if roi is not None:
+        response = await detect_cached(crop(img_np, roi), True, deadline, session_id)
+        response = remap_response(response, roi, frame_w, frame_h)
+        box = box_pixels(response, frame_w, frame_h)
+        if roi_tracker.accept(roi, box, response.confidence, frame_w, frame_h):
+            roi_tracker.update(session_id, box)
+            return response
+
+    response = await detect_cached(img_np, deadline=deadline, session_id=session_id)
+    roi_tracker.update(session_id, box_pixels(response, frame_w, frame_h))
+    return response
+
+async def run_detection(img_np: np.ndarray, session_id: Optional[str] = None,
+                        deadline: Optional[float] = None) -> DetectResponse:
+    """Detect one decoded frame; with a session id, near-identical frames reuse the previous
+    result and the rest are inferred on a crop around the last hand box.
+
+    Frames whose ``deadline`` passes while queued, or that a newer frame of the same
+    session replaces in the queue, get a ``stale`` response instead of inference.
+    """
+    try:
+        if not session_id:
+            return await detect_cached(img_np, deadline=deadline)
+
+        thumbnail = await run_in_threadpool(motion_thumbnail, img_np)
+        previous = motion_gate.lookup(session_id, thumbnail)
+        if previous is not None:
+            return previous.model_copy(update={"inference_skipped": True})
+
+        if ROI_TRACKING:
+            response = await detect_tracked(img_np, session_id, deadline)
+        else:
+            response = await detect_cached(img_np, deadline=deadline, session_id=session_id)
+        motion_gate.update(session_id, thumbnail, response)
+        return response
+    except FrameExpired:
+        return stale_response(session_id, "expired")
+    except FrameSuperseded:
+        return stale_response(session_id, "superseded")
+
+@app.post("/detect", response_model=DetectResponse)
+async def detect(req: DetectRequest, request: Request) -> DetectResponse:
+    """
+    Run SIBI detection on a single frame sent as base64 data URL.
+    Concurrent requests are micro-batched into one YOLO forward pass.
+    Decode and inference run off the event loop.
+    The response encoding follows ``Accept`` (JSON, msgpack or the binary record).
+    """
+    requests_total.inc("detect")
+    if not MODEL_LOADED or yolo_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    deadline = frame_deadline(req.deadline_ms, req.captured_at)
+    if expired(deadline):
+        return encoded_response(stale_response(req.session_id, "expired"), request.headers.get("accept"))
+
+    # Convert data URL to numpy array (BGR, the channel order YOLO expects)
+    img_np = await run_in_threadpool(decode_frame, req.image)
+    
+    response = await cancel_on_disconnect(request, "detect", run_detection(img_np, req.session_id, deadline))
+    count_result("detect", response)
+    return encoded_response(response, request.headers.get("accept"))
+
+@app.post("/detect/upload", response_model=DetectResponse)
+async def detect_upload(request: Request) -> DetectResponse:
+    """
+    Run SIBI detection on a binary frame.
+
+    Accepts either a raw ``image/jpeg`` (or ``image/png``, ``application/octet-stream``)
+    body, or a ``multipart/form-data`` upload with the frame in the ``image`` (or
+    ``file``) field. Skips the base64/JSON overhead of ``/detect``.
+    Motion-gated session mode is enabled with an ``X-Session-Id`` header;
+    ``X-Deadline-Ms`` / ``X-Captured-At`` work like ``deadline_ms`` / ``captured_at``.
+    """
+    requests_total.inc("upload")
+    if not MODEL_LOADED or yolo_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    session_id = request.headers.get("x-session-id")
+    deadline = frame_deadline(header_float(request, "x-deadline-ms"), header_float(request, "x-captured-at"))
+    if expired(deadline):
+        return encoded_response(stale_response(session_id, "expired"), request.headers.get("accept"))
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("image") or form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing 'image' file field")
+        buf = await upload.read()
+        await form.close()
+    elif content_type.startswith(("image/", "application/octet-stream")):
+        buf = await request.body()
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Expected image/jpeg, image/png, application/octet-stream or multipart/form-data",
+        )
+
+    img_np = await run_in_threadpool(decode_frame_bytes, buf)
+    
+    response = await cancel_on_disconnect(request, "upload", run_detection(img_np, session_id, deadline))
+    count_result("upload", response)
+    return encoded_response(response, request.headers.get("accept"))
+
+@app.post("/detect/batch", response_model=DetectBatchResponse)
+async def detect_batch(req: DetectBatchRequest, request: Request) -> DetectBatchResponse:
+    """
+    Run SIBI detection on up to ``SIBI_BATCH_MAX_FRAMES`` frames in one forward pass.
+
+    Results are returned in request order. A frame that cannot be decoded gets
+    an ``error`` entry instead of failing the whole batch. If ``deadline_ms`` /
+    ``captured_at`` expire before a worker is free, every frame gets a ``stale`` result.
+    The response encoding follows ``Accept`` like ``/detect``.
+    """
+    requests_total.inc("batch", amount=len(req.images))
+    if not MODEL_LOADED or yolo_model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if not req.images:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if len(req.images) > BATCH_MAX_FRAMES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many frames: {len(req.images)} > {BATCH_MAX_FRAMES}",
+        )
+
+    deadline = frame_deadline(req.deadline_ms, req.captured_at)
+    if expired(deadline):
+        items = [DetectBatchItem(index=i, result=stale_response(None, "expired")) for i in range(len(req.images))]
+        return encoded_response(DetectBatchResponse(results=items, succeeded=len(items), failed=0),
+                                request.headers.get("accept"))
+
+    frames = await run_in_threadpool(decode_frames, req.images)
+    valid = [i for i, frame in enumerate(frames) if isinstance(frame, np.ndarray)]
+
+    outputs = {}
+    stale = False
+    if valid:
+        try:
+            with stage_seconds.time("inference"):
+                results = await cancel_on_disconnect(request, "batch", run_inference(
+                    batcher.submit_batch, [frames[i] for i in valid], deadline=deadline
+                ))
+            outputs = dict(zip(valid, results))
+        except FrameExpired:
+            stale = True
+
+    with stage_seconds.time("postprocess"):
+        items = [
+            DetectBatchItem(index=i, result=stale_response(None, "expired") if stale else build_response(outputs[i]))
+            if i in outputs or (stale and i in valid)
+            else DetectBatchItem(index=i, error=frames[i])
+            for i in range(len(frames))
+        ]
+    for item in items:
+        if item.result is not None:
+            count_result("batch", item.result)
+    return encoded_response(DetectBatchResponse(
+        results=items,
+        succeeded=len(valid),
+        failed=len(frames) - len(valid),
+    ), request.headers.get("accept"))
+
+# Frame in-flight maksimum per koneksi WebSocket (bisa diturunkan via ?inflight=N)
+WS_MAX_INFLIGHT = int(os.environ.get("SIBI_WS_MAX_INFLIGHT", 4))
+WS_FRAME_HEADER = struct.Struct(">I")
+
+ws_stats = {"connections": 0, "frames": 0, "errors": 0}
+
+def compact_result(frame_id: int, response: DetectResponse) -> str:
+    """Compact WebSocket payload: letter, confidence and best box (x, y, w, h)."""
+    box = response.boxes[0] if response.boxes else None
+    payload = {
+        "id": frame_id,
+        "letter": response.letter,
+        "confidence": round(response.confidence, 4),
+        "box": [round(box.x, 4), round(box.y, 4), round(box.w, 4), round(box.h, 4)] if box else None,
+    }
+    if response.inference_skipped:
+        payload["skipped"] = True
+    if response.stale:
+        payload["stale"] = True
+    return json.dumps(payload, separators=(",", ":"))
+
+def encode_ws_result(frame_id: int, response: DetectResponse, media_type: str):
+    """WebSocket result message: compact JSON text, or msgpack / id + binary record as bytes."""
+    if media_type == BINARY:
+        return WS_FRAME_HEADER.pack(frame_id) + pack_record(response)
+    if media_type == MSGPACK:
+        box = response.boxes[0] if response.boxes else None
+        payload = {
+            "id": frame_id,
+            "letter": response.letter,
+            "confidence": response.confidence,
+            "box": [box.x, box.y, box.w, box.h] if box else None,
+        }
+        if response.inference_skipped:
+            payload["skipped"] = True
+        if response.stale:
+            payload["stale"] = True
+        return msgpack.packb(payload)
+    return compact_result(frame_id, response)
+
+@app.websocket("/ws/detect")
+async def ws_detect(websocket: WebSocket, inflight: int = WS_MAX_INFLIGHT, session: Optional[str] = None,
+                    format: Optional[str] = None, deadline_ms: Optional[float] = None):
+    """
+    Persistent detection channel.
+
+    Each binary message is a 4-byte big-endian frame id followed by the
+    JPEG/PNG bytes. Up to ``inflight`` frames are processed concurrently;
+    results are pushed back as compact JSON text tagged with the frame id
+    (and may arrive out of order):
+
+        {"id": 7, "letter": "A", "confidence": 0.93, "box": [x, y, w, h]}
+        {"id": 8, "error": "Invalid image data"}
+
+    Pass ``?session=<id>`` to enable motion-gated session mode; skipped
+    frames are marked with ``"skipped": true``.
+
+    ``?format=msgpack`` sends results as msgpack binary messages with the same
+    fields; ``?format=binary`` sends the 4-byte frame id followed by the fixed
+    binary record (``encoding.RECORD``). Errors are always JSON text.
+
+    ``?deadline_ms=N`` gives every frame N ms from arrival; frames that miss it
+    (or, in session mode, are replaced in the queue by a newer frame) are
+    answered with ``"stale": true`` instead of being inferred.
+    """
+    await websocket.accept()
+    if not MODEL_LOADED or yolo_model is None:
+        await websocket.close(code=1011, reason="Model not loaded")
+        return
+
+    slots = asyncio.Semaphore(max(1, min(inflight, WS_MAX_INFLIGHT)))
+    send_lock = asyncio.Lock()
+    tasks: set = set()
+    media_type = parse_format(format)
+
+    async def send(payload):
+        async with send_lock:
+            if isinstance(payload, bytes):
+                await websocket.send_bytes(payload)
+            else:
+                await websocket.send_text(payload)
+
+    async def handle(frame_id: int, buf: bytes, deadline: Optional[float]):
+        try:
+            requests_total.inc("ws")
+            if expired(deadline):
+                response = stale_response(session, "expired")
+            else:
+                img_np = await run_in_threadpool(decode_frame_bytes, buf)
+                response = await run_detection(img_np, session, deadline)
+            count_result("ws", response)
+            with stage_seconds.time("serialize"):
+                payload = encode_ws_result(frame_id, response, media_type)
+            responses_total.inc(media_type)
+            await send(payload)
+            ws_stats["frames"] += 1
+        except HTTPException as exc:
+            ws_stats["errors"] += 1
+            error_type = ERROR_TYPES.get(exc.status_code, str(exc.status_code))
+            errors_total.inc(error_type)
+            if exc.status_code >= 500:
+                event_log.error(error_type, exc.__cause__, status=exc.status_code, path="/ws/detect", detail=exc.detail)
+            error = {"id": frame_id, "error": exc.detail}
+            if exc.headers and "Retry-After" in exc.headers:
+                error["retry_after"] = int(exc.headers["Retry-After"])
+            await send(json.dumps(error, separators=(",", ":")))
+        except (WebSocketDisconnect, RuntimeError):
+            # Client pergi sebelum hasil terkirim (send ke socket yang sudah tertutup)
+            pass
+        finally:
+            slots.release()
+
+    ws_stats["connections"] += 1
+    try:
+        while True:
+            event = await websocket.receive()
+            if event["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(event.get("code", 1000))
+            message = event.get("bytes")
+            if message is None:
+                # Frame teks: balas error, koneksi tetap terbuka
+                await send(json.dumps({"id": None, "error": "Frames must be binary messages (4-byte id + image bytes)"}))
+                continue
+            if len(message) <= WS_FRAME_HEADER.size:
+                await send(json.dumps({"id": None, "error": "Frame must be 4-byte id + image bytes"}))
+                continue
+
+            (frame_id,) = WS_FRAME_HEADER.unpack_from(message)
+            deadline = frame_deadline(deadline_ms)
+            # Berhenti membaca socket selama slot penuh (backpressure ke client)
+            await slots.acquire()
+            task = asyncio.create_task(handle(frame_id, message[WS_FRAME_HEADER.size:], deadline))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        ws_stats["connections"] -= 1
+        # Frame yang belum selesai dibatalkan (dibuang dari antrean / hasilnya diabaikan);
+        # task yang sudah selesai tapi belum keluar dari set tidak dihitung
+        unfinished = [task for task in tasks if not task.done()]
+        if unfinished:
+            disconnects_total.inc("ws", amount=len(unfinished))
+        for task in unfinished:
+            task.cancel()
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get('PORT', 8002))
     print(f"🌐 Starting server on port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    if prefork.PROCESSES > 1:
+        # Satu master + SIBI_PROCESSES worker yang berbagi weights (copy-on-write)
+        prefork.serve(sys.modules[__name__], prefork.PROCESSES, port=port)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
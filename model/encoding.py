@@ -0,0 +1,165 @@
+"""
+Response Encoding
+=================
+Encoding hasil deteksi yang dipilih lewat content negotiation (header ``Accept``,
+atau ``?format=`` untuk WebSocket):
+    - ``application/json`` (default): JSON dari pydantic-core (``model_dump_json``),
+      tanpa ``jsonable_encoder`` FastAPI
+    - ``application/msgpack``: field sama seperti JSON, tapi keypoints/boxes berupa
+      array angka (butuh package ``msgpack``; jika tidak terinstall, server jatuh ke JSON)
+    - ``application/vnd.sibi.detect``: record biner fixed-layout 48 byte (big-endian),
+      hanya box terbaik dan 3 keypoint
+
+Layout record biner (``RECORD``, ``>BB2sf4f6f``)::
+
+    offset  size  field
+    0       1     version (1)
+    1       1     flags: bit 0 = tangan terdeteksi, bit 1 = inference_skipped, bit 2 = stale
+    2       2     letter (UTF-8, di-pad NUL; "-" jika tidak ada tangan)
+    4       4     confidence (float32)
+    8       16    box terbaik x, y, w, h (float32, ter-normalisasi; 0 jika tidak ada)
+    24      24    keypoints (x, y) x 3 (float32; 0 jika tidak ada)
+
+Batch biner: header ``>HH`` (jumlah item, jumlah sukses), lalu per item ``>HB``
+(index, status 0 = ok / 1 = error) diikuti satu record (nol untuk item error).
+Pesan error hanya tersedia di JSON/msgpack.
+"""
+
+import struct
+from typing import Optional
+
+try:
+    import msgpack  # type: ignore[import]
+except ImportError:  # pragma: no cover - dependency opsional
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+BINARY = "application/vnd.sibi.detect"
+
+# Alias media type -> media type kanonik (juga nilai ?format= untuk WebSocket)
+MEDIA_TYPES = {
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    BINARY: BINARY,
+    "json": JSON,
+    "msgpack": MSGPACK,
+    "binary": BINARY,
+}
+
+RECORD_VERSION = 1
+RECORD = struct.Struct(">BB2sf4f6f")
+BATCH_HEADER = struct.Struct(">HH")
+BATCH_ITEM = struct.Struct(">HB")
+FLAG_DETECTED = 1
+FLAG_SKIPPED = 2
+FLAG_STALE = 4
+EMPTY_RECORD = bytes(RECORD.size)
+
+
+def available() -> tuple:
+    """Media types this process can encode."""
+    return (JSON, MSGPACK, BINARY) if msgpack is not None else (JSON, BINARY)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Best supported media type for an ``Accept`` header (JSON if nothing else matches)."""
+    if not accept:
+        return JSON
+    supported = available()
+    best, best_q = JSON, 0.0
+    for item in accept.split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = MEDIA_TYPES.get(media_type.lower())
+        # q sama: yang lebih dulu di header menang
+        if media_type in supported and q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def parse_format(value: Optional[str]) -> str:
+    """Media type for a ``?format=`` value (JSON when unknown or unavailable)."""
+    media_type = MEDIA_TYPES.get((value or "json").lower(), JSON)
+    return media_type if media_type in available() else JSON
+
+
+def compact(response) -> dict:
+    """``DetectResponse`` with keypoints/boxes as plain number lists (msgpack payload)."""
+    payload = {
+        "letter": response.letter,
+        "confidence": response.confidence,
+        "keypoints": [[k.x, k.y] for k in response.keypoints],
+        "bones": [list(bone) for bone in response.bones],
+        "boxes": [[b.x, b.y, b.w, b.h] for b in response.boxes],
+    }
+    if response.inference_skipped:
+        payload["inference_skipped"] = True
+    if response.stale:
+        payload["stale"] = True
+    return payload
+
+
+def pack_record(response) -> bytes:
+    """Fixed-layout binary record of one ``DetectResponse`` (best box only)."""
+    box = response.boxes[0] if response.boxes else None
+    flags = (FLAG_DETECTED if box is not None else 0) | (FLAG_SKIPPED if response.inference_skipped else 0)
+    flags |= FLAG_STALE if response.stale else 0
+    keypoints = [0.0] * 6
+    for i, k in enumerate(response.keypoints[:3]):
+        keypoints[2 * i], keypoints[2 * i + 1] = k.x, k.y
+    return RECORD.pack(
+        RECORD_VERSION, flags, response.letter.encode()[:2], response.confidence,
+        *((box.x, box.y, box.w, box.h) if box is not None else (0.0, 0.0, 0.0, 0.0)), *keypoints,
+    )
+
+
+def unpack_record(buf: bytes, offset: int = 0) -> dict:
+    """Decode one binary record (for clients, tests and the benchmark)."""
+    version, flags, letter, confidence, *values = RECORD.unpack_from(buf, offset)
+    return {
+        "letter": letter.rstrip(b"\0").decode(),
+        "confidence": confidence,
+        "box": values[:4] if flags & FLAG_DETECTED else None,
+        "keypoints": [values[4 + 2 * i: 6 + 2 * i] for i in range(3)] if flags & FLAG_DETECTED else [],
+        "inference_skipped": bool(flags & FLAG_SKIPPED),
+        "stale": bool(flags & FLAG_STALE),
+    }
+
+
+def encode(response, media_type: str) -> bytes:
+    """Encode one ``DetectResponse``."""
+    if media_type == BINARY:
+        return pack_record(response)
+    if media_type == MSGPACK:
+        return msgpack.packb(compact(response))
+    return response.model_dump_json().encode()
+
+
+def encode_batch(batch, media_type: str) -> bytes:
+    """Encode a ``DetectBatchResponse``."""
+    if media_type == BINARY:
+        parts = [BATCH_HEADER.pack(len(batch.results), batch.succeeded)]
+        for item in batch.results:
+            parts.append(BATCH_ITEM.pack(item.index, 0 if item.result is not None else 1))
+            parts.append(pack_record(item.result) if item.result is not None else EMPTY_RECORD)
+        return b"".join(parts)
+    if media_type == MSGPACK:
+        return msgpack.packb({
+            "results": [
+                {"index": item.index, "result": compact(item.result)} if item.result is not None
+                else {"index": item.index, "error": item.error}
+                for item in batch.results
+            ],
+            "succeeded": batch.succeeded,
+            "failed": batch.failed,
+        })
+    return batch.model_dump_json().encode()
@@ -0,0 +1,194 @@
+"""
+Traced Inference Engine
+=======================
+Jalur inference ramping tanpa predictor ultralytics (``SIBI_BACKEND=engine``):
+    - Network ``best.pt`` di-fuse lalu di-trace dengan ``torch.jit.trace`` +
+      ``torch.jit.freeze`` (atau ``torch.compile`` jika ``SIBI_ENGINE_COMPILE=1``).
+      Trace perlu per shape karena anchor head YOLO dihitung dari shape input dan ikut
+      "terpanggang" di graph. Agar jumlah graph tetap kecil, batch di-pad ke bucket
+      tetap (``batch_sizes``: 1, 2, 4, ... sampai ``SIBI_BATCH_MAX_SIZE``) dan output
+      slot padding dibuang; batch lebih besar dari bucket terbesar dipecah. Warm-up
+      (``startup.warm_up``) men-trace semua bucket untuk setiap imgsz sebelum ``/ready``.
+    - Tensor input dialokasikan sekali per (bucket, imgsz) dalam layout channels-last
+      dan diisi ulang setiap panggilan (tidak ada alokasi per frame).
+    - Letterbox ke kanvas persegi ``imgsz`` (pad 114), NMS class-aware untuk seluruh
+      batch dalam satu panggilan ``torchvision.ops.batched_nms``.
+    - Hasil berupa ``Detections`` (array NumPy box/conf/cls), bukan objek ``Results``.
+
+``Detections`` dan ``as_detections()`` ada di ``postprocess``, dipakai semua backend.
+
+Konfigurasi (env):
+    SIBI_ENGINE_COMPILE  - 1 untuk ``torch.compile`` alih-alih trace per shape (default: 0)
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np  # type: ignore[import]
+
+from batching import DEFAULT_MAX_BATCH_SIZE
+from postprocess import Detections
+
+ENGINE_COMPILE = os.environ.get("SIBI_ENGINE_COMPILE", "0") == "1"
+
+# Default predictor ultralytics
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+MAX_DET = 300
+PAD_VALUE = 114
+
+
+def batch_buckets(max_batch: int) -> Tuple[int, ...]:
+    """Padded batch sizes: powers of two below ``max_batch``, plus ``max_batch`` itself."""
+    max_batch = max(1, int(max_batch))
+    buckets = []
+    size = 1
+    while size < max_batch:
+        buckets.append(size)
+        size *= 2
+    return tuple(buckets) + (max_batch,)
+
+
+class TracedEngine:
+    """Traced YOLO network with preallocated channels-last inputs and vectorized pre/post-processing.
+
+    Dipanggil seperti ``YOLO`` (``engine(images, imgsz=..., verbose=False)``) dan punya
+    ``names`` serta ``overrides``, sehingga bisa menggantikan model di server. Satu
+    instance per worker inference (buffer input tidak dibagi antar thread).
+    """
+
+    def __init__(self, weights, compile: bool = ENGINE_COMPILE, max_batch: int = DEFAULT_MAX_BATCH_SIZE):
+        import torch  # type: ignore[import]
+        from ultralytics import YOLO  # type: ignore[import]
+
+        yolo = YOLO(str(weights))
+        self.path = str(weights)
+        self.names = dict(yolo.names)
+        self.overrides = {"imgsz": yolo.overrides.get("imgsz", 640)}
+        imgsz = self.overrides["imgsz"]
+        self.overrides["imgsz"] = max(imgsz) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+
+        net = yolo.model.fuse(verbose=False).eval().float()
+        for param in net.parameters():
+            param.requires_grad_(False)
+        # Seperti exporter ultralytics: head hanya mengembalikan tensor prediksi
+        head = net.model[-1]
+        head.export, head.format = True, "torchscript"
+        self.net = net.to(memory_format=torch.channels_last)
+        self.stride = int(max(net.stride)) if hasattr(net, "stride") else 32
+
+        # Batch yang mungkin dikirim micro-batcher, dibulatkan ke atas ke salah satu bucket
+        self.batch_sizes = batch_buckets(max_batch)
+
+        self._torch = torch
+        self._compiled = torch.compile(self.net) if compile else None
+        self._traced: Dict[Tuple[int, int], object] = {}
+        self._inputs: Dict[Tuple[int, int], Tuple[np.ndarray, object]] = {}
+
+    def _bucket(self, batch: int) -> int:
+        """Smallest padded batch size that holds ``batch`` frames."""
+        return next(size for size in self.batch_sizes if size >= batch)
+
+    def _buffers(self, batch: int, imgsz: int):
+        """Preallocated (uint8 NHWC canvas, float32 channels-last tensor) for a padded batch."""
+        key = (batch, imgsz)
+        if key not in self._inputs:
+            torch = self._torch
+            canvas = np.empty((batch, imgsz, imgsz, 3), dtype=np.uint8)
+            tensor = torch.empty((batch, 3, imgsz, imgsz), dtype=torch.float32).to(
+                memory_format=torch.channels_last
+            )
+            self._inputs[key] = (canvas, tensor)
+        return self._inputs[key]
+
+    def _module(self, batch: int, imgsz: int, example):
+        """Traced (and frozen) network for one padded input shape, built on first use (warm-up)."""
+        if self._compiled is not None:
+            return self._compiled
+        key = (batch, imgsz)
+        if key not in self._traced:
+            torch = self._torch
+            with torch.no_grad():
+                traced = torch.jit.trace(self.net, example, strict=False, check_trace=False)
+                self._traced[key] = torch.jit.freeze(traced.eval())
+        return self._traced[key]
+
+    def preprocess(self, images: List[np.ndarray], imgsz: int):
+        """Letterbox BGR frames into the preallocated input of their bucket; returns (tensor, gains, pads).
+
+        Slot padding di akhir batch berisi kanvas kosong (nilai pad).
+        """
+        canvas, tensor = self._buffers(self._bucket(len(images)), imgsz)
+        canvas.fill(PAD_VALUE)
+        shapes = np.array([image.shape[:2] for image in images], dtype=np.float32)  # (n, 2) h, w
+        gains = np.min(imgsz / shapes, axis=1)
+        new_hw = np.round(shapes * gains[:, None]).astype(np.int64)
+        pads = (imgsz - new_hw[:, ::-1]) // 2  # (n, 2) pad_x, pad_y
+
+        for i, image in enumerate(images):
+            (new_h, new_w), (left, top) = new_hw[i], pads[i]
+            if (new_h, new_w) != image.shape[:2]:
+                image = cv2.resize(image, (int(new_w), int(new_h)), interpolation=cv2.INTER_LINEAR)
+            # BGR -> RGB langsung saat menyalin ke kanvas
+            canvas[i, top:top + new_h, left:left + new_w] = image[..., ::-1]
+
+        # NHWC uint8 -> NCHW channels-last float: permute hanya mengubah stride, copy_ tanpa transpose
+        torch = self._torch
+        tensor.copy_(torch.from_numpy(canvas).permute(0, 3, 1, 2)).mul_(1 / 255.0)
+        return tensor, gains, pads.astype(np.float32)
+
+    def postprocess(self, pred, shapes, gains: np.ndarray, pads: np.ndarray, conf: float, iou: float):
+        """Confidence filter + class-aware NMS for the whole batch, mapped back to each frame."""
+        import torchvision  # type: ignore[import]
+
+        torch = self._torch
+        nc = len(self.names)
+        pred = pred.transpose(1, 2)  # (n, anchors, 4 + nc [+ extra])
+        scores, cls = pred[..., 4:4 + nc].max(dim=2)
+        batch_idx, anchor_idx = torch.nonzero(scores > conf, as_tuple=True)
+        scores, cls = scores[batch_idx, anchor_idx], cls[batch_idx, anchor_idx]
+        xywh = pred[batch_idx, anchor_idx, :4]
+        xyxy = torch.cat([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], dim=1)
+
+        # Satu NMS untuk semua frame: grup = (frame, kelas)
+        keep = torchvision.ops.batched_nms(xyxy, scores, batch_idx * nc + cls, iou)
+        batch_idx = batch_idx[keep].numpy()
+        xyxy, scores, cls = xyxy[keep].numpy(), scores[keep].numpy(), cls[keep].numpy()
+
+        # Balik letterbox (vectorized per deteksi)
+        xyxy = (xyxy - np.tile(pads[batch_idx], 2)) / gains[batch_idx, None]
+
+        detections = []
+        for i, (h, w) in enumerate(shapes):
+            mask = batch_idx == i
+            boxes = xyxy[mask][:MAX_DET]
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+            detections.append(Detections(
+                boxes.astype(np.float32), scores[mask][:MAX_DET], cls[mask][:MAX_DET].astype(np.int64), (h, w)
+            ))
+        return detections
+
+    def __call__(self, source, imgsz: Optional[int] = None, conf: float = CONF_THRESHOLD,
+                 iou: float = IOU_THRESHOLD, verbose: bool = False) -> List[Detections]:
+        images = source if isinstance(source, list) else [source]
+        imgsz = int(imgsz or self.overrides["imgsz"])
+        largest = self.batch_sizes[-1]
+        if len(images) > largest:
+            # Mis. /detect/batch dengan lebih banyak frame dari bucket terbesar
+            return [
+                detection
+                for start in range(0, len(images), largest)
+                for detection in self(images[start:start + largest], imgsz=imgsz, conf=conf, iou=iou)
+            ]
+        torch = self._torch
+        # no_grad (bukan inference_mode): torch.jit.trace tidak bisa merekam inference tensors
+        with torch.no_grad():
+            tensor, gains, pads = self.preprocess(images, imgsz)
+            module = self._module(tensor.shape[0], imgsz, tensor)
+            pred = module(tensor)
+            pred = pred[0] if isinstance(pred, (list, tuple)) else pred
+            # Buang output slot padding
+            pred = pred[:len(images)]
+            return self.postprocess(pred, [image.shape[:2] for image in images], gains, pads, conf, iou)
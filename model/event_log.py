@@ -0,0 +1,247 @@
+"""
+Event Log
+=========
+Log event terstruktur (JSON lines) untuk hot path server, pengganti ``print`` per frame:
+    - Caller hanya memasukkan ``LogRecord`` ke antrean (``QueueHandler``, ``put_nowait``);
+      format JSON dan write dilakukan thread writer. Jika antrean penuh, event dibuang
+      dan dihitung, caller tidak pernah menunggu.
+    - Writer menulis per batch (``SIBI_LOG_BATCH`` baris atau setiap ``SIBI_LOG_FLUSH_S``),
+      jadi tidak ada syscall per frame. Event level error di-flush langsung.
+    - Sampling per event (``SIBI_LOG_SAMPLE``): event di luar sampel tidak membuat
+      ``LogRecord`` sama sekali. Baris yang di-sample membawa field ``sample``.
+    - Error dibatasi per nama event: maksimum ``SIBI_LOG_ERROR_BURST`` per
+      ``SIBI_LOG_ERROR_INTERVAL_S``; sisanya hanya dihitung dan dilaporkan sebagai
+      ``suppressed`` di baris error berikutnya.
+
+Contoh baris::
+
+    {"ts":1718000000.123,"level":"info","source":"detect","event":"detected","letter":"A","confidence":0.93}
+
+Konfigurasi (env):
+    SIBI_LOG_LEVEL             - level minimum: debug, info, warning, error (default: info)
+    SIBI_LOG_SAMPLE            - rate sampling per event, mis. "detected=0.05,stale=0.1" (default: semua 1)
+    SIBI_LOG_FILE              - file tujuan (append); kosong = stdout (default: kosong)
+    SIBI_LOG_FLUSH_S           - interval flush writer dalam detik (default: 1.0)
+    SIBI_LOG_BATCH             - baris maksimum per write (default: 256)
+    SIBI_LOG_QUEUE             - kapasitas antrean event (default: 10000)
+    SIBI_LOG_ERROR_BURST       - error maksimum per event per interval (default: 5)
+    SIBI_LOG_ERROR_INTERVAL_S  - interval rate limit error dalam detik (default: 10)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+LOG_LEVEL = os.environ.get("SIBI_LOG_LEVEL", "info").upper()
+LOG_SAMPLE = os.environ.get("SIBI_LOG_SAMPLE", "")
+LOG_FILE = os.environ.get("SIBI_LOG_FILE", "")
+FLUSH_S = float(os.environ.get("SIBI_LOG_FLUSH_S", 1.0))
+BATCH_LINES = int(os.environ.get("SIBI_LOG_BATCH", 256))
+QUEUE_SIZE = int(os.environ.get("SIBI_LOG_QUEUE", 10000))
+ERROR_BURST = int(os.environ.get("SIBI_LOG_ERROR_BURST", 5))
+ERROR_INTERVAL_S = float(os.environ.get("SIBI_LOG_ERROR_INTERVAL_S", 10))
+
+_STOP = object()
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse ``"detected=0.05,stale=0.1"`` into ``{event: rate}`` (rates clipped to 0-1)."""
+    rates: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        rates[name.strip()] = min(1.0, max(0.0, float(value)))
+    return rates
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Non-blocking enqueue that drops (and counts) records when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Format JSON dilakukan di thread writer, bukan di caller
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EventLog:
+    """Sampled, rate-limited JSON-lines event log written by a background thread."""
+
+    def __init__(
+        self,
+        source: str,
+        level: str = LOG_LEVEL,
+        sample: Optional[Dict[str, float]] = None,
+        error_burst: int = ERROR_BURST,
+        error_interval_s: float = ERROR_INTERVAL_S,
+        flush_s: float = FLUSH_S,
+        batch_lines: int = BATCH_LINES,
+        queue_size: int = QUEUE_SIZE,
+        path: str = LOG_FILE,
+    ):
+        """
+        Args:
+            source: Nama komponen, ditulis sebagai field ``source`` (mis. "detect", "stream")
+            level: Level minimum
+            sample: Rate sampling per event (default: ``SIBI_LOG_SAMPLE``)
+            error_burst: Error maksimum per event per ``error_interval_s``
+            error_interval_s: Window rate limit error (detik)
+            flush_s: Interval flush writer (detik)
+            batch_lines: Baris maksimum per write
+            queue_size: Kapasitas antrean event
+            path: File tujuan (append), kosong = stdout
+        """
+        self.source = source
+        self.sample = parse_sample_rates(LOG_SAMPLE) if sample is None else dict(sample)
+        self.error_burst = max(1, int(error_burst))
+        self.error_interval_s = float(error_interval_s)
+        self.flush_s = max(0.01, float(flush_s))
+        self.batch_lines = max(1, int(batch_lines))
+        self.queue_size = max(1, int(queue_size))
+        self.path = path
+
+        self._logger = logging.getLogger(f"sibi.{source}")
+        self._logger.setLevel(getattr(logging, level, logging.INFO))
+        self._logger.propagate = False
+        self._handler = _QueueHandler(queue.Queue(maxsize=self.queue_size))
+        self._logger.handlers = [self._handler]
+
+        # nama event -> [awal window, jumlah error di window, jumlah yang ditahan]
+        self._error_windows: Dict[str, list] = {}
+        self._error_lock = threading.Lock()
+
+        # Statistics
+        self.sampled_out = 0
+        self.suppressed = 0
+        self.lines = 0
+        self.writes = 0
+
+        self._stream = None
+        self._thread: Optional[threading.Thread] = None
+        self._start()
+        # Thread writer tidak ikut ter-fork (mode pre-fork): mulai ulang di proses anak
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.close)
+
+    def _start(self):
+        self._stream = open(self.path, "a", buffering=1 << 16) if self.path else sys.stdout
+        self._thread = threading.Thread(target=self._run, name=f"event-log-{self.source}", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        self._handler.queue = queue.Queue(maxsize=self.queue_size)
+        self._error_lock = threading.Lock()
+        self._start()
+
+    def event(self, name: str, level: int = logging.INFO, **fields):
+        """Log event ``name`` with ``fields`` (subject to its sampling rate)."""
+        if not self._logger.isEnabledFor(level):
+            return
+        rate = self.sample.get(name, 1.0)
+        if rate < 1.0:
+            if random.random() >= rate:
+                self.sampled_out += 1
+                return
+            fields["sample"] = rate
+        self._logger.log(level, name, extra={"fields": fields})
+
+    def error(self, name: str, exc: Optional[BaseException] = None, **fields):
+        """Log an error event, at most ``error_burst`` per ``error_interval_s`` for each ``name``."""
+        now = time.monotonic()
+        with self._error_lock:
+            window = self._error_windows.get(name)
+            if window is None or now - window[0] >= self.error_interval_s:
+                suppressed = window[2] if window is not None else 0
+                window = self._error_windows[name] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.error_burst:
+                window[2] += 1
+                self.suppressed += 1
+                return
+            window[1] += 1
+        if suppressed:
+            fields["suppressed"] = suppressed
+        if exc is not None:
+            fields["error"] = f"{type(exc).__name__}: {exc}"
+        self._logger.log(logging.ERROR, name, extra={"fields": fields},
+                         exc_info=(type(exc), exc, exc.__traceback__) if exc is not None else None)
+
+    def _format(self, record: logging.LogRecord) -> str:
+        line = {"ts": round(record.created, 3), "level": record.levelname.lower(), "source": self.source,
+                "event": record.msg, "pid": record.process}
+        line.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            line["traceback"] = "".join(traceback.format_exception(*record.exc_info))
+        return json.dumps(line, separators=(",", ":"), default=str) + "\n"
+
+    def _write(self, lines: list):
+        try:
+            self._stream.write("".join(lines))
+            self._stream.flush()
+        except (OSError, ValueError):
+            return
+        self.lines += len(lines)
+        self.writes += 1
+
+    def _run(self):
+        log_queue = self._handler.queue
+        lines: list = []
+        flush_at = time.monotonic() + self.flush_s
+        while True:
+            try:
+                record = log_queue.get(timeout=max(0.0, flush_at - time.monotonic()))
+            except queue.Empty:
+                record = None
+            if record is _STOP:
+                if lines:
+                    self._write(lines)
+                return
+            urgent = False
+            if record is not None:
+                lines.append(self._format(record))
+                urgent = record.levelno >= logging.ERROR
+            if lines and (urgent or len(lines) >= self.batch_lines or time.monotonic() >= flush_at):
+                self._write(lines)
+                lines = []
+            if time.monotonic() >= flush_at:
+                flush_at = time.monotonic() + self.flush_s
+
+    def close(self, timeout: float = 2.0):
+        """Flush pending events and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._handler.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """Queue depth, sampling and drop counters."""
+        return {
+            "queued": self._handler.queue.qsize(),
+            "lines": self.lines,
+            "writes": self.writes,
+            "sampled_out": self.sampled_out,
+            "suppressed_errors": self.suppressed,
+            "dropped": self._handler.dropped,
+            "sample": dict(self.sample),
+        }
@@ -0,0 +1,80 @@
+"""
+Image Decoding
+==============
+Decode frame yang dikirim client ke numpy array untuk YOLO.
+
+Dua jalur input:
+    - data URL base64 (``DetectRequest.image``) - jalur JSON lama
+    - bytes mentah (body ``image/jpeg`` / upload multipart) - tanpa overhead
+      base64 dan string JSON, langsung di-decode dari buffer request
+
+Jika ``max_size`` diberikan (biasanya ``imgsz`` model), JPEG di-decode
+langsung di resolusi yang lebih kecil lewat DCT-domain downscaling
+(``Image.draft``), karena YOLO toh akan me-letterbox frame ke ``imgsz``.
+Skala yang dipakai seragam di kedua sumbu, jadi koordinat ter-normalisasi
+(``xywhn``) tetap relatif terhadap frame asli.
+
+Output selalu array BGR contiguous, urutan channel yang diharapkan
+ultralytics untuk input numpy (sama seperti frame ``cv2``).
+"""
+
+import base64
+import binascii
+import io
+from typing import Optional
+
+import numpy as np  # type: ignore[import]
+from PIL import Image
+
+
+class ImageDecodeError(ValueError):
+    """Raised when a frame cannot be decoded; ``str(exc)`` is client-safe."""
+
+
+def draft_size(size, max_size: int):
+    """Smallest size with the original aspect ratio whose long side still covers ``max_size``."""
+    w, h = size
+    scale = max_size / max(w, h)
+    if scale >= 1.0:
+        return None
+    return (max(1, int(w * scale + 0.5)), max(1, int(h * scale + 0.5)))
+
+
+def decode_image_bytes(buf: bytes, max_size: Optional[int] = None) -> np.ndarray:
+    """Decode encoded image bytes (JPEG/PNG) to a contiguous BGR numpy array.
+
+    Args:
+        buf: Bytes gambar ter-encode
+        max_size: Jika diisi, JPEG di-decode dengan reduksi DCT (1/2, 1/4, 1/8)
+            sekecil mungkin selama sisi terpanjang masih >= ``max_size``
+    """
+    try:
+        # BytesIO atas objek bytes tidak menyalin buffer selama tidak ditulis
+        with Image.open(io.BytesIO(buf)) as img:
+            if max_size:
+                target = draft_size(img.size, max_size)
+                if target is not None:
+                    # No-op untuk format selain JPEG
+                    img.draft("RGB", target)
+            rgb = img if img.mode == "RGB" else img.convert("RGB")
+            return np.ascontiguousarray(np.asarray(rgb)[..., ::-1])
+    except Exception as exc:
+        raise ImageDecodeError("Invalid image data") from exc
+
+
+def decode_base64(data_url: str) -> bytes:
+    """Strip the data URL prefix (e.g. 'data:image/jpeg;base64,') and decode."""
+    if "," in data_url:
+        _, b64 = data_url.split(",", 1)
+    else:
+        b64 = data_url
+
+    try:
+        return base64.b64decode(b64)
+    except (ValueError, TypeError, binascii.Error) as exc:
+        raise ImageDecodeError("Invalid base64 image") from exc
+
+
+def decode_data_url(data_url: str, max_size: Optional[int] = None) -> np.ndarray:
+    """Decode data URL (e.g. 'data:image/jpeg;base64,...') to a contiguous BGR numpy array."""
+    return decode_image_bytes(decode_base64(data_url), max_size)
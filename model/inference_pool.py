@@ -0,0 +1,177 @@
+"""
+Inference Worker Pool
+=====================
+Pool thread inference khusus agar decode + YOLO forward pass tidak berjalan
+di event loop uvicorn. Setiap worker memegang replika modelnya sendiri
+(predictor ultralytics tidak thread-safe) dan jumlah thread torch per worker
+diatur supaya total thread tidak melebihi jumlah core.
+
+Konfigurasi (env):
+    SIBI_WORKERS             - jumlah worker inference (default: cores // 2, max 4)
+    SIBI_THREADS_PER_WORKER  - torch intra-op threads per worker (default: cores // workers)
+    SIBI_POOL_QUEUE_SIZE     - job maksimum yang boleh antre di pool (default: workers * 2)
+"""
+
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+CPU_COUNT = os.cpu_count() or 1
+DEFAULT_WORKERS = int(os.environ.get("SIBI_WORKERS", max(1, min(4, CPU_COUNT // 2))))
+
+
+class InferencePool:
+    """Fixed set of worker threads, each owning one model replica."""
+
+    def __init__(
+        self,
+        model_factory: Callable[[int], Any],
+        workers: int = DEFAULT_WORKERS,
+        threads_per_worker: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            model_factory: Fungsi ``factory(worker_index) -> model`` yang dipanggil
+                sekali di dalam thread worker
+            workers: Jumlah worker (replika model)
+            threads_per_worker: torch intra-op threads per worker
+            queue_size: Kapasitas antrean job sebelum ``submit`` menolak
+        """
+        self.model_factory = model_factory
+        self.workers = max(1, int(workers))
+        self.threads_per_worker = int(
+            threads_per_worker
+            or os.environ.get("SIBI_THREADS_PER_WORKER", 0)
+            or max(1, CPU_COUNT // self.workers)
+        )
+        self.queue_size = int(
+            queue_size or os.environ.get("SIBI_POOL_QUEUE_SIZE", 0) or self.workers * 2
+        )
+
+        self._jobs: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self._threads: List[threading.Thread] = []
+        self._ready = threading.Barrier(self.workers + 1)
+        self._load_errors: List[Exception] = []
+        self._stats_lock = threading.Lock()
+        self._busy = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._total_job_ms = 0.0
+
+    def start(self):
+        """Spawn workers and block until every replica is loaded."""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(
+                target=self._worker, args=(i,), name=f"inference-{i}", daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+        self._ready.wait()
+        if self._load_errors:
+            raise RuntimeError(f"Failed to load model replica: {self._load_errors[0]!s}")
+        print(f"✅ Inference pool ready: {self.workers} workers x {self.threads_per_worker} threads")
+
+    def shutdown(self):
+        """Stop all workers after the jobs already queued."""
+        for _ in self._threads:
+            self._jobs.put((None, None))
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def _worker(self, index: int):
+        # Hanya jika backend memakai torch (sudah diimport saat load model):
+        # backend onnx tidak perlu membayar import torch di setiap worker
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            # torch.set_num_threads berlaku per thread OpenMP pemanggil
+            torch.set_num_threads(self.threads_per_worker)
+
+        try:
+            model = self.model_factory(index)
+        except Exception as exc:
+            self._load_errors.append(exc)
+            self._ready.wait()
+            return
+        self._ready.wait()
+
+        while True:
+            fn, fut = self._jobs.get()
+            if fn is None:
+                break
+            if not fut.set_running_or_notify_cancel():
+                # Caller sudah pergi sebelum job dimulai
+                with self._stats_lock:
+                    self._cancelled += 1
+                continue
+
+            with self._stats_lock:
+                self._busy += 1
+            start = time.perf_counter()
+            try:
+                result = fn(model)
+            except Exception as exc:
+                fut.set_exception(exc)
+                with self._stats_lock:
+                    self._failed += 1
+            else:
+                fut.set_result(result)
+                with self._stats_lock:
+                    self._completed += 1
+            finally:
+                with self._stats_lock:
+                    self._busy -= 1
+                    self._total_job_ms += (time.perf_counter() - start) * 1000.0
+
+    def submit(self, fn: Callable[[Any], Any]) -> Future:
+        """Queue ``fn(model)`` on a worker; raises ``queue.Full`` when saturated."""
+        fut: Future = Future()
+        try:
+            self._jobs.put_nowait((fn, fut))
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise
+        return fut
+
+    async def run(self, fn: Callable[[Any], Any]) -> Any:
+        """Async wrapper around :meth:`submit`.
+
+        Jika caller dibatalkan, job yang masih antre dibuang dari pool. Job yang
+        sudah berjalan tidak bisa dihentikan: pembatalan ditunda sampai job selesai
+        (hasilnya dibuang), supaya caller tidak menganggap worker sudah kosong.
+        """
+        fut = self.submit(fn)
+        try:
+            return await asyncio.wrap_future(fut)
+        except asyncio.CancelledError:
+            if not fut.cancel():
+                await asyncio.wait({asyncio.wrap_future(fut)})
+            raise
+
+    def stats(self) -> dict:
+        """Worker utilisation and queue statistics."""
+        with self._stats_lock:
+            done = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "threads_per_worker": self.threads_per_worker,
+                "queue_size": self.queue_size,
+                "queued": self._jobs.qsize(),
+                "busy": self._busy,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "avg_job_ms": round(self._total_job_ms / done, 2) if done else 0.0,
+            }
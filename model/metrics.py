@@ -0,0 +1,205 @@
+"""
+Metrics
+=======
+Metrik format teks Prometheus untuk ``GET /metrics`` tanpa dependency tambahan.
+
+Biaya di hot path dibuat seminimal mungkin: setiap thread (event loop, thread
+decode, worker inference) menulis ke shard miliknya sendiri, jadi ``observe`` /
+``inc`` tidak pernah mengambil lock. Shard baru digabung saat ``/metrics``
+di-scrape. Shard milik thread yang sudah selesai (mis. thread pendek dari
+executor) dilebur ke satu total "retired" saat thread berakhir, jadi jumlah
+shard mengikuti jumlah thread yang hidup, bukan semua thread yang pernah
+menulis. Gauge dihitung lewat callback saat scrape juga.
+
+Jenis metrik:
+    - ``Histogram``  - bucket kumulatif + ``_sum`` + ``_count`` per kombinasi label
+    - ``Counter``    - ``_total`` per kombinasi label
+    - ``Gauge``      - nilai dari callback
+    - ``CounterFunc`` - counter ``_total`` yang nilainya dibaca dari callback (statistik
+      monoton yang sudah dihitung komponen lain, mis. frame yang dibatalkan)
+"""
+
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Bucket latency (detik), cocok untuk stage 0.1 ms .. 2.5 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Prometheus label set, e.g. ``{stage="decode",le="0.1"}``."""
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _ThreadToken:
+    """Lives in a thread's ``threading.local``; collected when the thread ends."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Sharded:
+    """Per-thread storage: each thread only writes its own dict, scrape merges all of them."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._retired: dict = {}
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            token = self._local.token = _ThreadToken()
+            # Lock hanya sekali per thread
+            with self._register_lock:
+                self._shards.append(shard)
+            # threading.local dibersihkan saat thread berakhir -> shard dilebur ke _retired
+            weakref.finalize(token, self._retire, shard)
+        return shard
+
+    def _retire(self, shard: dict):
+        with self._register_lock:
+            # Cari berdasarkan identitas: shard lain bisa saja berisi nilai yang sama
+            for i, live in enumerate(self._shards):
+                if live is shard:
+                    del self._shards[i]
+                    break
+            self._merge(self._retired, shard)
+
+    def _merge(self, total: dict, shard: dict) -> dict:
+        raise NotImplementedError
+
+    def _merged(self) -> dict:
+        with self._register_lock:
+            shards = list(self._shards)
+            total = self._merge({}, self._retired)
+        for shard in shards:
+            # dict(...) menyalin shard yang mungkin sedang ditulis thread lain
+            self._merge(total, dict(shard))
+        return total
+
+
+class Histogram(_Sharded):
+    """Latency histogram with fixed buckets (seconds)."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__()
+        self.name, self.help = name, help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labelvalues: str):
+        shard = self._shard()
+        row = shard.get(labelvalues)
+        if row is None:
+            # [count per bucket..., +Inf, sum]
+            row = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def _merge(self, total: Dict[Tuple[str, ...], List[float]], shard: dict) -> dict:
+        for labels, row in shard.items():
+            merged = total.setdefault(labels, [0] * len(row))
+            for i, v in enumerate(list(row)):
+                merged[i] += v
+        return total
+
+    def render(self) -> List[str]:
+        merged = self._merged()
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, row in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += row[len(self.buckets)]
+            le = format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {row[-1]:.6f}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Counter(_Sharded):
+    """Monotonic counter, rendered with a ``_total`` suffix."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__()
+        self.name, self.help = name, help
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def _merge(self, total: Dict[Tuple[str, ...], float], shard: dict) -> dict:
+        for labels, value in shard.items():
+            total[labels] = total.get(labels, 0) + value
+        return total
+
+    def render(self) -> List[str]:
+        merged = self._merged()
+        lines = [f"# HELP {self.name}_total {self.help}", f"# TYPE {self.name}_total counter"]
+        lines += [f"{self.name}_total{format_labels(self.labelnames, labels)} {value:.15g}" for labels, value in sorted(merged.items())]
+        return lines
+
+
+class Gauge:
+    """Value read from ``fn()`` at scrape time."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float]):
+        self.name, self.help, self.fn = name, help, fn
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {float(self.fn()):.15g}"]
+
+
+class CounterFunc:
+    """Monotonic value read from ``fn()`` at scrape time, rendered as a ``_total`` counter."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float]):
+        self.name, self.help, self.fn = name, help, fn
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name}_total {self.help}",
+            f"# TYPE {self.name}_total counter",
+            f"{self.name}_total {float(self.fn()):.15g}",
+        ]
+
+
+class Registry:
+    """Ordered collection of metrics rendered together for ``/metrics``."""
+
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,123 @@
+"""
+Motion-Gated Inference
+======================
+Mode sesi (opt-in) untuk stream frame dari satu client. Untuk tiap sesi
+disimpan thumbnail grayscale kecil dari frame terakhir yang di-inference
+beserta ``DetectResponse``-nya. Jika frame baru hampir identik (skor beda
+di bawah threshold), hasil sebelumnya dipakai lagi tanpa menjalankan YOLO.
+Sesekali inference tetap dipaksa (refresh interval) agar hasil tidak basi.
+
+Konfigurasi (env):
+    SIBI_MOTION_THRESHOLD     - skor beda rata-rata (0-1) di bawah ini = skip (default: 0.02)
+    SIBI_MOTION_REFRESH_S     - paksa inference minimal tiap N detik (default: 1.0)
+    SIBI_MOTION_MAX_SESSIONS  - jumlah sesi maksimum yang diingat (default: 1024)
+    SIBI_MOTION_SESSION_TTL_S - sesi dilupakan setelah idle N detik (default: 60)
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import cv2
+import numpy as np  # type: ignore[import]
+
+DEFAULT_THRESHOLD = float(os.environ.get("SIBI_MOTION_THRESHOLD", 0.02))
+DEFAULT_REFRESH_S = float(os.environ.get("SIBI_MOTION_REFRESH_S", 1.0))
+DEFAULT_MAX_SESSIONS = int(os.environ.get("SIBI_MOTION_MAX_SESSIONS", 1024))
+DEFAULT_SESSION_TTL_S = float(os.environ.get("SIBI_MOTION_SESSION_TTL_S", 60))
+
+THUMBNAIL_SIZE = (32, 24)
+
+
+def motion_thumbnail(image: np.ndarray) -> np.ndarray:
+    """Tiny grayscale copy of a BGR frame used for frame differencing."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    return cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+def motion_score(previous: np.ndarray, current: np.ndarray) -> float:
+    """Mean absolute difference between two thumbnails, scaled to 0-1."""
+    return float(np.abs(current - previous).mean() / 255.0)
+
+
+class _Session:
+    __slots__ = ("thumbnail", "response", "inferred_at", "seen_at")
+
+    def __init__(self, thumbnail: np.ndarray, response: Any, now: float):
+        self.thumbnail = thumbnail
+        self.response = response
+        self.inferred_at = now
+        self.seen_at = now
+
+
+class MotionGate:
+    """Per-session frame differencing that decides when YOLO can be skipped.
+
+    Dipakai hanya dari event loop, jadi tidak butuh lock.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        refresh_s: float = DEFAULT_REFRESH_S,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        session_ttl_s: float = DEFAULT_SESSION_TTL_S,
+    ):
+        self.threshold = float(threshold)
+        self.refresh_s = float(refresh_s)
+        self.max_sessions = max(1, int(max_sessions))
+        self.session_ttl_s = float(session_ttl_s)
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+
+        # Statistics
+        self.frames = 0
+        self.skipped = 0
+        self.refreshes = 0
+
+    def lookup(self, session_id: str, thumbnail: np.ndarray) -> Optional[Any]:
+        """Return the session's previous response if this frame can skip inference."""
+        self.frames += 1
+        now = time.monotonic()
+        session = self._sessions.get(session_id)
+        if session is None or now - session.seen_at > self.session_ttl_s:
+            return None
+
+        session.seen_at = now
+        self._sessions.move_to_end(session_id)
+
+        if now - session.inferred_at >= self.refresh_s:
+            self.refreshes += 1
+            return None
+        if motion_score(session.thumbnail, thumbnail) >= self.threshold:
+            return None
+
+        self.skipped += 1
+        return session.response
+
+    def last_response(self, session_id: str) -> Optional[Any]:
+        """The session's most recent response (regardless of motion), or None."""
+        session = self._sessions.get(session_id)
+        if session is None or time.monotonic() - session.seen_at > self.session_ttl_s:
+            return None
+        return session.response
+
+    def update(self, session_id: str, thumbnail: np.ndarray, response: Any):
+        """Remember the frame that was just inferred as the session's reference."""
+        self._sessions[session_id] = _Session(thumbnail, response, time.monotonic())
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Skip counters, to measure how much inference the gate saves."""
+        return {
+            "threshold": self.threshold,
+            "refresh_s": self.refresh_s,
+            "sessions": len(self._sessions),
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "forced_refreshes": self.refreshes,
+            "skip_rate": round(self.skipped / self.frames, 4) if self.frames else 0.0,
+        }
@@ -0,0 +1,112 @@
+"""
+Detection Postprocessing
+========================
+Satu jalur untuk membaca hasil model, dipakai server dan script testing:
+    - ``as_detections()`` mengubah output model ke ``Detections`` sekali
+      (``Results`` ultralytics dibaca lewat ``boxes.data`` dalam satu transfer,
+      bukan indexing per box)
+    - ``select()`` menerapkan threshold (global atau per kelas) dan top-k
+      dengan operasi NumPy, tanpa loop Python per box
+    - ``best()`` mengembalikan deteksi terbaik sebagai tuple sederhana
+
+``Detections`` selalu terurut dari confidence tertinggi, jadi argmax = indeks 0
+dan top-k = k baris pertama yang lolos threshold.
+
+Konfigurasi (env, dibaca oleh server):
+    SIBI_CLASS_THRESHOLDS  - threshold per kelas, mis. "M=0.5,N=0.5,9=0.4"
+                             (huruf atau id kelas; kelas lain memakai threshold global)
+"""
+
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np  # type: ignore[import]
+
+
+class Detections(NamedTuple):
+    """Detections of one frame, sorted by confidence (highest first)."""
+
+    xyxy: np.ndarray  # (N, 4) float32, piksel frame asli
+    conf: np.ndarray  # (N,) float32
+    cls: np.ndarray  # (N,) int64
+    shape: Tuple[int, int]  # (h, w) frame asli
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def xywhn(self) -> np.ndarray:
+        """Boxes as (cx, cy, w, h) normalized to the frame size."""
+        h, w = self.shape
+        x1, y1, x2, y2 = self.xyxy.T
+        return np.stack([(x1 + x2) / 2 / w, (y1 + y2) / 2 / h, (x2 - x1) / w, (y2 - y1) / h], axis=1)
+
+    def take(self, idx: np.ndarray) -> "Detections":
+        """Subset of rows ``idx`` (order preserved)."""
+        return Detections(self.xyxy[idx], self.conf[idx], self.cls[idx], self.shape)
+
+
+def empty_detections(shape: Tuple[int, int]) -> Detections:
+    return Detections(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64), shape)
+
+
+def as_detections(result) -> Detections:
+    """``Detections`` from an engine/onnx result (unchanged) or an ultralytics ``Results``."""
+    if isinstance(result, Detections):
+        return result
+    boxes = result.boxes
+    shape = tuple(result.orig_shape[:2])
+    if boxes is None or len(boxes) == 0:
+        return empty_detections(shape)
+    # Satu transfer (N, 6) xyxy/conf/cls, bukan tensor kecil per box
+    data = boxes.data.cpu().numpy() if hasattr(boxes.data, "cpu") else np.asarray(boxes.data)
+    data = data[np.argsort(-data[:, 4], kind="stable")]
+    return Detections(data[:, :4].astype(np.float32), data[:, 4].astype(np.float32), data[:, 5].astype(np.int64), shape)
+
+
+def parse_class_thresholds(spec: str, names: Mapping[int, str]) -> Dict[int, float]:
+    """Parse ``"M=0.5,9=0.4"`` (letters or class ids) into ``{class_id: threshold}``."""
+    by_name = {name: idx for idx, name in names.items()}
+    thresholds: Dict[int, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key.isdigit():
+            thresholds[int(key)] = float(value)
+        elif key in by_name:
+            thresholds[by_name[key]] = float(value)
+        else:
+            raise ValueError(f"Unknown class '{key}' in class thresholds")
+    return thresholds
+
+
+def select(
+    detections: Detections,
+    conf: float = 0.0,
+    class_conf: Optional[Mapping[int, float]] = None,
+    k: Optional[int] = None,
+) -> Detections:
+    """Top-``k`` detections whose confidence passes ``conf`` (or the per-class threshold).
+
+    Args:
+        detections: Hasil ``as_detections``
+        conf: Threshold global
+        class_conf: Threshold per id kelas, menggantikan ``conf`` untuk kelas tersebut
+        k: Jumlah deteksi maksimum (None = semua)
+    """
+    thresholds = np.full(len(detections), conf, dtype=np.float32)
+    if class_conf:
+        for cls_idx, threshold in class_conf.items():
+            thresholds[detections.cls == cls_idx] = threshold
+    idx = np.flatnonzero(detections.conf >= thresholds)
+    if k is not None:
+        idx = idx[:k]
+    return detections.take(idx)
+
+
+def best(
+    detections: Detections, conf: float = 0.0, class_conf: Optional[Mapping[int, float]] = None
+) -> Optional[Tuple[int, float, np.ndarray]]:
+    """Best detection as ``(cls_idx, conf, xyxy)``, or None if nothing passes the threshold."""
+    top = select(detections, conf, class_conf, k=1)
+    if len(top) == 0:
+        return None
+    return int(top.cls[0]), float(top.conf[0]), top.xyxy[0]
@@ -0,0 +1,245 @@
+"""
+Pre-fork Multi-process Serving
+==============================
+Mode multi-proses untuk ``detect_server`` (Linux):
+    - Master memuat ``best.pt`` dan warm-up sekali, lalu fork N proses worker.
+      Halaman memori weights dibagi copy-on-write: selama tidak ditulis, semua
+      worker membaca halaman fisik yang sama (``gc.freeze()`` sebelum fork supaya
+      GC tidak menyentuh objek lama dan memicu copy).
+    - Setiap worker di-pin ke CPU set sendiri (disjoint, ``os.sched_setaffinity``)
+      dan memakai jumlah thread torch sebesar CPU set-nya.
+    - Semua worker menerima koneksi dari satu socket yang di-bind master.
+    - Worker yang mati di-fork ulang oleh master dengan CPU set yang sama.
+    - Saat master menerima SIGTERM/SIGINT, semua worker di-SIGTERM lalu ditunggu
+      (``waitpid``); worker yang masih hidup setelah ``SIBI_WORKER_STOP_S`` di-SIGKILL,
+      jadi master tidak keluar selagi worker masih melayani atau memegang port.
+    - Memori per worker dan total (RSS, PSS, shared, private dari
+      ``/proc/<pid>/smaps_rollup``) dilaporkan di ``GET /health`` (``memory``) dan
+      di log master secara berkala.
+
+Backend ``onnx``/``int8`` tidak bisa berbagi sesi onnxruntime melewati fork
+(thread pool-nya tidak ikut ter-fork), jadi untuk backend itu setiap worker
+memuat sesinya sendiri setelah fork; pinning dan laporan memori tetap berlaku.
+
+Konfigurasi (env):
+    SIBI_PROCESSES        - jumlah proses worker; >1 mengaktifkan mode ini (default: 1)
+    SIBI_MEMORY_LOG_S     - interval log memori master dalam detik, 0 = mati (default: 60)
+    SIBI_WORKER_STOP_S    - waktu tunggu worker berhenti setelah SIGTERM sebelum SIGKILL (default: 10)
+    SIBI_WORKERS          - default menjadi 1 per proses di mode ini
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+PROCESSES = int(os.environ.get("SIBI_PROCESSES", 1))
+MEMORY_LOG_S = float(os.environ.get("SIBI_MEMORY_LOG_S", 60))
+WORKER_STOP_S = float(os.environ.get("SIBI_WORKER_STOP_S", 10))
+
+if PROCESSES > 1:
+    # Satu replika (weights bersama dari master) per proses; harus di-set sebelum
+    # inference_pool diimport
+    os.environ.setdefault("SIBI_WORKERS", "1")
+
+# Backend yang modelnya aman dibagi lewat fork
+FORK_SHARED_BACKENDS = ("torch", "engine")
+
+# Diisi di proses worker setelah fork
+MASTER_PID: Optional[int] = None
+WORKER_INDEX: Optional[int] = None
+WORKER_CPUS: List[int] = []
+
+
+def split_cpus(cpus: List[int], processes: int) -> List[List[int]]:
+    """Split ``cpus`` into ``processes`` disjoint, contiguous, near-equal sets."""
+    processes = max(1, min(processes, len(cpus)))
+    size, extra = divmod(len(cpus), processes)
+    sets, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        sets.append(cpus[start:end])
+        start = end
+    return sets
+
+
+def process_memory(pid: int) -> Optional[Dict[str, float]]:
+    """RSS/PSS/shared/private memory (MB) of ``pid`` from ``smaps_rollup``, or None if unavailable."""
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_mb", "Shared_Dirty": "shared_mb",
+              "Private_Clean": "private_mb", "Private_Dirty": "private_mb"}
+    usage = {"rss_mb": 0.0, "pss_mb": 0.0, "shared_mb": 0.0, "private_mb": 0.0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] += int(value.split()[0]) / 1024.0
+    except (OSError, ValueError):
+        return None
+    return {key: round(value, 1) for key, value in usage.items()}
+
+
+def worker_pids(master_pid: int) -> List[int]:
+    """Child pids of the master process."""
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_report(master_pid: Optional[int] = None) -> dict:
+    """Memory of this process and, in pre-fork mode, of the master and every worker.
+
+    PSS membagi halaman shared secara proporsional, jadi ``total_pss_mb`` adalah
+    pemakaian memori fisik sebenarnya; ``total_rss_mb`` menghitung weights berkali-kali.
+    """
+    master_pid = master_pid or MASTER_PID
+    report = {"pid": os.getpid(), "worker": WORKER_INDEX, "cpus": WORKER_CPUS, **(process_memory(os.getpid()) or {})}
+    if master_pid is None:
+        return report
+
+    processes = [{"pid": master_pid, "role": "master", **(process_memory(master_pid) or {})}]
+    processes += [{"pid": pid, "role": "worker", **(process_memory(pid) or {})} for pid in worker_pids(master_pid)]
+    report["processes"] = processes
+    report["total_rss_mb"] = round(sum(p.get("rss_mb", 0.0) for p in processes), 1)
+    report["total_pss_mb"] = round(sum(p.get("pss_mb", 0.0) for p in processes), 1)
+    return report
+
+
+def log_memory(master_pid: int):
+    report = memory_report(master_pid)
+    for p in report["processes"]:
+        print(f"🧠 {p['role']:<6} pid {p['pid']}: RSS {p.get('rss_mb', 0):.0f} MB, PSS {p.get('pss_mb', 0):.0f} MB, "
+              f"shared {p.get('shared_mb', 0):.0f} MB, private {p.get('private_mb', 0):.0f} MB")
+    print(f"🧠 total: RSS {report['total_rss_mb']:.0f} MB, PSS {report['total_pss_mb']:.0f} MB")
+
+
+def stop_workers(children: Dict[int, int], timeout: float = WORKER_STOP_S) -> List[int]:
+    """SIGTERM every worker in ``children`` (pid -> index) and reap them all.
+
+    Worker yang belum keluar setelah ``timeout`` detik di-SIGKILL. ``children``
+    dikosongkan; returns pid worker yang harus di-SIGKILL.
+    """
+    for pid in list(children):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            children.pop(pid)
+
+    deadline = time.monotonic() + timeout
+    while children and time.monotonic() < deadline:
+        for pid in list(children):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                children.pop(pid)
+        if children:
+            time.sleep(0.05)
+
+    killed = []
+    for pid, index in list(children.items()):
+        print(f"⚠️ Worker {index} (pid {pid}) masih berjalan {timeout:.0f}s setelah SIGTERM, SIGKILL")
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+        children.pop(pid)
+        killed.append(pid)
+    return killed
+
+
+def run_worker(server_module, index: int, cpus: List[int], sock: socket.socket):
+    """Body of a forked worker: pin to ``cpus`` and serve ``server_module.app`` on ``sock``."""
+    global MASTER_PID, WORKER_INDEX, WORKER_CPUS
+    import uvicorn
+
+    MASTER_PID, WORKER_INDEX, WORKER_CPUS = os.getppid(), index, cpus
+    os.sched_setaffinity(0, cpus)
+    server_module.pool.threads_per_worker = len(cpus)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(len(cpus))
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    print(f"👷 Worker {index} (pid {os.getpid()}) pinned to CPUs {cpus}")
+    config = uvicorn.Config(server_module.app, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(server_module, processes: int = PROCESSES, host: str = "0.0.0.0", port: int = 8002):
+    """Load the model once in the master, then fork ``processes`` pinned workers sharing one socket."""
+    if not hasattr(os, "fork") or not hasattr(os, "sched_setaffinity"):
+        raise RuntimeError("Pre-fork mode needs Linux (fork + sched_setaffinity)")
+
+    cpu_sets = split_cpus(sorted(os.sched_getaffinity(0)), processes)
+    print(f"🍴 Pre-fork mode: {len(cpu_sets)} workers, CPU sets {cpu_sets}")
+
+    if server_module.BACKEND in FORK_SHARED_BACKENDS:
+        import torch  # type: ignore[import]
+
+        # Master hanya memakai 1 thread: thread pool OpenMP tidak boleh aktif sebelum fork
+        torch.set_num_threads(1)
+        with server_module.startup_timer.phase("master load model"):
+            if not server_module.load_model():
+                raise RuntimeError("Failed to load model in master")
+        with server_module.startup_timer.phase("master warmup"):
+            server_module.warm_up(server_module.yolo_model, server_module.warmup_sizes())
+    else:
+        print(f"ℹ️ Backend {server_module.BACKEND}: setiap worker memuat sesi onnxruntime sendiri")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Objek yang sudah ada dipindah ke generasi permanen: GC tidak menulis ke halamannya
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(server_module, index, cpu_sets[index], sock)
+            finally:
+                os._exit(0)
+        children[pid] = index
+
+    def stop(signum, frame):
+        # Worker tidak di-fork ulang lagi: loop di bawah tidak berjalan setelah handler ini
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        stop_workers(children)
+        raise SystemExit(0)
+
+    for index in range(len(cpu_sets)):
+        spawn(index)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    master_pid = os.getpid()
+    last_log = time.monotonic()
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid:
+            index = children.pop(pid)
+            print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}, restarting")
+            spawn(index)
+        if MEMORY_LOG_S > 0 and time.monotonic() - last_log >= MEMORY_LOG_S:
+            log_memory(master_pid)
+            last_log = time.monotonic()
+        time.sleep(0.5)
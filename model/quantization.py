@@ -0,0 +1,130 @@
+"""
+INT8 Quantization
+=================
+Membuat varian INT8 dari ``best.pt`` untuk host CPU kecil:
+    1. ``best.pt`` di-export ke ``best.onnx`` (sama seperti ``SIBI_BACKEND=onnx``)
+    2. Graph FP32 dikuantisasi dengan onnxruntime:
+        - ``static`` (default): weights dan aktivasi INT8 (format QDQ, per-channel),
+          range aktivasi dikalibrasi dari gambar ``dataset/valid/images``
+        - ``dynamic``: hanya weights INT8, range aktivasi dihitung saat runtime
+    3. Metadata ultralytics (``names``, ``stride``, ``imgsz``) disalin ke model INT8
+       supaya ``OnnxModel`` bisa memuatnya tanpa perubahan
+
+Model hasil kuantisasi hanya dipakai server (``SIBI_BACKEND=int8``) setelah lolos gate
+akurasi di ``testing/test_quantization.py``, yang menulis ``best.int8.onnx`` hanya jika
+penurunan akurasi top-1 masih dalam toleransi.
+"""
+
+import ast
+import random
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import cv2
+import numpy as np  # type: ignore[import]
+
+from backends import export_onnx, letterbox
+
+QUANT_MODES = ("static", "dynamic")
+DEFAULT_CALIBRATION_DIR = Path(__file__).parent.parent / "dataset" / "valid" / "images"
+DEFAULT_CALIBRATION_FRAMES = 200
+
+
+def calibration_images(directory=DEFAULT_CALIBRATION_DIR, frames: int = DEFAULT_CALIBRATION_FRAMES,
+                       seed: int = 0) -> List[Path]:
+    """Deterministic random sample of ``frames`` JPEGs from ``directory``."""
+    images = sorted(Path(directory).glob("*.jpg"))
+    random.Random(seed).shuffle(images)
+    return images[:frames]
+
+
+class CalibrationReader:
+    """``CalibrationDataReader`` for onnxruntime: one letterboxed frame per ``get_next()``."""
+
+    def __init__(self, images: Iterable[Path], input_name: str, imgsz: int, stride: int = 32):
+        self.images = list(images)
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.stride = stride
+        self._iter = iter(self.images)
+
+    def get_next(self) -> Optional[dict]:
+        for path in self._iter:
+            image = cv2.imread(str(path))
+            if image is None:
+                continue
+            # Ukuran tetap (tanpa padding minimal) agar range aktivasi sebanding antar frame
+            image, _, _ = letterbox(image, (self.imgsz, self.imgsz), False, self.stride)
+            batch = np.ascontiguousarray(image[None, ..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32)
+            return {self.input_name: batch / 255.0}
+        return None
+
+    def rewind(self):
+        self._iter = iter(self.images)
+
+
+def copy_metadata(source: Path, target: Path):
+    """Copy the ultralytics ``metadata_props`` of ``source`` into ``target`` (in place)."""
+    import onnx  # type: ignore[import]
+
+    meta = {prop.key: prop.value for prop in onnx.load(str(source), load_external_data=False).metadata_props}
+    model = onnx.load(str(target))
+    del model.metadata_props[:]
+    for key, value in meta.items():
+        model.metadata_props.add(key=key, value=value)
+    onnx.save(model, str(target))
+
+
+def quantize_model(weights, output, mode: str = "static", images: Optional[List[Path]] = None) -> Path:
+    """Quantize ``weights`` to INT8 and write the result to ``output``.
+
+    Args:
+        weights: Path ke ``best.pt``
+        output: Path file ONNX INT8 yang ditulis
+        mode: ``"static"`` (kalibrasi) atau ``"dynamic"``
+        images: Gambar kalibrasi untuk mode static (default: sample ``dataset/valid/images``)
+    """
+    if mode not in QUANT_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}' (expected one of {QUANT_MODES})")
+
+    import onnxruntime as ort  # type: ignore[import]
+    from onnxruntime.quantization import (  # type: ignore[import]
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+
+    source = export_onnx(weights)
+    output = Path(output)
+
+    if mode == "dynamic":
+        quantize_dynamic(str(source), str(output), weight_type=QuantType.QInt8)
+    else:
+        images = calibration_images() if images is None else images
+        if not images:
+            raise FileNotFoundError(f"No calibration images in {DEFAULT_CALIBRATION_DIR}")
+
+        session = ort.InferenceSession(str(source), providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+        meta = session.get_modelmeta().custom_metadata_map
+        imgsz = ast.literal_eval(meta["imgsz"]) if "imgsz" in meta else 640
+        imgsz = max(imgsz) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+        stride = int(meta.get("stride", 32))
+        del session
+
+        print(f"🔄 Kalibrasi INT8 dengan {len(images)} gambar (imgsz {imgsz})...")
+        quantize_static(
+            str(source),
+            str(output),
+            CalibrationReader(images, input_name, imgsz, stride),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+
+    copy_metadata(source, output)
+    return output
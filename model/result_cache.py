@@ -0,0 +1,184 @@
+"""
+Result Cache
+============
+Cache LRU + TTL untuk hasil deteksi, dengan key berbasis isi frame
+(hash dari piksel hasil decode + versi model). Client kiosk yang mengirim
+frame identik (scene statis tanpa tangan) tidak perlu inference ulang.
+
+Request identik yang datang bersamaan digabung menjadi satu inference
+(single-flight): hanya satu yang menjalankan ``compute``, sisanya menunggu
+hasil yang sama. Jika semua caller yang menunggu pergi (client disconnect),
+``compute`` ikut dibatalkan.
+
+Konfigurasi (env):
+    SIBI_CACHE_MB     - batas memori cache dalam MB, 0 = nonaktif (default: 16)
+    SIBI_CACHE_TTL_S  - umur maksimum entry dalam detik (default: 30)
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np  # type: ignore[import]
+
+DEFAULT_MAX_MB = float(os.environ.get("SIBI_CACHE_MB", 16))
+DEFAULT_TTL_S = float(os.environ.get("SIBI_CACHE_TTL_S", 30))
+
+
+def frame_key(image: np.ndarray, model_version: str) -> str:
+    """Content hash of a decoded frame, scoped to one model version."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(model_version.encode())
+    h.update(str(image.shape).encode())
+    h.update(np.ascontiguousarray(image).data)
+    return h.hexdigest()
+
+
+def file_version(path) -> str:
+    """Short content hash of a weights file, used as the model version."""
+    h = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """LRU + TTL cache with a memory cap and single-flight computation.
+
+    Dipakai hanya dari event loop, jadi tidak butuh lock.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = int(DEFAULT_MAX_MB * 1024 * 1024),
+        ttl_s: float = DEFAULT_TTL_S,
+        sizeof: Callable[[Any], int] = lambda value: 1024,
+    ):
+        """
+        Args:
+            max_bytes: Batas total ukuran entry (perkiraan), 0 = cache nonaktif
+            ttl_s: Umur maksimum entry dalam detik
+            sizeof: Fungsi perkiraan ukuran (bytes) satu nilai
+        """
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_s = float(ttl_s)
+        self.sizeof = sizeof
+
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Jumlah caller yang masih menunggu setiap komputasi bersama
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self._bytes = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh cached value (and mark it recently used), else ``None``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, size = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store a value, evicting least-recently-used entries over the memory cap."""
+        if not self.enabled:
+            return
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (value, time.monotonic() + self.ttl_s, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value or run ``compute`` once for all concurrent callers."""
+        if not self.enabled:
+            return await compute()
+
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            return await self._wait(shared)
+
+        self.misses += 1
+        shared = asyncio.ensure_future(compute())
+        self._inflight[key] = shared
+
+        def _done(fut: asyncio.Future):
+            self._inflight.pop(key, None)
+            if not fut.cancelled() and fut.exception() is None:
+                self.put(key, fut.result())
+
+        shared.add_done_callback(_done)
+        return await self._wait(shared)
+
+    def waiters(self, key: str) -> int:
+        """Number of callers currently awaiting the in-flight computation for ``key``."""
+        shared = self._inflight.get(key)
+        return self._waiters.get(shared, 0) if shared is not None else 0
+
+    async def _wait(self, shared: asyncio.Future) -> Any:
+        """Await a shared computation; the last caller to give up cancels it."""
+        self._waiters[shared] = self._waiters.get(shared, 0) + 1
+        try:
+            # Shield: caller yang batal tidak membatalkan inference milik caller lain
+            return await asyncio.shield(shared)
+        except asyncio.CancelledError:
+            if self._waiters[shared] == 1:
+                shared.cancel()
+            raise
+        finally:
+            self._waiters[shared] -= 1
+            if not self._waiters[shared]:
+                del self._waiters[shared]
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and memory usage."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,147 @@
+"""
+ROI Tracking
+============
+Setelah tangan ditemukan, frame berikutnya cukup di-inference pada jendela
+di sekitar ``best_box`` sebelumnya. Crop yang lebih kecil dijalankan dengan
+``imgsz`` lebih kecil (mis. 320) sehingga skala tangan relatif terhadap input
+model tetap mirip dengan inference full-frame di 640, tapi biayanya ~4x lebih
+murah.
+
+Kembali ke inference full-frame jika:
+    - confidence di crop turun di bawah ``min_conf``
+    - tidak ada deteksi di crop
+    - box menyentuh tepi crop (tangan mulai keluar jendela)
+
+Dipakai oleh ``detect_server`` (per session id) dan ``stream_server``
+(satu state untuk kamera).
+
+Konfigurasi (env):
+    SIBI_ROI_TRACKING  - 0 untuk menonaktifkan (default: 1)
+    SIBI_ROI_EXPAND    - sisi jendela = sisi terpanjang box x faktor ini (default: 2.0)
+    SIBI_ROI_IMGSZ     - imgsz untuk inference crop, kelipatan 32 (default: 320)
+    SIBI_ROI_MIN_CONF  - confidence minimum agar hasil crop diterima (default: 0.4)
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore[import]
+
+ROI_TRACKING = os.environ.get("SIBI_ROI_TRACKING", "1") != "0"
+DEFAULT_EXPAND = float(os.environ.get("SIBI_ROI_EXPAND", 2.0))
+ROI_IMGSZ = int(os.environ.get("SIBI_ROI_IMGSZ", 320))
+DEFAULT_MIN_CONF = float(os.environ.get("SIBI_ROI_MIN_CONF", 0.4))
+
+# Crop tidak dipakai jika menutupi sebagian besar frame (tidak ada penghematan)
+MAX_ROI_AREA_RATIO = 0.6
+# Jarak (px) dari tepi crop yang dianggap "menyentuh tepi"
+EDGE_MARGIN = 4
+
+Roi = Tuple[int, int, int, int]
+
+
+def expand_roi(
+    box_xyxy: Sequence[float], frame_w: int, frame_h: int, expand: float, min_size: int
+) -> Optional[Roi]:
+    """Square window around a pixel box, shifted to stay inside the frame."""
+    x1, y1, x2, y2 = box_xyxy
+    side = int(max(x2 - x1, y2 - y1) * expand)
+    side = min(max(side, min_size), frame_w, frame_h)
+    if side * side > MAX_ROI_AREA_RATIO * frame_w * frame_h:
+        return None
+
+    cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+    rx1 = int(min(max(cx - side / 2.0, 0), frame_w - side))
+    ry1 = int(min(max(cy - side / 2.0, 0), frame_h - side))
+    return (rx1, ry1, rx1 + side, ry1 + side)
+
+
+def crop(frame: np.ndarray, roi: Roi) -> np.ndarray:
+    """Contiguous copy of the ROI (small, so the copy is cheap)."""
+    x1, y1, x2, y2 = roi
+    return np.ascontiguousarray(frame[y1:y2, x1:x2])
+
+
+def roi_to_frame(box_xyxy: Sequence[float], roi: Roi) -> Tuple[float, float, float, float]:
+    """Map a pixel box inside the crop back to full-frame pixels."""
+    x1, y1, x2, y2 = box_xyxy
+    return (x1 + roi[0], y1 + roi[1], x2 + roi[0], y2 + roi[1])
+
+
+class RoiTracker:
+    """Remember the last hand box per session and decide when a crop is enough."""
+
+    def __init__(
+        self,
+        expand: float = DEFAULT_EXPAND,
+        min_conf: float = DEFAULT_MIN_CONF,
+        min_size: int = ROI_IMGSZ,
+        max_sessions: int = 1024,
+        session_ttl_s: float = 60.0,
+    ):
+        self.expand = float(expand)
+        self.min_conf = float(min_conf)
+        self.min_size = int(min_size)
+        self.max_sessions = max(1, int(max_sessions))
+        self.session_ttl_s = float(session_ttl_s)
+
+        # key -> (box_xyxy full-frame pixels, last update time)
+        self._boxes: "OrderedDict[str, Tuple[Tuple[float, float, float, float], float]]" = OrderedDict()
+
+        # Statistics
+        self.frames = 0
+        self.roi_frames = 0
+        self.fallbacks = 0
+
+    def roi_for(self, key: str, frame_w: int, frame_h: int) -> Optional[Roi]:
+        """ROI to infer on for this frame, or ``None`` for full-frame inference."""
+        self.frames += 1
+        entry = self._boxes.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.session_ttl_s:
+            return None
+        roi = expand_roi(entry[0], frame_w, frame_h, self.expand, self.min_size)
+        if roi is not None:
+            self.roi_frames += 1
+        return roi
+
+    def accept(self, roi: Roi, box_xyxy: Optional[Sequence[float]], conf: float,
+               frame_w: int, frame_h: int) -> bool:
+        """Whether a crop result is trustworthy; otherwise the caller falls back to full frame."""
+        ok = box_xyxy is not None and conf >= self.min_conf
+        if ok:
+            x1, y1, x2, y2 = box_xyxy
+            rx1, ry1, rx2, ry2 = roi
+            # Menyentuh tepi crop yang bukan tepi frame -> tangan mungkin keluar jendela
+            ok = not (
+                (x1 - rx1 < EDGE_MARGIN and rx1 > 0)
+                or (y1 - ry1 < EDGE_MARGIN and ry1 > 0)
+                or (rx2 - x2 < EDGE_MARGIN and rx2 < frame_w)
+                or (ry2 - y2 < EDGE_MARGIN and ry2 < frame_h)
+            )
+        if not ok:
+            self.fallbacks += 1
+        return ok
+
+    def update(self, key: str, box_xyxy: Optional[Sequence[float]]):
+        """Store the latest full-frame box (``None`` = hand lost, stop tracking)."""
+        if box_xyxy is None:
+            self._boxes.pop(key, None)
+            return
+        self._boxes[key] = (tuple(box_xyxy), time.monotonic())
+        self._boxes.move_to_end(key)
+        while len(self._boxes) > self.max_sessions:
+            self._boxes.popitem(last=False)
+
+    def stats(self) -> dict:
+        """How many frames were served from a crop vs. fell back to full frame."""
+        return {
+            "enabled": ROI_TRACKING,
+            "imgsz": ROI_IMGSZ,
+            "tracked": len(self._boxes),
+            "frames": self.frames,
+            "roi_frames": self.roi_frames,
+            "fallbacks": self.fallbacks,
+            "roi_rate": round((self.roi_frames - self.fallbacks) / self.frames, 4) if self.frames else 0.0,
+        }
@@ -0,0 +1,113 @@
+"""
+Startup
+=======
+Cold start cepat untuk ``detect_server``:
+    - Model tidak di-load saat import. ``lifespan`` menjalankan load + warm-up di
+      background, jadi uvicorn langsung bind dan ``/health`` sudah menjawab.
+      ``/ready`` baru 200 setelah semua replika selesai warm-up.
+    - Artefak backend (``best.onnx``, ``best.int8.onnx``) bisa dibuat saat build image
+      dengan ``python startup.py --prepare`` sehingga replika baru tidak export saat start.
+    - Warm-up: setiap replika menjalankan inference pada frame dummy (ukuran input model,
+      dan ukuran crop ROI jika ROI tracking aktif) untuk setiap ukuran batch yang bisa
+      dikirim micro-batcher (``model.batch_sizes``; bucket ter-pad pada backend engine)
+      sebelum menerima request, jadi ``/ready`` tidak 200 sebelum semua graph di-trace.
+    - Durasi setiap fase startup dicatat (log + ``/ready``).
+
+Konfigurasi (env):
+    SIBI_FAST_START      - 0 untuk load model sebelum uvicorn bind (default: 1)
+    SIBI_WARMUP_RUNS     - jumlah inference warm-up per (imgsz, batch) per replika, 0 = mati (default: 1)
+    SIBI_WARMUP_FRAME    - ukuran frame dummy WxH (default: 640x480)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np  # type: ignore[import]
+
+FAST_START = os.environ.get("SIBI_FAST_START", "1") != "0"
+WARMUP_RUNS = int(os.environ.get("SIBI_WARMUP_RUNS", 1))
+WARMUP_FRAME = tuple(int(v) for v in os.environ.get("SIBI_WARMUP_FRAME", "640x480").lower().split("x"))
+
+
+class StartupTimer:
+    """Wall-clock duration of each startup phase, logged as it completes."""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            self.phases[name] = round(ms, 1)
+        print(f"⏱️ Startup {name}: {ms:.0f} ms")
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"phases_ms": dict(self.phases), "since_start_ms": round((time.perf_counter() - self.started) * 1000.0, 1)}
+
+
+def warm_up(model, sizes: Iterable[int], runs: int = WARMUP_RUNS, batch_sizes: Optional[Iterable[int]] = None):
+    """Run ``runs`` inferences per (``imgsz``, batch size) on blank frames (predictor setup, traces, allocations).
+
+    ``batch_sizes`` default ke ``model.batch_sizes`` (backend engine: semua bucket yang
+    di-trace), selain itu hanya batch 1.
+    """
+    if runs <= 0:
+        return
+    if batch_sizes is None:
+        batch_sizes = getattr(model, "batch_sizes", (1,))
+    width, height = WARMUP_FRAME
+    frame = np.full((height, width, 3), 114, dtype=np.uint8)
+    for imgsz in sizes:
+        for batch in batch_sizes:
+            source = frame if batch == 1 else [frame] * batch
+            for _ in range(runs):
+                model(source, imgsz=imgsz, verbose=False)
+
+
+def prepare(weights, backend: str) -> Path:
+    """Build the cached artifact ``backend`` loads at startup (no-op for ``torch``)."""
+    from backends import export_onnx, quantized_path
+
+    if backend == "onnx":
+        return export_onnx(weights)
+    if backend == "int8":
+        path = quantized_path(weights)
+        if not path.exists():
+            raise FileNotFoundError(f"{path.name} is only written by testing/test_quantization.py")
+        return path
+    if backend in ("torch", "engine"):
+        # best.pt dimuat langsung
+        return Path(weights)
+    raise ValueError(f"Unknown backend '{backend}'")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from backends import BACKEND
+
+    parser = argparse.ArgumentParser(description="Prepare startup artifacts for detect_server")
+    parser.add_argument("--prepare", action="store_true", help="Build the artifact for --backend")
+    parser.add_argument("--backend", default=BACKEND, help="Backend (default: SIBI_BACKEND)")
+    parser.add_argument("--weights", default=str(Path(__file__).with_name("best.pt")), help="Path ke best.pt")
+    args = parser.parse_args()
+
+    if args.prepare:
+        timer = StartupTimer()
+        with timer.phase(f"prepare {args.backend}"):
+            artifact = prepare(args.weights, args.backend)
+        print(f"✅ Artifact siap: {artifact}")
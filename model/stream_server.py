@@ -5,21 +5,46 @@ FastAPI server yang stream video real-time dengan deteksi SIBI overlay.
 React frontend hanya consume video stream (seperti IP camera).
 
 Endpoints:
-    GET  /video_feed - MJPEG video stream dengan overlay
+    GET  /video_feed - MJPEG video stream dengan overlay (?max_fps= opsional)
     GET  /status     - Status kamera dan detection stats
+
+Semua viewer /video_feed berbagi satu pipeline capture -> inference -> encode
+(``broadcast.FrameHub``); pipeline berjalan selama ada minimal satu viewer.
+Inference berjalan di thread sendiri dengan rate terpisah dari fps stream;
+frame di antaranya memakai box terakhir atau ekstrapolasinya (``box_track``).
+
+Konfigurasi (env):
+    SIBI_STREAM_FPS - fps maksimum stream /video_feed (default: 30, 0 = ikut kamera)
+    SIBI_INFER_FPS  - inference per detik (default: 0 = secepat inference selesai)
 """
 
-from fastapi import FastAPI, Response
+import os
+import sys
+
+# Modul lokal (roi_tracking, dll.) harus bisa diimport baik lewat
+# `python stream_server.py` maupun `uvicorn model.stream_server:app`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 import cv2
 import numpy as np
 from pathlib import Path
-from ultralytics import YOLO
 import time
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread, Lock
 
+from backends import BACKEND, load_backend
+from broadcast import FrameHub
+from box_track import BoxTrack
+from capture import FrameGrabber
+from event_log import EventLog
+from postprocess import as_detections, best, parse_class_thresholds
+from roi_tracking import ROI_IMGSZ, ROI_TRACKING, RoiTracker, crop, roi_to_frame
+
 # Lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -46,15 +71,13 @@ async def lifespan(app: FastAPI):
     yield  # Server is running
     
     # Shutdown
-    global camera
     print("\n🧹 Shutting down...")
     
-    with camera_lock:
-        if camera is not None:
-            camera.release()
+    frame_hub.close()
+    inference_executor.shutdown(wait=False)
     
-    with stats_lock:
-        stats["camera_active"] = False
+    # Join thread capture bersifat blocking: jangan di event loop
+    await run_in_threadpool(close_camera)
     
     print("✅ Cleanup complete")
 
@@ -72,6 +95,8 @@ app.add_middleware(
 # Global variables
 MODEL_PATH = Path(__file__).parent / "best.pt"
 CONFIDENCE_THRESHOLD = 0.3
+# Threshold per kelas (mis. "M=0.5,N=0.5"), di-parse setelah model (nama kelas) dimuat
+CLASS_THRESHOLDS = {}
 
 # Camera dan model
 camera = None
@@ -86,11 +111,41 @@ stats = {
     "last_detection": "-",
     "last_confidence": 0.0,
     "fps": 0.0,
+    "inferences": 0,
+    "inference_fps": 0.0,
+    "latency_ms": 0.0,
     "camera_active": False,
     "current_camera_id": 0
 }
 stats_lock = Lock()
 
+# Log event JSON lines (tanpa write per frame; error per frame dibatasi)
+event_log = EventLog("stream")
+
+# Satu pipeline capture -> inference -> encode, di-broadcast ke semua viewer /video_feed
+frame_hub = FrameHub()
+pipeline_thread = None
+pipeline_lock = Lock()
+CAMERA_OFF_CHUNK = None
+# Bobot EMA latency capture -> tampil
+LATENCY_EMA = 0.1
+
+# Cadence: stream dan inference punya rate sendiri; frame di antaranya memakai
+# box terakhir / ekstrapolasi (box_track)
+STREAM_FPS = float(os.environ.get("SIBI_STREAM_FPS", 30))
+INFER_FPS = float(os.environ.get("SIBI_INFER_FPS", 0))
+STREAM_INTERVAL_S = 1.0 / STREAM_FPS if STREAM_FPS > 0 else 0.0
+INFER_INTERVAL_S = 1.0 / INFER_FPS if INFER_FPS > 0 else 0.0
+inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-inference")
+inference_job = None
+next_inference_at = 0.0
+inference_window = (time.monotonic(), 0)
+box_track = BoxTrack()
+
+# ROI tracking: satu kamera = satu track
+roi_tracker = RoiTracker()
+CAMERA_TRACK = "camera"
+
 # Colors (BGR)
 GREEN = (34, 197, 94)
 WHITE = (255, 255, 255)
@@ -99,9 +154,10 @@ BLACK = (0, 0, 0)
 
 def load_model():
     """Load YOLO model."""
-    global model
-    print(f"📦 Loading model: {MODEL_PATH.name}")
-    model = YOLO(str(MODEL_PATH))
+    global model, CLASS_THRESHOLDS
+    print(f"📦 Loading model: {MODEL_PATH.name} (backend: {BACKEND})")
+    model = load_backend(MODEL_PATH)
+    CLASS_THRESHOLDS = parse_class_thresholds(os.environ.get("SIBI_CLASS_THRESHOLDS", ""), model.names)
     print(f"✅ Model loaded! Classes: {len(model.names)}")
 
 
@@ -129,6 +185,7 @@ def init_camera(camera_id=0):
     with camera_lock:
         if camera is not None:
             camera.release()
+            camera = None
         
         print(f"📷 Opening camera {camera_id}...")
         
@@ -153,7 +210,8 @@ def init_camera(camera_id=0):
             cap.release()
             raise RuntimeError("Camera opened but cannot read frames")
         
-        camera = cap
+        # Kamera dibaca terus oleh thread capture; pipeline mengambil frame terbaru
+        camera = FrameGrabber(cap, name=str(camera_id))
         current_camera_id = camera_id
         
         with stats_lock:
@@ -164,6 +222,19 @@ def init_camera(camera_id=0):
         return True
 
 
+def close_camera():
+    """Stop the capture thread and release the camera (blocking; run off the event loop)."""
+    global camera
+    
+    with camera_lock:
+        if camera is not None:
+            camera.release()
+            camera = None
+    
+    with stats_lock:
+        stats["camera_active"] = False
+
+
 # def draw_info_panel(frame: np.ndarray, detection_info: dict = None):
 #     """Draw info panel on frame."""
 #     h, w = frame.shape[:2]
@@ -200,12 +271,12 @@ def init_camera(camera_id=0):
 #                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (150, 150, 150), 1)
 
 
-def draw_detection(frame: np.ndarray, box, cls_idx: int, conf: float):
+def draw_detection(frame: np.ndarray, xyxy, cls_idx: int, conf: float):
     """Draw bounding box with label."""
     h, w = frame.shape[:2]
     
-    # Get box coordinates (xyxy format)
-    x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+    # Box coordinates (xyxy format, full-frame pixels)
+    x1, y1, x2, y2 = map(int, xyxy)
     
     # Get class name
     letter = model.names.get(cls_idx, "?")
@@ -234,41 +305,92 @@ def draw_detection(frame: np.ndarray, box, cls_idx: int, conf: float):
     return letter, conf
 
 
-def process_frame(frame: np.ndarray):
-    """Process frame with detection and overlay."""
-    global stats
+def detect_best(image: np.ndarray, imgsz=None):
+    """Best detection above threshold as (xyxy, cls_idx, conf), or None."""
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    top = best(as_detections(model(image, verbose=False, **kwargs)[0]), CONFIDENCE_THRESHOLD, CLASS_THRESHOLDS)
+    if top is None:
+        return None
+    
+    cls_idx, conf, xyxy = top
+    return xyxy.tolist(), cls_idx, conf
+
+
+def detect_tracked(frame: np.ndarray):
+    """Detect on a crop around the last hand box, falling back to the full frame."""
+    h, w = frame.shape[:2]
+    roi = roi_tracker.roi_for(CAMERA_TRACK, w, h)
+    
+    if roi is not None:
+        detection = detect_best(crop(frame, roi), ROI_IMGSZ)
+        if detection is not None:
+            xyxy, cls_idx, conf = detection
+            detection = (roi_to_frame(xyxy, roi), cls_idx, conf)
+        if roi_tracker.accept(roi, detection[0] if detection else None,
+                              detection[2] if detection else 0.0, w, h):
+            roi_tracker.update(CAMERA_TRACK, detection[0])
+            return detection
+    
+    detection = detect_best(frame)
+    roi_tracker.update(CAMERA_TRACK, detection[0] if detection else None)
+    return detection
+
+
+def infer_frame(frame: np.ndarray, captured_at: float):
+    """Run detection on a mirrored frame (inference thread); returns (captured_at, detection)."""
+    global inference_window
+    
+    # Run detection (crop di sekitar tangan terakhir jika ROI tracking aktif)
+    detection = detect_tracked(frame) if ROI_TRACKING else detect_best(frame)
+    
+    now = time.monotonic()
+    with stats_lock:
+        stats['inferences'] += 1
+        # inference fps per window ~1 detik
+        window_start, window_count = inference_window
+        window_count += 1
+        if now - window_start >= 1.0:
+            stats['inference_fps'] = window_count / (now - window_start)
+            window_start, window_count = now, 0
+        inference_window = (window_start, window_count)
+        
+        if detection is not None:
+            letter = model.names.get(detection[1], "?")
+            stats['detections'] += 1
+            stats['last_detection'] = letter
+            stats['last_confidence'] = float(detection[2])
+    if detection is not None:
+        event_log.event("detected", letter=letter, confidence=round(float(detection[2]), 3))
+    
+    return captured_at, detection
+
+
+def process_frame(frame: np.ndarray, captured_at: float):
+    """Mirror the frame, schedule inference at ``INFER_FPS`` and draw the latest detection."""
+    global stats, inference_job, next_inference_at
     
     # Flip horizontally (mirror mode)
     frame = cv2.flip(frame, 1)
     
-    # Run detection
-    results = model(frame, verbose=False)[0]
+    # Ambil hasil inference yang sudah selesai
+    if inference_job is not None and inference_job.done():
+        try:
+            box_track.update(*inference_job.result())
+        except Exception as e:
+            event_log.error("inference_failed", e)
+        inference_job = None
     
-    detection_info = None
+    # Inference berikutnya berjalan di thread sendiri, stream tidak menunggu
+    now = time.monotonic()
+    if inference_job is None and now >= next_inference_at:
+        next_inference_at = now + INFER_INTERVAL_S
+        inference_job = inference_executor.submit(infer_frame, frame.copy(), captured_at)
     
-    # Process detections
-    if results.boxes is not None and len(results.boxes) > 0:
-        boxes = results.boxes
-        confidences = boxes.conf.cpu().numpy()
-        
-        for i, conf in enumerate(confidences):
-            if conf >= CONFIDENCE_THRESHOLD:
-                box = boxes[i]
-                cls_idx = int(box.cls.item())
-                
-                letter, conf_val = draw_detection(frame, box, cls_idx, conf)
-                
-                detection_info = {
-                    'letter': letter,
-                    'confidence': float(conf_val)
-                }
-                
-                with stats_lock:
-                    stats['detections'] += 1
-                    stats['last_detection'] = letter
-                    stats['last_confidence'] = float(conf_val)
-                
-                break  # Only draw best detection
+    # Box terakhir (atau ekstrapolasi) untuk frame ini
+    detection = box_track.predict(captured_at)
+    if detection is not None:
+        xyxy, cls_idx, conf = detection
+        draw_detection(frame, xyxy, cls_idx, conf)
     
     # Draw info panel (disabled - stats shown in frontend)
     # draw_info_panel(frame, detection_info)
@@ -279,41 +401,70 @@ def process_frame(frame: np.ndarray):
     return frame
 
 
-def generate_frames():
-    """Generate video frames with detection overlay."""
-    global camera, stats
+def mjpeg_chunk(frame: np.ndarray):
+    """Encode a frame as one multipart/x-mixed-replace chunk (None if encoding fails)."""
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    if not ret:
+        return None
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+
+
+def camera_off_chunk():
+    """Black "Camera Off" frame, encoded once."""
+    global CAMERA_OFF_CHUNK
+    if CAMERA_OFF_CHUNK is None:
+        black_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.putText(black_frame, "Camera Off", (200, 240),
+                   cv2.FONT_HERSHEY_SIMPLEX, 1.5, (100, 100, 100), 2)
+        CAMERA_OFF_CHUNK = mjpeg_chunk(black_frame)
+    return CAMERA_OFF_CHUNK
+
+
+def run_pipeline():
+    """Capture -> detect -> encode loop publishing to ``frame_hub`` while anyone is watching."""
+    global camera, stats, pipeline_thread
     
     fps_start_time = time.time()
     fps_frame_count = 0
+    last_grabber, last_seq = None, 0
+    next_frame_at = 0.0
     
     while True:
+        # Berhenti jika tidak ada viewer; dicek di bawah pipeline_lock agar
+        # viewer baru tidak tertinggal dengan pipeline yang sedang keluar
+        with pipeline_lock:
+            if frame_hub.subscribers == 0 or frame_hub.closed:
+                pipeline_thread = None
+                return
+        
         with camera_lock:
-            cam_available = camera is not None and camera.isOpened()
-            if cam_available:
-                ret, frame = camera.read()
-            else:
-                ret, frame = False, None
+            grabber = camera if camera is not None and camera.isOpened() else None
         
-        # If camera not available, yield black frame and wait
-        if not cam_available:
-            # Create black frame with message
-            black_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-            cv2.putText(black_frame, "Camera Off", (200, 240),
-                       cv2.FONT_HERSHEY_SIMPLEX, 1.5, (100, 100, 100), 2)
-            ret, buffer = cv2.imencode('.jpg', black_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if ret:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+        # If camera not available, publish black frame and wait
+        if grabber is None:
+            chunk = camera_off_chunk()
+            if chunk is not None:
+                frame_hub.publish(chunk)
             time.sleep(0.1)
             continue
         
-        if not ret or frame is None:
-            time.sleep(0.1)
+        # Selalu frame paling baru dari thread capture (frame terlewat dihitung di grabber)
+        if grabber is not last_grabber:
+            last_grabber, last_seq = grabber, 0
+        # Batasi fps stream (SIBI_STREAM_FPS); frame yang dilewati dihitung sebagai dropped
+        delay = next_frame_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        captured = grabber.latest(last_seq, timeout=0.5)
+        if captured is None:
             continue
+        last_seq = captured.seq
+        next_frame_at = time.monotonic() + STREAM_INTERVAL_S
         
         try:
-            # Process frame with detection
-            processed_frame = process_frame(frame)
+            # Overlay deteksi (inference dijadwalkan terpisah)
+            processed_frame = process_frame(captured.frame, captured.captured_at)
             
             # Calculate FPS
             fps_frame_count += 1
@@ -327,23 +478,45 @@ def generate_frames():
                 fps_start_time = time.time()
                 fps_frame_count = 0
             
-            # Encode frame to JPEG
-            ret, buffer = cv2.imencode('.jpg', processed_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            
-            if not ret:
-                continue
-            
-            frame_bytes = buffer.tobytes()
-            
-            # Yield frame in MJPEG format
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            # Encode sekali, dibagikan ke semua viewer
+            chunk = mjpeg_chunk(processed_frame)
+            if chunk is not None:
+                frame_hub.publish(chunk)
+                # Latency capture -> chunk siap dikirim (EMA)
+                latency_ms = (time.monotonic() - captured.captured_at) * 1000
+                with stats_lock:
+                    stats['latency_ms'] += LATENCY_EMA * (latency_ms - stats['latency_ms'])
         
         except Exception as e:
-            print(f"❌ Error processing frame: {e}")
+            event_log.error("process_frame_failed", e)
             continue
 
 
+def ensure_pipeline():
+    """Start the shared pipeline thread if it is not running."""
+    global pipeline_thread
+    with pipeline_lock:
+        if pipeline_thread is None:
+            pipeline_thread = Thread(target=run_pipeline, name="stream-pipeline", daemon=True)
+            pipeline_thread.start()
+
+
+async def generate_frames(max_fps: float = 0.0, client: str = ""):
+    """Stream chunks published by the shared pipeline to one viewer.
+
+    Async generator: viewer menunggu di event loop, bukan di thread threadpool.
+    Selama ``yield`` tertahan (client lambat), chunk baru hanya menimpa slot
+    terbaru; viewer lanjut dari chunk paling baru, bukan dari antrean.
+    """
+    subscriber = frame_hub.subscribe(max_fps, client)
+    try:
+        ensure_pipeline()
+        while not frame_hub.closed:
+            chunk = await frame_hub.next(subscriber)
+            if chunk is not None:
+                yield chunk
+    finally:
+        frame_hub.unsubscribe(subscriber)
 
 
 @app.get("/")
@@ -353,17 +526,18 @@ async def root():
         "name": "SIBI Detection Streaming API",
         "version": "1.0.0",
         "endpoints": {
-            "/video_feed": "MJPEG video stream with detection overlay",
+            "/video_feed": "MJPEG video stream with detection overlay (optional ?max_fps=N)",
             "/status": "Detection statistics and camera status"
         }
     }
 
 
 @app.get("/video_feed")
-async def video_feed():
-    """MJPEG video stream endpoint."""
+async def video_feed(request: Request, max_fps: float = Query(0.0, ge=0)):
+    """MJPEG video stream endpoint (``?max_fps=`` membatasi fps untuk client ini)."""
+    client = f"{request.client.host}:{request.client.port}" if request.client else ""
     return StreamingResponse(
-        generate_frames(),
+        generate_frames(max_fps, client),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
@@ -371,6 +545,10 @@ async def video_feed():
 @app.get("/status")
 async def get_status():
     """Get detection statistics."""
+    broadcast = frame_hub.stats()
+    # Tanpa camera_lock: init_camera bisa memegangnya selama kamera dibuka
+    grabber = camera
+    capture = grabber.stats() if grabber is not None else None
     with stats_lock:
         return {
             "camera_active": stats["camera_active"],
@@ -379,7 +557,21 @@ async def get_status():
             "last_detection": stats["last_detection"],
             "last_confidence": stats["last_confidence"],
             "fps": round(stats["fps"], 2),
-            "current_camera_id": stats["current_camera_id"]
+            "subscribers": broadcast["subscribers"],
+            "pipeline_fps": broadcast["fps"],
+            "latency_ms": round(stats["latency_ms"], 1),
+            "inferences": stats["inferences"],
+            "inference_fps": round(stats["inference_fps"], 2),
+            "cadence": {
+                "target_stream_fps": STREAM_FPS,
+                "target_inference_fps": INFER_FPS,
+                "box_track": box_track.stats(),
+            },
+            "broadcast": broadcast,
+            "current_camera_id": stats["current_camera_id"],
+            "capture": capture,
+            "roi_tracking": roi_tracker.stats(),
+            "logging": event_log.stats()
         }
 
 
@@ -401,7 +593,7 @@ async def list_cameras():
 async def switch_camera(camera_id: int):
     """Switch to a different camera."""
     try:
-        success = init_camera(camera_id)
+        success = await run_in_threadpool(init_camera, camera_id)
         if success:
             return {
                 "success": True,
@@ -424,7 +616,7 @@ async def switch_camera(camera_id: int):
 async def start_camera():
     """Start the camera."""
     try:
-        success = init_camera(current_camera_id)
+        success = await run_in_threadpool(init_camera, current_camera_id)
         if success:
             return {
                 "success": True,
@@ -445,15 +637,8 @@ async def start_camera():
 @app.post("/stop_camera")
 async def stop_camera():
     """Stop the camera."""
-    global camera
     try:
-        with camera_lock:
-            if camera is not None:
-                camera.release()
-                camera = None
-
-        with stats_lock:
-            stats["camera_active"] = False
+        await run_in_threadpool(close_camera)
 
         return {
             "success": True,
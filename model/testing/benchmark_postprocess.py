@@ -0,0 +1,163 @@
+"""
+Benchmark Postprocessing
+========================
+Membandingkan cara lama membaca hasil YOLO (loop Python per box: ``boxes[i]``,
+``box.cls.item()``, ``box.conf.item()``, ``box.xyxy[0].tolist()``) dengan
+``postprocess.as_detections`` + ``select`` (satu transfer ke NumPy, threshold
+dan top-k vectorized):
+    - Sweep jumlah box per frame (``Results`` sintetis, tanpa model)
+    - (opsional) Hasil model asli pada gambar dataset dengan --model
+
+Kedua jalur harus memberi deteksi yang sama (diperiksa sebelum diukur).
+
+Cara menjalankan:
+    python benchmark_postprocess.py
+    python benchmark_postprocess.py --model
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from postprocess import as_detections, select
+
+# Constants
+MODEL_PATH = Path(__file__).parent.parent / "best.pt"
+DATASET_PATH = Path(__file__).parent.parent.parent / "dataset" / "valid" / "images"
+CONFIDENCE_THRESHOLD = 0.2
+NUM_CLASSES = 24
+
+
+def per_box(result, conf: float, k: int):
+    """Cara lama: iterasi box satu per satu, ambil k terbaik di atas threshold."""
+    picked = []
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return picked
+    for i in range(len(boxes)):
+        box = boxes[i]
+        box_conf = float(box.conf.item())
+        if box_conf >= conf:
+            picked.append((int(box.cls.item()), box_conf, box.xyxy[0].tolist()))
+    picked.sort(key=lambda item: -item[1])
+    return picked[:k]
+
+
+def vectorized(result, conf: float, k: int):
+    """Jalur baru: ``as_detections`` + ``select``."""
+    return select(as_detections(result), conf, k=k)
+
+
+def same_output(old, new) -> bool:
+    if len(old) != len(new):
+        return False
+    return all(
+        cls_idx == new_cls and abs(conf - new_conf) < 1e-5 and np.allclose(xyxy, new_xyxy, atol=1e-3)
+        for (cls_idx, conf, xyxy), new_cls, new_conf, new_xyxy
+        in zip(old, new.cls.tolist(), new.conf.tolist(), new.xyxy.tolist())
+    )
+
+
+def synthetic_result(n: int, rng: np.random.Generator) -> Results:
+    """``Results`` with ``n`` random boxes on a 640x480 frame (like a predictor output)."""
+    xy = rng.uniform(0, 400, (n, 2))
+    wh = rng.uniform(20, 200, (n, 2))
+    data = np.concatenate([
+        xy, xy + wh, rng.uniform(0.01, 1.0, (n, 1)), rng.integers(0, NUM_CLASSES, (n, 1))
+    ], axis=1).astype(np.float32)
+    data = data[np.argsort(-data[:, 4])]
+    names = {i: str(i) for i in range(NUM_CLASSES)}
+    return Results(np.zeros((480, 640, 3), np.uint8), path="", names=names, boxes=torch.from_numpy(data))
+
+
+def time_path(fn, results, conf: float, k: int, repeats: int) -> float:
+    """Mean ms per frame of ``fn`` over ``results``."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for result in results:
+            fn(result, conf, k)
+    return (time.perf_counter() - start) / (len(results) * repeats) * 1000
+
+
+def compare(results, conf: float, k: int, repeats: int):
+    """Check both paths agree, then return (per-box ms, vectorized ms)."""
+    for result in results:
+        if not same_output(per_box(result, conf, k), vectorized(result, conf, k)):
+            raise AssertionError("Vectorized postprocessing differs from per-box loop")
+    return time_path(per_box, results, conf, k, repeats), time_path(vectorized, results, conf, k, repeats)
+
+
+def benchmark_synthetic(frames: int, repeats: int, k: int):
+    """Sweep jumlah box per frame."""
+    print("=" * 60)
+    print(f"BENCHMARK 1: Box Count Sweep (top-{k}, conf >= {CONFIDENCE_THRESHOLD})")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    print(f"   {'Boxes':>6}{'Per-box ms':>14}{'Vectorized ms':>16}{'Speedup':>10}")
+    for n in (0, 1, 5, 20, 100, 300):
+        results = [synthetic_result(n, rng) for _ in range(frames)]
+        old_ms, new_ms = compare(results, CONFIDENCE_THRESHOLD, k, repeats)
+        print(f"   {n:>6}{old_ms:>14.4f}{new_ms:>16.4f}{old_ms / new_ms:>9.1f}x")
+
+
+def benchmark_model(frames: int, repeats: int, k: int):
+    """Hasil model asli pada gambar dataset."""
+    print("\n" + "=" * 60)
+    print("BENCHMARK 2: Model Output on Dataset Images")
+    print("=" * 60)
+
+    if not DATASET_PATH.exists():
+        print(f"⚠️ Dataset tidak ditemukan di: {DATASET_PATH}")
+        return
+
+    from ultralytics import YOLO
+    from PIL import Image
+
+    model = YOLO(str(MODEL_PATH))
+    results = [
+        model(np.array(Image.open(img_path).convert("RGB")), verbose=False)[0]
+        for img_path in sorted(DATASET_PATH.glob("*.jpg"))[:frames]
+    ]
+    if not results:
+        print("⚠️ Tidak ada gambar di dataset")
+        return
+
+    boxes = sum(len(result.boxes) for result in results) / len(results)
+    old_ms, new_ms = compare(results, CONFIDENCE_THRESHOLD, k, repeats)
+    print(f"   Frames: {len(results)} (rata-rata {boxes:.1f} box/frame, x{repeats} repeats)\n")
+    print(f"   {'Path':<12}{'ms/frame':>12}")
+    print(f"   {'per-box':<12}{old_ms:>12.4f}")
+    print(f"   {'vectorized':<12}{new_ms:>12.4f}")
+    print(f"\n   ✅ Vectorized {old_ms / new_ms:.1f}x lebih cepat")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-box vs vectorized YOLO postprocessing")
+    parser.add_argument("--frames", type=int, default=50, help="Jumlah frame per ukuran / gambar dataset")
+    parser.add_argument("--repeats", type=int, default=20, help="Pengulangan per frame")
+    parser.add_argument("--top-k", type=int, default=1, help="Jumlah deteksi yang diambil")
+    parser.add_argument("--model", action="store_true", help="Juga ukur pada output best.pt untuk gambar dataset")
+    args = parser.parse_args()
+
+    print("\n")
+    print("╔" + "═" * 58 + "╗")
+    print("║" + " SIBI POSTPROCESSING BENCHMARK ".center(58) + "║")
+    print("╚" + "═" * 58 + "╝")
+    print()
+
+    benchmark_synthetic(args.frames, args.repeats, args.top_k)
+    if args.model:
+        benchmark_model(args.frames, args.repeats, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark Response Serialization
+================================
+Mengukur biaya serialisasi per response ``/detect`` untuk setiap encoding:
+    - FastAPI default (``jsonable_encoder`` + ``json.dumps``, jalur sebelum ``encoded_response``)
+    - ``json.dumps(model_dump())``
+    - JSON pydantic-core (``model_dump_json``, default server)
+    - msgpack (jika package ``msgpack`` terinstall)
+    - Record biner fixed-layout (``application/vnd.sibi.detect``)
+
+Termasuk pembuatan objek ``Keypoint``/``Box``/``DetectResponse`` agar biaya
+membangun response pydantic juga terlihat.
+
+Cara menjalankan:
+    python benchmark_serialization.py
+    python benchmark_serialization.py --boxes 5 --repeats 50000
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import json
+import time
+from typing import List, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pydantic import BaseModel
+
+import encoding
+
+
+class Keypoint(BaseModel):
+    """Same schema as ``detect_server.Keypoint``."""
+    x: float
+    y: float
+
+
+class Box(BaseModel):
+    """Same schema as ``detect_server.Box``."""
+    x: float
+    y: float
+    w: float
+    h: float
+
+
+class DetectResponse(BaseModel):
+    """Same schema as ``detect_server.DetectResponse``."""
+    letter: str
+    confidence: float
+    keypoints: List[Keypoint]
+    bones: List[Tuple[int, int]]
+    boxes: List[Box]
+    inference_skipped: bool = False
+    stale: bool = False
+
+
+def build_response(boxes: int) -> DetectResponse:
+    """Response like ``build_response`` with ``boxes`` boxes (top-k)."""
+    return DetectResponse(
+        letter="A",
+        confidence=0.9312,
+        keypoints=[Keypoint(x=0.4821, y=0.6133), Keypoint(x=0.4821, y=0.5012), Keypoint(x=0.4821, y=0.3891)],
+        bones=[(0, 1), (1, 2)],
+        boxes=[Box(x=0.2314 + 0.01 * i, y=0.1507, w=0.5013, h=0.7012) for i in range(boxes)],
+    )
+
+
+def serializers():
+    """(name, fn(response) -> bytes) for every encoding available here."""
+    paths = []
+    try:
+        from fastapi.encoders import jsonable_encoder
+
+        paths.append(("fastapi default", lambda r: json.dumps(jsonable_encoder(r)).encode()))
+    except ImportError:
+        print("⚠️ fastapi tidak terinstall, jalur FastAPI default dilewati")
+    paths.append(("json.dumps", lambda r: json.dumps(r.model_dump()).encode()))
+    paths.append(("model_dump_json", lambda r: encoding.encode(r, encoding.JSON)))
+    if encoding.msgpack is not None:
+        paths.append(("msgpack", lambda r: encoding.encode(r, encoding.MSGPACK)))
+    else:
+        print("⚠️ msgpack tidak terinstall, jalur msgpack dilewati (pip install msgpack)")
+    paths.append(("binary record", lambda r: encoding.encode(r, encoding.BINARY)))
+    return paths
+
+
+def benchmark_encode(paths, boxes: int, repeats: int):
+    """Serialisasi saja (response sudah dibangun)."""
+    print("=" * 60)
+    print(f"BENCHMARK 1: Serialize per Response ({boxes} box)")
+    print("=" * 60)
+
+    response = build_response(boxes)
+    print(f"   {'Encoding':<18}{'µs/response':>14}{'Bytes':>8}")
+    for name, fn in paths:
+        size = len(fn(response))
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn(response)
+        us = (time.perf_counter() - start) / repeats * 1e6
+        print(f"   {name:<18}{us:>14.2f}{size:>8}")
+
+
+def benchmark_build_and_encode(paths, boxes: int, repeats: int):
+    """Bangun objek pydantic + serialisasi, seperti satu request /detect."""
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK 2: Build + Serialize per Response ({boxes} box)")
+    print("=" * 60)
+
+    print(f"   {'Encoding':<18}{'µs/response':>14}")
+    for name, fn in paths:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn(build_response(boxes))
+        us = (time.perf_counter() - start) / repeats * 1e6
+        print(f"   {name:<18}{us:>14.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detect response serialization per encoding")
+    parser.add_argument("--boxes", type=int, default=1, help="Jumlah box per response (SIBI_TOP_K)")
+    parser.add_argument("--repeats", type=int, default=20000, help="Jumlah response per encoding")
+    args = parser.parse_args()
+
+    print("\n")
+    print("╔" + "═" * 58 + "╗")
+    print("║" + " SIBI SERIALIZATION BENCHMARK ".center(58) + "║")
+    print("╚" + "═" * 58 + "╝")
+    print()
+
+    paths = serializers()
+    benchmark_encode(paths, args.boxes, args.repeats)
+    benchmark_build_and_encode(paths, args.boxes, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
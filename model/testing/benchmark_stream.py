@@ -0,0 +1,116 @@
+"""
+Benchmark MJPEG Stream
+======================
+Membuka beberapa viewer ``/video_feed`` sekaligus ke stream server yang sedang
+berjalan dan mengukur fps yang diterima tiap viewer, lalu membandingkannya dengan
+``pipeline_fps``, ``subscribers`` dan ``latency_ms`` (capture -> tampil) dari
+``/status``. Karena semua viewer berbagi satu pipeline dan viewer tidak memakai
+thread server, fps per viewer seharusnya tidak turun saat jumlah viewer bertambah
+(juga di atas batas threadpool Starlette, 40 thread).
+
+Pastikan server berjalan dan kamera aktif::
+
+    python stream_server.py
+    curl -X POST http://localhost:8003/start_camera
+
+Cara menjalankan:
+    python benchmark_stream.py
+    python benchmark_stream.py --viewers 1 16 64 128 --seconds 5
+    python benchmark_stream.py --max-fps 10
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import requests
+except ImportError:
+    print("⚠️ Package 'requests' belum terinstall. Jalankan: pip install requests")
+    sys.exit(1)
+
+BASE_URL = "http://localhost:8003"
+BOUNDARY = b"--frame\r\n"
+
+
+def viewer(url: str, seconds: float, counts: list, index: int, ready: threading.Barrier):
+    """Read the MJPEG stream for ``seconds`` and count received frames."""
+    with requests.get(url, stream=True, timeout=10) as response:
+        ready.wait()
+        deadline = time.perf_counter() + seconds
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            counts[index] += chunk.count(BOUNDARY)
+            if time.perf_counter() >= deadline:
+                break
+
+
+def measure(base_url: str, viewers: int, seconds: float, max_fps: float = 0.0):
+    """Per-viewer fps plus the server's /status during the run."""
+    counts = [0] * viewers
+    ready = threading.Barrier(viewers + 1)
+    threads = [
+        threading.Thread(target=viewer, args=(f"{base_url}/video_feed?max_fps={max_fps}", seconds, counts, i, ready),
+                         daemon=True)
+        for i in range(viewers)
+    ]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    time.sleep(seconds / 2)
+    status = requests.get(f"{base_url}/status", timeout=5).json()
+    for thread in threads:
+        thread.join(seconds + 10)
+    fps = [count / seconds for count in counts]
+    return fps, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent MJPEG viewers of stream_server")
+    parser.add_argument("--url", default=BASE_URL, help="Base URL stream server")
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 2, 4, 8], help="Jumlah viewer per run")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Durasi per run")
+    parser.add_argument("--max-fps", type=float, default=0.0, help="?max_fps per viewer (0 = tanpa batas)")
+    args = parser.parse_args()
+
+    print("\n")
+    print("╔" + "═" * 58 + "╗")
+    print("║" + " SIBI STREAM BENCHMARK ".center(58) + "║")
+    print("╚" + "═" * 58 + "╝")
+    print()
+
+    try:
+        status = requests.get(f"{args.url}/status", timeout=5).json()
+    except requests.exceptions.ConnectionError:
+        print(f"❌ Stream server tidak berjalan di {args.url}")
+        return
+    if not status.get("camera_active"):
+        print("⚠️ Kamera belum aktif, yang diukur adalah frame 'Camera Off' (POST /start_camera)")
+
+    print("=" * 60)
+    print("BENCHMARK: Concurrent Viewers")
+    print("=" * 60)
+    print(f"   {'Viewers':>8}{'Min fps':>10}{'Mean fps':>10}{'Pipeline fps':>14}{'Subscribers':>13}"
+          f"{'Latency ms':>12}{'Dropped':>9}{'Throttled':>11}")
+    for n in args.viewers:
+        fps, status = measure(args.url, n, args.seconds, args.max_fps)
+        # Chunk yang dilewati viewer, dari /status: dropped = client lambat, throttled = jeda max_fps
+        clients = status.get("broadcast", {}).get("clients", [])
+        dropped = sum(client["dropped"] for client in clients)
+        throttled = sum(client["throttled"] for client in clients)
+        print(f"   {n:>8}{min(fps):>10.1f}{sum(fps) / n:>10.1f}"
+              f"{status.get('pipeline_fps', 0.0):>14.1f}{status.get('subscribers', 0):>13}"
+              f"{status.get('latency_ms', 0.0):>12.1f}{dropped:>9}{throttled:>11}")
+    print(f"\n   Stream {status.get('fps', 0.0):.1f} fps, inference {status.get('inference_fps', 0.0):.1f} fps")
+    capture = status.get("capture")
+    if capture:
+        print(f"   Capture: {capture['capture_fps']:.1f} fps, {capture['processed']} diproses, "
+              f"{capture['dropped']} frame terlewat (dropped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark Upload Formats
+========================
+Membandingkan jalur base64 JSON (/detect) dengan upload biner (/detect/upload):
+    - Bytes-on-the-wire per frame (body JSON vs JPEG mentah vs multipart)
+    - CPU server per frame untuk parse body + decode gambar (tanpa inference)
+    - Decode resolusi penuh vs reduced decode (DCT downscale ke imgsz) untuk frame 1080p
+    - (opsional) Round-trip ke server yang sedang berjalan dengan --url
+
+Cara menjalankan:
+    python benchmark_upload.py
+    python benchmark_upload.py --url http://localhost:8002
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import base64
+import io
+import json
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+from pydantic import BaseModel
+
+from imaging import decode_data_url, decode_image_bytes
+
+# Constants
+DATASET_PATH = Path(__file__).parent.parent.parent / "dataset" / "valid" / "images"
+MULTIPART_BOUNDARY = "----sibi-benchmark-boundary"
+
+
+class DetectRequest(BaseModel):
+    """Same body schema as ``detect_server.DetectRequest``."""
+    image: str
+
+
+def build_json_body(jpeg: bytes) -> bytes:
+    """Body /detect: JSON dengan data URL base64."""
+    data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()
+    return json.dumps({"image": data_url}).encode()
+
+
+def build_multipart_body(jpeg: bytes) -> bytes:
+    """Body /detect/upload (multipart) dengan field 'image'."""
+    return (
+        f"--{MULTIPART_BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="image"; filename="frame.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + jpeg + f"\r\n--{MULTIPART_BOUNDARY}--\r\n".encode()
+
+
+def server_cpu_base64(body: bytes) -> float:
+    """CPU time (s) untuk parse JSON + validasi pydantic + decode base64 + decode gambar."""
+    start = time.process_time()
+    req = DetectRequest.model_validate(json.loads(body))
+    decode_data_url(req.image)
+    return time.process_time() - start
+
+
+def server_cpu_raw(body: bytes) -> float:
+    """CPU time (s) untuk decode gambar langsung dari buffer request."""
+    start = time.process_time()
+    decode_image_bytes(body)
+    return time.process_time() - start
+
+
+def benchmark_local(images, repeats: int):
+    """Bandingkan ukuran payload dan CPU decode per frame."""
+    print("=" * 60)
+    print("BENCHMARK 1: Wire Size & Server CPU per Frame")
+    print("=" * 60)
+
+    wire = {"base64 JSON": 0, "raw JPEG": 0, "multipart": 0}
+    cpu = {"base64 JSON": 0.0, "raw JPEG": 0.0}
+
+    for img_path in images:
+        jpeg = img_path.read_bytes()
+        json_body = build_json_body(jpeg)
+
+        wire["base64 JSON"] += len(json_body)
+        wire["raw JPEG"] += len(jpeg)
+        wire["multipart"] += len(build_multipart_body(jpeg))
+
+        for _ in range(repeats):
+            cpu["base64 JSON"] += server_cpu_base64(json_body)
+            cpu["raw JPEG"] += server_cpu_raw(jpeg)
+
+    n = len(images)
+    print(f"   Frames: {n} (x{repeats} repeats untuk CPU)\n")
+    print(f"   {'Format':<14}{'Bytes/frame':>14}{'vs raw':>10}")
+    for name, total in wire.items():
+        ratio = total / wire["raw JPEG"]
+        print(f"   {name:<14}{total / n:>14,.0f}{ratio:>9.2f}x")
+
+    print(f"\n   {'Path':<14}{'CPU ms/frame':>14}")
+    for name, total in cpu.items():
+        print(f"   {name:<14}{total / (n * repeats) * 1000:>14.3f}")
+
+    saved = 1 - cpu["raw JPEG"] / cpu["base64 JSON"] if cpu["base64 JSON"] else 0
+    print(f"\n   ✅ Raw upload menghemat {saved:.0%} CPU decode per frame")
+
+
+def benchmark_reduced_decode(images, repeats: int, imgsz: int):
+    """Bandingkan decode penuh vs reduced decode pada frame 1080p (upscale dari dataset)."""
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK 2: Reduced Decode 1080p -> imgsz {imgsz}")
+    print("=" * 60)
+
+    frames = []
+    for img_path in images[:10]:
+        buffer = io.BytesIO()
+        Image.open(img_path).convert("RGB").resize((1920, 1080)).save(buffer, format="JPEG", quality=90)
+        frames.append(buffer.getvalue())
+
+    results = {}
+    for name, max_size in (("full", None), ("reduced", imgsz)):
+        cpu = 0.0
+        for _ in range(repeats):
+            for jpeg in frames:
+                start = time.process_time()
+                decoded = decode_image_bytes(jpeg, max_size)
+                cpu += time.process_time() - start
+        results[name] = (cpu / (len(frames) * repeats) * 1000, decoded.shape, decoded.nbytes)
+
+    print(f"   {'Decode':<10}{'CPU ms/frame':>14}{'Output shape':>18}{'Array MB':>10}")
+    for name, (ms, shape, nbytes) in results.items():
+        print(f"   {name:<10}{ms:>14.3f}{str(shape):>18}{nbytes / 1e6:>10.2f}")
+
+    speedup = results["full"][0] / results["reduced"][0] if results["reduced"][0] else 0
+    print(f"\n   ✅ Reduced decode {speedup:.1f}x lebih cepat")
+
+
+def benchmark_server(images, url: str):
+    """Round-trip end-to-end ke server yang berjalan (termasuk inference)."""
+    print("\n" + "=" * 60)
+    print("BENCHMARK 3: Round-trip ke Server")
+    print("=" * 60)
+
+    try:
+        import requests
+    except ImportError:
+        print("⚠️ Package 'requests' belum terinstall. Jalankan: pip install requests")
+        return
+
+    session = requests.Session()
+    timings = {"base64 JSON": [], "raw JPEG": []}
+
+    for img_path in images:
+        jpeg = img_path.read_bytes()
+        try:
+            start = time.perf_counter()
+            session.post(f"{url}/detect", data=build_json_body(jpeg),
+                         headers={"Content-Type": "application/json"}, timeout=30).raise_for_status()
+            timings["base64 JSON"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            session.post(f"{url}/detect/upload", data=jpeg,
+                         headers={"Content-Type": "image/jpeg"}, timeout=30).raise_for_status()
+            timings["raw JPEG"].append(time.perf_counter() - start)
+        except Exception as e:
+            print(f"   ❌ {img_path.name[:25]}... -> Error: {e}")
+            return
+
+    for name, values in timings.items():
+        avg = sum(values) / len(values) * 1000 if values else 0
+        print(f"   {name:<14} {avg:8.1f} ms/frame (n={len(values)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark base64 JSON vs binary frame upload")
+    parser.add_argument("--frames", type=int, default=50, help="Jumlah gambar dataset")
+    parser.add_argument("--repeats", type=int, default=5, help="Pengulangan decode per gambar")
+    parser.add_argument("--imgsz", type=int, default=640, help="Ukuran input model untuk reduced decode")
+    parser.add_argument("--url", default=None, help="Base URL server, mis. http://localhost:8002")
+    args = parser.parse_args()
+
+    print("\n")
+    print("╔" + "═" * 58 + "╗")
+    print("║" + " SIBI UPLOAD FORMAT BENCHMARK ".center(58) + "║")
+    print("╚" + "═" * 58 + "╝")
+    print()
+
+    if not DATASET_PATH.exists():
+        print(f"⚠️ Dataset tidak ditemukan di: {DATASET_PATH}")
+        return
+
+    images = sorted(DATASET_PATH.glob("*.jpg"))[:args.frames]
+    if not images:
+        print("⚠️ Tidak ada gambar di dataset")
+        return
+
+    benchmark_local(images, args.repeats)
+    benchmark_reduced_decode(images, args.repeats, args.imgsz)
+
+    if args.url:
+        benchmark_server(images, args.url.rstrip("/"))
+
+
+if __name__ == "__main__":
+    main()
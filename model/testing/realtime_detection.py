@@ -23,6 +23,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from ultralytics import YOLO
 
+from postprocess import as_detections, select
+
 # Constants
 MODEL_PATH = Path(__file__).parent.parent / "best.pt"
 CONFIDENCE_THRESHOLD = 0.3  # Minimum confidence untuk menampilkan deteksi
@@ -139,12 +141,12 @@ class SIBIDetector:
         cv2.putText(frame, help_text, (10, h - 15),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
     
-    def draw_detection(self, frame: np.ndarray, box, cls_idx: int, conf: float):
+    def draw_detection(self, frame: np.ndarray, xyxy, cls_idx: int, conf: float):
         """Draw bounding box with label on frame."""
         h, w = frame.shape[:2]
         
-        # Get box coordinates (xyxy format)
-        x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
+        # Box coordinates (xyxy format)
+        x1, y1, x2, y2 = map(int, xyxy)
         
         # Get class name from model
         letter = self.model.names.get(cls_idx, "?")
@@ -192,32 +194,25 @@ class SIBIDetector:
         # Draw info panel
         self.draw_info_panel(frame)
         
-        # Process detections
-        if results.boxes is not None and len(results.boxes) > 0:
-            # Filter by confidence threshold
-            boxes = results.boxes
-            confidences = boxes.conf.cpu().numpy()
+        # Process detections (sekali ke NumPy, filter threshold vectorized)
+        detections = as_detections(results)
+        if len(detections) > 0:
+            passed = select(detections, CONFIDENCE_THRESHOLD)
             
-            detected_this_frame = False
-            for i, conf in enumerate(confidences):
-                if conf >= CONFIDENCE_THRESHOLD:
-                    box = boxes[i]
-                    cls_idx = int(box.cls.item())
-                    
-                    # Draw detection
-                    letter, conf_val = self.draw_detection(frame, box, cls_idx, conf)
-                    detected_this_frame = True
-                    
-                    # Show detection info in top-right corner
-                    h, w = frame.shape[:2]
-                    info_text = f"Detected: {letter}"
-                    cv2.putText(frame, info_text, (w - 200, 90),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, GREEN, 2)
-                    conf_text = f"Confidence: {conf_val:.1%}"
-                    cv2.putText(frame, conf_text, (w - 200, 120),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
+            for xyxy, cls_idx, conf in zip(passed.xyxy.tolist(), passed.cls.tolist(), passed.conf.tolist()):
+                # Draw detection
+                letter, conf_val = self.draw_detection(frame, xyxy, cls_idx, conf)
+                
+                # Show detection info in top-right corner
+                h, w = frame.shape[:2]
+                info_text = f"Detected: {letter}"
+                cv2.putText(frame, info_text, (w - 200, 90),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, GREEN, 2)
+                conf_text = f"Confidence: {conf_val:.1%}"
+                cv2.putText(frame, conf_text, (w - 200, 120),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, WHITE, 1)
             
-            if detected_this_frame:
+            if len(passed) > 0:
                 self.detection_count += 1
         else:
             # No detection message
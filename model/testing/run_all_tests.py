@@ -7,10 +7,27 @@ Script utama untuk menjalankan semua test SIBI model.
 import sys
 from pathlib import Path
 import argparse
+import importlib
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Script unit test komponen server (tanpa model dan tanpa server)
+UNIT_TESTS = [
+    "test_batching",
+    "test_inference_pool",
+    "test_result_cache",
+    "test_motion_gate",
+    "test_roi_tracking",
+    "test_startup",
+    "test_prefork",
+    "test_metrics",
+    "test_event_log",
+    "test_broadcast",
+    "test_capture",
+    "test_box_track",
+]
+
 
 def print_header():
     print("\n")
@@ -63,6 +80,20 @@ def run_visualization():
     return {"Visualization": True}
 
 
+def run_unit_tests():
+    """Run unit tests that need neither the model nor a running server."""
+    print("\n" + "▓" * 70)
+    print(" SECTION 5: UNIT TESTS ".center(70, "▓"))
+    print("▓" * 70)
+
+    results = {}
+    for module_name in UNIT_TESTS:
+        module = importlib.import_module(module_name)
+        for test_name, passed in module.run_all_tests().items():
+            results[f"{module_name[len('test_'):]}: {test_name}"] = passed
+    return results
+
+
 def print_final_summary(all_results: dict):
     """Print final summary of all tests."""
     print("\n")
@@ -114,6 +145,7 @@ Examples:
   python run_all_tests.py --api        # Run only API tests
   python run_all_tests.py --dataset    # Run only dataset tests
   python run_all_tests.py --visualize  # Run only visualization
+  python run_all_tests.py --unit       # Run only unit tests (tanpa model/server)
         """
     )
     
@@ -121,12 +153,13 @@ Examples:
     parser.add_argument("--api", action="store_true", help="Run API tests only")
     parser.add_argument("--dataset", action="store_true", help="Run dataset tests only")
     parser.add_argument("--visualize", action="store_true", help="Run visualization only")
+    parser.add_argument("--unit", action="store_true", help="Run unit tests only")
     parser.add_argument("--no-viz", action="store_true", help="Skip visualization")
     
     args = parser.parse_args()
     
     # If no specific test selected, run all
-    run_all = not (args.model or args.api or args.dataset or args.visualize)
+    run_all = not (args.model or args.api or args.dataset or args.visualize or args.unit)
     
     print_header()
     
@@ -149,6 +182,10 @@ Examples:
         if (run_all and not args.no_viz) or args.visualize:
             all_results["Visualization"] = run_visualization()
         
+        # Unit tests
+        if run_all or args.unit:
+            all_results["Unit Tests"] = run_unit_tests()
+        
     except KeyboardInterrupt:
         print("\n\n⚠️ Testing interrupted by user")
         return
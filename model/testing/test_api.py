@@ -6,9 +6,12 @@ Script untuk menguji endpoint /detect dari server FastAPI.
 
 import sys
 from pathlib import Path
+import asyncio
 import base64
 import json
+import struct
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -26,6 +29,10 @@ import io
 
 # Constants
 API_URL = "http://localhost:8002/detect"
+UPLOAD_URL = "http://localhost:8002/detect/upload"
+BATCH_URL = "http://localhost:8002/detect/batch"
+WS_URL = "ws://localhost:8002/ws/detect"
+HEALTH_URL = "http://localhost:8002/health"
 DATASET_PATH = Path(__file__).parent.parent.parent / "dataset" / "valid" / "images"
 
 
@@ -200,6 +207,198 @@ def test_invalid_request():
     return all_passed
 
 
+def test_detect_upload_endpoint():
+    """Test /detect/upload dengan body JPEG mentah dan multipart."""
+    print("\n" + "=" * 60)
+    print("TEST 5: Detect Upload Endpoint (Binary Frame)")
+    print("=" * 60)
+    
+    images = list(DATASET_PATH.glob("*.jpg"))[:1] if DATASET_PATH.exists() else []
+    if not images:
+        print("⚠️ Tidak ada gambar di dataset")
+        return False
+    
+    jpeg = images[0].read_bytes()
+    base64_result = requests.post(API_URL, json={"image": image_to_base64(str(images[0]))}, timeout=30).json()
+    
+    test_cases = [
+        ("Raw image/jpeg", dict(data=jpeg, headers={"Content-Type": "image/jpeg"})),
+        ("Multipart", dict(files={"image": ("frame.jpg", jpeg, "image/jpeg")})),
+    ]
+    
+    all_passed = True
+    
+    for name, kwargs in test_cases:
+        try:
+            response = requests.post(UPLOAD_URL, timeout=30, **kwargs)
+            if response.status_code != 200:
+                print(f"   ❌ {name}: HTTP {response.status_code} - {response.text}")
+                all_passed = False
+                continue
+            
+            result = response.json()
+            same = result.get("letter") == base64_result.get("letter")
+            status = "✅" if same else "⚠️"
+            print(f"   {status} {name}: {result.get('letter', '-')} ({result.get('confidence', 0):.2%})"
+                  f" - {'sama' if same else 'berbeda'} dengan jalur base64")
+            all_passed = all_passed and same
+        except Exception as e:
+            print(f"   ❌ {name}: Error - {e}")
+            all_passed = False
+    
+    return all_passed
+
+
+def test_detect_batch_endpoint():
+    """Test /detect/batch dengan beberapa frame + satu frame rusak."""
+    print("\n" + "=" * 60)
+    print("TEST 6: Detect Batch Endpoint")
+    print("=" * 60)
+    
+    images = list(DATASET_PATH.glob("*.jpg"))[:4] if DATASET_PATH.exists() else []
+    if not images:
+        print("⚠️ Tidak ada gambar di dataset")
+        return False
+    
+    payload = [image_to_base64(str(p)) for p in images]
+    payload.insert(2, "not-a-valid-base64")
+    
+    try:
+        start_time = time.time()
+        response = requests.post(BATCH_URL, json={"images": payload}, timeout=60)
+        elapsed = time.time() - start_time
+        
+        if response.status_code != 200:
+            print(f"❌ Request gagal dengan status: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+        
+        result = response.json()
+        items = result.get("results", [])
+        print(f"✅ Request berhasil! ({len(payload)} frame dalam {elapsed:.2f}s)")
+        for item in items:
+            if item.get("error"):
+                print(f"   ⚠️ [{item['index']}] Error: {item['error']}")
+            else:
+                res = item.get("result") or {}
+                print(f"   ✅ [{item['index']}] {res.get('letter', '-')} ({res.get('confidence', 0):.2%})")
+        
+        in_order = [item.get("index") for item in items] == list(range(len(payload)))
+        partial = result.get("failed") == 1 and result.get("succeeded") == len(images)
+        return in_order and partial
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
+def test_websocket_detect():
+    """Test /ws/detect: kirim frame pipelined, bandingkan round-trip dengan REST."""
+    print("\n" + "=" * 60)
+    print("TEST 7: WebSocket Detect (Pipelined Frames)")
+    print("=" * 60)
+    
+    try:
+        import websockets
+    except ImportError:
+        print("⚠️ Package 'websockets' belum terinstall. Jalankan: pip install websockets")
+        return False
+    
+    images = list(DATASET_PATH.glob("*.jpg"))[:10] if DATASET_PATH.exists() else []
+    if not images:
+        print("⚠️ Tidak ada gambar di dataset")
+        return False
+    
+    jpegs = [p.read_bytes() for p in images]
+    
+    async def run_ws():
+        sent_at = {}
+        rtts = []
+        results = []
+        async with websockets.connect(WS_URL) as ws:
+            # Frame teks harus dijawab error JSON tanpa menutup koneksi
+            await ws.send("not a binary frame")
+            error = json.loads(await ws.recv())
+            if error.get("id") is not None or "error" not in error:
+                raise AssertionError(f"Unexpected reply to text frame: {error}")
+            print(f"   ✅ Frame teks ditolak: {error['error']}")
+            for frame_id, jpeg in enumerate(jpegs):
+                sent_at[frame_id] = time.perf_counter()
+                await ws.send(struct.pack(">I", frame_id) + jpeg)
+            for _ in jpegs:
+                result = json.loads(await ws.recv())
+                results.append(result)
+                if result.get("id") in sent_at:
+                    rtts.append(time.perf_counter() - sent_at[result["id"]])
+                if "error" in result:
+                    print(f"   ❌ Frame {result['id']}: {result['error']}")
+        return rtts, results
+    
+    try:
+        ws_rtts, ws_results = asyncio.run(run_ws())
+        errors = [r for r in ws_results if "error" in r]
+        ids = sorted(r.get("id") for r in ws_results if r.get("id") is not None)
+        if errors or ids != list(range(len(jpegs))):
+            print(f"❌ {len(errors)} frame error, {len(ids)}/{len(jpegs)} hasil dengan id yang benar")
+            return False
+        
+        rest_rtts = []
+        for jpeg in jpegs:
+            start_time = time.perf_counter()
+            requests.post(UPLOAD_URL, data=jpeg, headers={"Content-Type": "image/jpeg"}, timeout=30)
+            rest_rtts.append(time.perf_counter() - start_time)
+        
+        print(f"✅ {len(ws_results)}/{len(jpegs)} hasil diterima lewat WebSocket, tanpa error")
+        print(f"   Rata-rata round-trip WebSocket: {sum(ws_rtts) / len(ws_rtts):.3f}s")
+        print(f"   Rata-rata round-trip REST:      {sum(rest_rtts) / len(rest_rtts):.3f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
+def test_latest_frame_wins():
+    """Test latest-frame-wins untuk satu sesi saat result cache aktif."""
+    print("\n" + "=" * 60)
+    print("TEST 8: Latest-Frame-Wins (Result Cache On)")
+    print("=" * 60)
+    
+    images = list(DATASET_PATH.glob("*.jpg"))[:8] if DATASET_PATH.exists() else []
+    if len(images) < 3:
+        print("⚠️ Tidak cukup gambar di dataset")
+        return False
+    
+    try:
+        health = requests.get(HEALTH_URL, timeout=5).json()
+        if not health["cache"]["enabled"]:
+            print("⚠️ Result cache nonaktif (SIBI_CACHE_MB=0); test ini butuh cache aktif")
+            return False
+        before = health["batching"]["superseded"] + health["roi_tracking"]["batching"]["superseded"]
+        
+        # Frame berbeda dari satu sesi, dikirim bersamaan: frame lama yang masih
+        # antre harus digantikan frame terbaru (dijawab stale, tanpa inference)
+        session_id = f"lfw-{time.time_ns()}"
+        payloads = [{"image": image_to_base64(str(p)), "session_id": session_id} for p in images]
+        with ThreadPoolExecutor(max_workers=len(payloads)) as executor:
+            responses = list(executor.map(lambda body: requests.post(API_URL, json=body, timeout=60), payloads))
+        
+        health = requests.get(HEALTH_URL, timeout=5).json()
+        superseded = health["batching"]["superseded"] + health["roi_tracking"]["batching"]["superseded"] - before
+        stale = sum(1 for r in responses if r.status_code == 200 and r.json().get("stale"))
+        ok = all(r.status_code == 200 for r in responses)
+        
+        print(f"   Frame terkirim: {len(payloads)}, superseded: {superseded}, respons stale: {stale}")
+        if not ok:
+            print(f"❌ Ada request gagal: {[r.status_code for r in responses]}")
+        elif superseded == 0:
+            print("❌ Tidak ada frame yang digantikan (key sesi tidak sampai ke batcher?)")
+        else:
+            print("✅ Frame lama digantikan frame terbaru")
+        return ok and superseded > 0 and stale >= 1
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
 def run_all_tests():
     """Jalankan semua API tests."""
     print("\n")
@@ -226,6 +425,18 @@ def run_all_tests():
     # Test 4: Invalid requests
     results["Invalid Handling"] = test_invalid_request()
     
+    # Test 5: Binary upload
+    results["Detect (Upload)"] = test_detect_upload_endpoint()
+    
+    # Test 6: Batch endpoint
+    results["Detect (Batch)"] = test_detect_batch_endpoint()
+    
+    # Test 7: WebSocket channel
+    results["WebSocket Detect"] = test_websocket_detect()
+    
+    # Test 8: Latest-frame-wins dengan result cache aktif
+    results["Latest Frame Wins"] = test_latest_frame_wins()
+    
     # Summary
     print("\n" + "=" * 60)
     print("SUMMARY")
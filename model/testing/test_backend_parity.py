@@ -0,0 +1,168 @@
+"""
+Test Backend Parity (PyTorch vs ONNX Runtime / Traced Engine)
+=============================================================
+Script untuk memastikan backend ONNX (``SIBI_BACKEND=onnx``) atau traced engine
+(``SIBI_BACKEND=engine``) memberi hasil yang sama dengan jalur PyTorch pada
+gambar ``dataset/valid``:
+    - Export ``best.pt`` -> ``best.onnx`` (atau pakai cache yang sudah ada) / trace engine
+    - Deteksi terbaik per gambar: kelas sama, IoU box >= 0.9, selisih confidence kecil
+    - Perbandingan latency per frame kedua backend
+
+Cara menjalankan:
+    python test_backend_parity.py
+    python test_backend_parity.py --frames 100
+    python test_backend_parity.py --backend engine
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+from backends import export_onnx, load_backend
+from postprocess import as_detections
+
+# Constants
+MODEL_PATH = Path(__file__).parent.parent / "best.pt"
+DATASET_PATH = Path(__file__).parent.parent.parent / "dataset" / "valid" / "images"
+MIN_IOU = 0.9
+MAX_CONF_DIFF = 0.05
+MIN_MATCH_RATE = 0.95
+
+
+def best_detection(result):
+    """Best detection as (cls_idx, conf, xywhn) - the fields used for ``DetectResponse``."""
+    detections = as_detections(result)
+    if len(detections) == 0:
+        return None
+    return int(detections.cls[0]), float(detections.conf[0]), detections.xywhn()[0].tolist()
+
+
+def box_iou(a, b) -> float:
+    """IoU of two normalized (cx, cy, w, h) boxes."""
+    ax1, ay1, ax2, ay2 = a[0] - a[2] / 2, a[1] - a[3] / 2, a[0] + a[2] / 2, a[1] + a[3] / 2
+    bx1, by1, bx2, by2 = b[0] - b[2] / 2, b[1] - b[3] / 2, b[0] + b[2] / 2, b[1] + b[3] / 2
+    iw = max(0.0, min(ax2, bx2) - max(ax1, bx1))
+    ih = max(0.0, min(ay2, by2) - max(ay1, by1))
+    inter = iw * ih
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def test_backend_load(backend: str):
+    """Test export ONNX / trace engine dan load backend."""
+    print("=" * 60)
+    print(f"TEST 1: {backend} Export & Load")
+    print("=" * 60)
+
+    try:
+        model = load_backend(MODEL_PATH, backend=backend)
+        if backend == "onnx":
+            onnx_file = export_onnx(MODEL_PATH)
+            print(f"✅ ONNX model siap: {onnx_file} ({onnx_file.stat().st_size / 1e6:.1f} MB)")
+        else:
+            print(f"✅ Backend {backend} siap")
+        print(f"   Kelas: {len(model.names)}, imgsz: {model.overrides['imgsz']}")
+        return model
+    except ImportError as e:
+        print(f"⚠️ Dependency backend {backend} belum terinstall: {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Gagal export/load {backend}: {e}")
+        return None
+
+
+def test_detection_parity(torch_model, other_model, images, backend: str = "onnx"):
+    """Bandingkan deteksi terbaik per gambar antara kedua backend."""
+    print("\n" + "=" * 60)
+    print("TEST 2: Detection Parity (dataset/valid)")
+    print("=" * 60)
+
+    matches = 0
+    for img_path in images:
+        frame = cv2.imread(str(img_path))
+        expected = best_detection(torch_model(frame, verbose=False)[0])
+        actual = best_detection(other_model(frame, verbose=False)[0])
+
+        if expected is None or actual is None:
+            ok = expected is None and actual is None
+            detail = f"torch={expected is not None}, {backend}={actual is not None}"
+        else:
+            iou = box_iou(expected[2], actual[2])
+            conf_diff = abs(expected[1] - actual[1])
+            ok = expected[0] == actual[0] and iou >= MIN_IOU and conf_diff <= MAX_CONF_DIFF
+            detail = f"cls {expected[0]}/{actual[0]}, IoU {iou:.3f}, Δconf {conf_diff:.3f}"
+
+        matches += ok
+        if not ok:
+            print(f"   ❌ {img_path.name[:30]}... -> {detail}")
+
+    rate = matches / len(images)
+    print(f"\n   Hasil: {matches}/{len(images)} gambar cocok ({rate:.1%})")
+    return rate >= MIN_MATCH_RATE
+
+
+def test_latency(torch_model, other_model, images, backend: str = "onnx"):
+    """Bandingkan latency per frame (setelah warm-up)."""
+    print("\n" + "=" * 60)
+    print("TEST 3: Latency per Frame")
+    print("=" * 60)
+
+    frames = [cv2.imread(str(p)) for p in images]
+    for name, model in (("torch", torch_model), (backend, other_model)):
+        model(frames[0], verbose=False)
+        start = time.perf_counter()
+        for frame in frames:
+            model(frame, verbose=False)
+        ms = (time.perf_counter() - start) / len(frames) * 1000
+        print(f"   {name:<6} {ms:8.1f} ms/frame")
+    return True
+
+
+def run_all_tests(frames: int = 50, backend: str = "onnx"):
+    """Jalankan semua test."""
+    print("\n")
+    print("╔" + "═" * 58 + "╗")
+    print("║" + " SIBI BACKEND PARITY TESTING ".center(58) + "║")
+    print("╚" + "═" * 58 + "╝")
+    print()
+
+    results = {}
+
+    other_model = test_backend_load(backend)
+    results[f"{backend} Export"] = other_model is not None
+    if other_model is None:
+        return results
+
+    images = sorted(DATASET_PATH.glob("*.jpg"))[:frames]
+    if not images:
+        print(f"⚠️ Tidak ada gambar di dataset: {DATASET_PATH}")
+        return results
+
+    torch_model = load_backend(MODEL_PATH, backend="torch")
+    results["Detection Parity"] = test_detection_parity(torch_model, other_model, images, backend)
+    results["Latency"] = test_latency(torch_model, other_model, images, backend)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"   {test_name}: {status}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the PyTorch backend with ONNX Runtime or the traced engine")
+    parser.add_argument("--frames", type=int, default=50, help="Jumlah gambar dataset")
+    parser.add_argument("--backend", choices=["onnx", "engine"], default="onnx", help="Backend pembanding")
+    args = parser.parse_args()
+    run_all_tests(args.frames, args.backend)
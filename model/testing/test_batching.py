@@ -0,0 +1,311 @@
+"""
+Test Micro-Batching
+===================
+Unit test untuk ``batching.MicroBatcher`` tanpa model dan tanpa server:
+``infer_fn`` palsu (``Gated``) mencatat setiap batch dan bisa ditahan, sehingga
+jalur collect batch, admission, deadline, latest-frame-wins, dan pembatalan
+saat client pergi bisa diuji langsung.
+
+Cara menjalankan:
+    python test_batching.py
+"""
+
+import sys
+from pathlib import Path
+import asyncio
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from batching import FrameExpired, FrameSuperseded, MicroBatcher, QueueFull
+from unit_helpers import Gated, main, outcome, run_tests, settle
+
+
+def times_ten(images):
+    return [image * 10 for image in images]
+
+
+def batches(infer: Gated) -> list:
+    """Images of every batch passed to the fake ``infer_fn``."""
+    return [list(images) for images, in infer.calls]
+
+
+async def test_collect_into_one_batch():
+    """Frame bersamaan masuk satu batch; setiap caller menerima hasilnya sendiri."""
+    infer = Gated(times_ten, open_gate=True)
+    batcher = MicroBatcher(infer, max_batch_size=4, max_wait_ms=50)
+    try:
+        outputs = await asyncio.gather(*(batcher.submit(i) for i in range(1, 5)))
+        stats = batcher.stats()
+    finally:
+        await batcher.stop()
+
+    print(f"   Batches: {batches(infer)}")
+    print(f"   Outputs: {outputs}")
+    assert batches(infer) == [[1, 2, 3, 4]], "4 frame bersamaan harus masuk satu batch"
+    assert outputs == [10, 20, 30, 40], "setiap caller harus menerima hasilnya sendiri"
+    assert stats["batch_size_histogram"] == {4: 1}
+
+
+async def test_max_batch_size():
+    """Frame melebihi ``max_batch_size`` dipecah ke batch berikutnya."""
+    infer = Gated(times_ten, open_gate=True)
+    batcher = MicroBatcher(infer, max_batch_size=4, max_wait_ms=50)
+    try:
+        outputs = await asyncio.gather(*(batcher.submit(i) for i in range(1, 7)))
+        stats = batcher.stats()
+    finally:
+        await batcher.stop()
+
+    print(f"   Batches: {batches(infer)}")
+    assert batches(infer) == [[1, 2, 3, 4], [5, 6]]
+    assert outputs == [10, 20, 30, 40, 50, 60]
+    assert stats["batches"] == 2 and stats["frames"] == 6
+
+
+async def test_max_wait_window():
+    """Frame yang datang setelah window ``max_wait_ms`` tidak menahan batch sebelumnya."""
+    infer = Gated(times_ten, open_gate=True)
+    batcher = MicroBatcher(infer, max_batch_size=4, max_wait_ms=20)
+    try:
+        first = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.1)
+        assert first.done(), "batch harus berjalan setelah max_wait_ms walau belum penuh"
+        second = await batcher.submit(2)
+    finally:
+        await batcher.stop()
+
+    print(f"   Batches: {batches(infer)}")
+    assert batches(infer) == [[1], [2]]
+    assert first.result() == 10 and second == 20
+
+
+async def test_inference_error():
+    """Error inference diteruskan ke setiap caller dalam batch, batch berikutnya tetap jalan."""
+    failing = Gated(error=RuntimeError("model error"), open_gate=True)
+    batcher = MicroBatcher(failing, max_batch_size=4, max_wait_ms=20)
+    try:
+        results = await asyncio.gather(*(batcher.submit(i) for i in (1, 2)), return_exceptions=True)
+        failing.error, failing.result = None, times_ten
+        after = await batcher.submit(3)
+    finally:
+        await batcher.stop()
+
+    print(f"   Hasil batch gagal: {[outcome(r) for r in results]}, batch berikutnya: {after}")
+    assert all(isinstance(r, RuntimeError) for r in results), "setiap caller harus menerima error inference"
+    assert after == 30
+
+
+async def test_stop_fails_queued():
+    """``stop`` menggagalkan frame yang masih antre, tidak menggantung selamanya."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=1, max_wait_ms=0)
+    running = asyncio.ensure_future(batcher.submit(1))
+    await settle()
+    queued = asyncio.ensure_future(batcher.submit(2))
+    await settle()
+    infer.open()
+    await batcher.stop()
+
+    results = await asyncio.gather(running, queued, return_exceptions=True)
+    print(f"   Hasil setelah stop: {[outcome(r) for r in results]}")
+    assert results[0] == 10, "batch yang sedang berjalan harus selesai"
+    assert isinstance(results[1], RuntimeError), "frame yang masih antre harus digagalkan"
+
+
+async def test_worker_concurrency():
+    """Batch berjalan paralel sampai ``concurrency`` worker, sisanya menunggu worker kosong."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=1, max_wait_ms=0, concurrency=2)
+    try:
+        callers = [asyncio.ensure_future(batcher.submit(i)) for i in (1, 2, 3)]
+        await settle()
+        running = len(infer.calls)
+        infer.open()
+        outputs = await asyncio.gather(*callers)
+    finally:
+        await batcher.stop()
+
+    print(f"   Batch berjalan bersamaan: {running}, total batch: {len(infer.calls)}")
+    assert running == 2, "hanya `concurrency` batch yang boleh berjalan bersamaan"
+    assert outputs == [10, 20, 30]
+
+
+async def test_queue_full():
+    """Frame di atas ``max_pending`` ditolak dengan ``QueueFull`` berisi Retry-After."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=1, max_wait_ms=0, max_pending=2)
+    try:
+        admitted = [asyncio.ensure_future(batcher.submit(i)) for i in (1, 2)]
+        await settle()
+        try:
+            await batcher.submit(3)
+            raise AssertionError("frame ketiga seharusnya ditolak")
+        except QueueFull as e:
+            print(f"   Frame ketiga ditolak: {e} (retry_after={e.retry_after})")
+            assert e.retry_after >= 1
+
+        try:
+            await batcher.submit_batch([4, 5])
+            raise AssertionError("batch client seharusnya ditolak")
+        except QueueFull:
+            print("   Batch client ditolak selama antrean penuh")
+        infer.open()
+        assert await asyncio.gather(*admitted) == [10, 20]
+        stats = batcher.stats()
+    finally:
+        await batcher.stop()
+
+    assert stats["rejected"] == 3
+    assert stats["pending"] == 0, "slot admission harus dikembalikan setelah frame selesai"
+
+
+async def test_deadline_expiry():
+    """Frame yang deadline-nya lewat (di antrean atau saat submit) tidak di-inference."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=1, max_wait_ms=0)
+    try:
+        # Frame pertama menahan satu-satunya worker
+        first = asyncio.ensure_future(batcher.submit(1))
+        await settle()
+        late = asyncio.ensure_future(batcher.submit(2, deadline=time.monotonic() + 0.02))
+        await asyncio.sleep(0.05)
+        infer.open()
+        results = await asyncio.gather(first, late, return_exceptions=True)
+        try:
+            await batcher.submit(3, deadline=time.monotonic() - 1)
+            raise AssertionError("frame yang deadline-nya sudah lewat seharusnya ditolak")
+        except FrameExpired:
+            print("   Deadline sudah lewat saat submit: FrameExpired")
+        stats = batcher.stats()
+    finally:
+        await batcher.stop()
+
+    print(f"   Batches: {batches(infer)}, hasil: {[outcome(r) for r in results]}, expired: {stats['expired']}")
+    assert results[0] == 10 and isinstance(results[1], FrameExpired)
+    assert batches(infer) == [[1]], "frame kedaluwarsa tidak boleh di-inference"
+    assert stats["expired"] == 2
+
+
+async def test_latest_frame_wins():
+    """Frame baru dari sesi yang sama menggantikan frame lama yang masih antre."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=4, max_wait_ms=0)
+    try:
+        busy = asyncio.ensure_future(batcher.submit(1))
+        await settle()
+        old = asyncio.ensure_future(batcher.submit(2, key="session-a"))
+        other = asyncio.ensure_future(batcher.submit(3, key="session-b"))
+        await settle()
+        new = asyncio.ensure_future(batcher.submit(4, key="session-a"))
+        await settle()
+        infer.open()
+        results = await asyncio.gather(busy, old, other, new, return_exceptions=True)
+        stats = batcher.stats()
+    finally:
+        await batcher.stop()
+
+    print(f"   Batches: {batches(infer)}")
+    print(f"   Hasil: {[outcome(r) for r in results]}")
+    assert isinstance(results[1], FrameSuperseded), "frame lama dari sesi yang sama harus digantikan"
+    assert results[2] == 30 and results[3] == 40, "sesi lain tidak terpengaruh"
+    assert all(2 not in batch for batch in batches(infer)), "frame yang digantikan tidak boleh di-inference"
+    assert stats["superseded"] == 1
+
+
+async def test_supersede_only_when_admitted():
+    """Frame baru yang ditolak ``QueueFull`` tidak membuang frame lama sesi yang sama."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=1, max_wait_ms=0, max_pending=2)
+    try:
+        busy = asyncio.ensure_future(batcher.submit(1))
+        await settle()
+        old = asyncio.ensure_future(batcher.submit(2, key="session-a"))
+        await settle()
+        try:
+            await batcher.submit(3, key="session-a")
+            raise AssertionError("frame ketiga seharusnya ditolak")
+        except QueueFull:
+            print("   Frame baru ditolak: antrean penuh")
+        infer.open()
+        results = await asyncio.gather(busy, old, return_exceptions=True)
+        stats = batcher.stats()
+    finally:
+        await batcher.stop()
+
+    print(f"   Hasil: {[outcome(r) for r in results]}, rejected={stats['rejected']}, superseded={stats['superseded']}")
+    assert results == [10, 20], "frame lama tetap di-inference jika frame baru ditolak"
+    assert stats["rejected"] == 1 and stats["superseded"] == 0
+
+
+async def test_cancel_queued_frame():
+    """Frame yang client-nya pergi selagi antre tidak ikut batch."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=4, max_wait_ms=0)
+    try:
+        busy = asyncio.ensure_future(batcher.submit(1))
+        await settle()
+        gone = asyncio.ensure_future(batcher.submit(2))
+        kept = asyncio.ensure_future(batcher.submit(3))
+        await settle()
+        gone.cancel()
+        await settle()
+        infer.open()
+        outputs = await asyncio.gather(busy, kept)
+        stats = batcher.stats()
+    finally:
+        await batcher.stop()
+
+    print(f"   Batches: {batches(infer)}, cancelled: {stats['cancelled']}")
+    assert outputs == [10, 30]
+    assert all(2 not in batch for batch in batches(infer)), "frame client yang pergi tidak boleh di-inference"
+    assert stats["cancelled"] == 1 and stats["pending"] == 0
+
+
+async def test_abandon_running_batch():
+    """Semua caller batch pergi: job inference dibatalkan dan worker bebas lagi."""
+    infer = Gated(times_ten)
+    batcher = MicroBatcher(infer, max_batch_size=2, max_wait_ms=20)
+    try:
+        callers = [asyncio.ensure_future(batcher.submit(i)) for i in (1, 2)]
+        await settle()
+        callers[0].cancel()
+        await settle()
+        one_left = infer.cancelled
+        callers[1].cancel()
+        await settle()
+        stats = batcher.stats()
+
+        # Worker harus bebas lagi untuk frame berikutnya
+        infer.open()
+        assert await asyncio.wait_for(batcher.submit(5), 1.0) == 50
+    finally:
+        await batcher.stop()
+
+    print(f"   Job dibatalkan (1 caller pergi): {one_left}, (semua pergi): {infer.cancelled}, abandoned: {stats['abandoned']}")
+    assert one_left == 0, "job tetap berjalan selama masih ada caller yang menunggu"
+    assert infer.cancelled == 1, "job harus dibatalkan jika semua caller batch pergi"
+    assert stats["abandoned"] == 2
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI MICRO-BATCHING TESTING", [
+        ("Collect Into One Batch", test_collect_into_one_batch),
+        ("Max Batch Size", test_max_batch_size),
+        ("Max Wait Window", test_max_wait_window),
+        ("Inference Error", test_inference_error),
+        ("Stop Fails Queued", test_stop_fails_queued),
+        ("Worker Concurrency", test_worker_concurrency),
+        ("Queue Full", test_queue_full),
+        ("Deadline Expiry", test_deadline_expiry),
+        ("Latest Frame Wins", test_latest_frame_wins),
+        ("Supersede Only When Admitted", test_supersede_only_when_admitted),
+        ("Cancel Queued Frame", test_cancel_queued_frame),
+        ("Abandon Running Batch", test_abandon_running_batch),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
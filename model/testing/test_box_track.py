@@ -0,0 +1,118 @@
+"""
+Test Box Carry-Forward
+======================
+Unit test untuk ``box_track.BoxTrack`` tanpa kamera dan tanpa model: box
+terakhir dipakai lagi di frame tanpa inference, ekstrapolasi linear dari dua
+deteksi terakhir (dibatasi satu interval inference), box dibuang setelah
+``hold_s``, hasil inference yang datang terlambat diabaikan, dan ``None``
+(tangan hilang) menghapus box.
+
+Cara menjalankan:
+    python test_box_track.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from box_track import BoxTrack
+from unit_helpers import main, run_tests
+
+
+def rounded(prediction):
+    """(xyxy, cls, conf) with coordinates rounded, for exact comparisons."""
+    if prediction is None:
+        return None
+    xyxy, cls_idx, conf = prediction
+    return tuple(round(v, 6) for v in xyxy), cls_idx, conf
+
+
+def test_carry_forward():
+    """Tanpa ekstrapolasi, box terakhir digambar apa adanya di frame berikutnya."""
+    track = BoxTrack(extrapolate=False, hold_s=0.5)
+    before = track.predict(1.0)
+    track.update(1.0, ((10, 10, 50, 50), 3, 0.9))
+    track.update(1.1, ((20, 10, 60, 50), 3, 0.8))
+    same_frame = track.predict(1.1)
+    later = track.predict(1.2)
+    stats = track.stats()
+
+    print(f"   Sebelum deteksi: {before}, frame sama: {rounded(same_frame)}, frame berikutnya: {rounded(later)}")
+    assert before is None
+    assert rounded(same_frame) == ((20.0, 10.0, 60.0, 50.0), 3, 0.8)
+    assert rounded(later) == ((20.0, 10.0, 60.0, 50.0), 3, 0.8), "box terakhir dipakai lagi"
+    assert stats["carried"] == 1 and stats["extrapolated"] == 0 and stats["updates"] == 2
+
+
+def test_linear_extrapolation():
+    """Box bergerak mengikuti kecepatan dua deteksi terakhir, maksimum satu interval ke depan."""
+    track = BoxTrack(extrapolate=True, hold_s=0.5)
+    track.update(1.0, ((10, 10, 50, 50), 3, 0.9))
+    track.update(1.1, ((20, 10, 60, 50), 3, 0.9))
+    half = track.predict(1.15)
+    one = track.predict(1.2)
+    capped = track.predict(1.4)
+
+    print(f"   +0.05 s: {rounded(half)[0]}, +0.1 s: {rounded(one)[0]}, +0.3 s (dibatasi): {rounded(capped)[0]}")
+    assert rounded(half)[0] == (25.0, 10.0, 65.0, 50.0)
+    assert rounded(one)[0] == (30.0, 10.0, 70.0, 50.0)
+    assert rounded(capped)[0] == (30.0, 10.0, 70.0, 50.0), "ekstrapolasi maksimum satu interval inference"
+    assert track.stats()["extrapolated"] == 3
+
+
+def test_class_change_not_extrapolated():
+    """Deteksi terakhir kelas lain: tidak diekstrapolasi, hanya carry-forward."""
+    track = BoxTrack(extrapolate=True, hold_s=0.5)
+    track.update(1.0, ((10, 10, 50, 50), 3, 0.9))
+    track.update(1.1, ((20, 10, 60, 50), 4, 0.9))
+    prediction = track.predict(1.2)
+
+    print(f"   Kelas 3 -> 4: {rounded(prediction)}")
+    assert rounded(prediction) == ((20.0, 10.0, 60.0, 50.0), 4, 0.9)
+    assert track.stats()["carried"] == 1 and track.stats()["extrapolated"] == 0
+
+
+def test_hold_expiry():
+    """Box tidak digambar lagi jika deteksi terakhir lebih tua dari ``hold_s``."""
+    track = BoxTrack(extrapolate=True, hold_s=0.5)
+    track.update(1.0, ((10, 10, 50, 50), 3, 0.9))
+    held = track.predict(1.5)
+    expired = track.predict(1.51)
+
+    print(f"   Umur 0.5 s: {rounded(held)}, umur 0.51 s: {expired}")
+    assert held is not None and expired is None
+
+
+def test_out_of_order_and_clear():
+    """Hasil inference untuk frame yang lebih lama diabaikan; ``None`` menghapus box."""
+    track = BoxTrack(extrapolate=True, hold_s=0.5)
+    track.update(1.1, ((20, 10, 60, 50), 3, 0.9))
+    track.update(1.0, ((500, 500, 600, 600), 7, 0.99))
+    kept = track.predict(1.1)
+    track.update(1.2, None)
+    cleared = track.predict(1.2)
+    track.update(1.3, ((30, 10, 70, 50), 3, 0.9))
+    fresh = track.predict(1.4)
+
+    print(f"   Setelah update terlambat: {rounded(kept)}, setelah None: {cleared}, deteksi baru: {rounded(fresh)}")
+    assert rounded(kept) == ((20.0, 10.0, 60.0, 50.0), 3, 0.9), "hasil frame lama tidak boleh menimpa box"
+    assert cleared is None, "tangan hilang: box dihapus"
+    assert rounded(fresh) == ((30.0, 10.0, 70.0, 50.0), 3, 0.9), "tanpa deteksi sebelumnya tidak ada ekstrapolasi"
+    assert track.stats()["updates"] == 4
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI BOX CARRY-FORWARD TESTING", [
+        ("Carry Forward", test_carry_forward),
+        ("Linear Extrapolation", test_linear_extrapolation),
+        ("Class Change Not Extrapolated", test_class_change_not_extrapolated),
+        ("Hold Expiry", test_hold_expiry),
+        ("Out-of-order & Clear", test_out_of_order_and_clear),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
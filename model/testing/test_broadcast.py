@@ -0,0 +1,202 @@
+"""
+Test Frame Broadcast
+====================
+Unit test untuk ``broadcast.FrameHub`` tanpa kamera dan tanpa server: fan-out
+satu chunk ke beberapa viewer, penghitungan chunk terlewat per viewer
+(``dropped`` untuk viewer lambat, ``throttled`` untuk jeda ``max_fps``), publish
+dari thread producer, banyak viewer di event loop tanpa thread tambahan,
+timeout dan close.
+
+Cara menjalankan:
+    python test_broadcast.py
+"""
+
+import sys
+from pathlib import Path
+import asyncio
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from broadcast import FrameHub
+from unit_helpers import main, run_tests
+
+
+def chunk_seq(chunk: bytes) -> int:
+    return int(chunk.split(b"-")[1])
+
+
+async def test_fan_out():
+    """Satu publish diterima semua viewer (chunk yang sama, tanpa encode ulang)."""
+    hub = FrameHub()
+    viewers = [hub.subscribe(client=f"viewer-{i}") for i in range(3)]
+    waiting = [asyncio.ensure_future(hub.next(viewer, timeout=1.0)) for viewer in viewers]
+    await asyncio.sleep(0.01)
+    hub.publish(b"chunk-1")
+    chunks = await asyncio.gather(*waiting)
+    stats = hub.stats()
+
+    print(f"   Chunks: {chunks}")
+    print(f"   Published: {stats['published']}, delivered: {stats['delivered']}")
+    assert chunks == [b"chunk-1"] * 3, "setiap viewer harus menerima chunk yang sama"
+    assert all(chunk is chunks[0] for chunk in chunks), "chunk tidak disalin per viewer"
+    assert stats["published"] == 1 and stats["delivered"] == 3
+    assert stats["subscribers"] == 3 and [c["client"] for c in stats["clients"]] == ["viewer-0", "viewer-1", "viewer-2"]
+
+
+async def test_slow_viewer_dropped():
+    """Viewer lambat lompat ke chunk terbaru; chunk yang terlewat dihitung ``dropped``."""
+    hub = FrameHub()
+    fast = hub.subscribe(client="fast")
+    slow = hub.subscribe(client="slow")
+
+    for seq in range(1, 5):
+        hub.publish(f"chunk-{seq}".encode())
+        # Viewer cepat mengambil setiap chunk, viewer lambat hanya yang pertama
+        assert await hub.next(fast, timeout=1.0) == f"chunk-{seq}".encode()
+        if seq == 1:
+            assert await hub.next(slow, timeout=1.0) == b"chunk-1"
+
+    # Viewer lambat selesai mengirim: langsung lompat ke chunk terbaru
+    latest = await hub.next(slow, timeout=1.0)
+    fast_stats, slow_stats = fast.stats(), slow.stats()
+
+    print(f"   Viewer lambat menerima: {latest}")
+    print(f"   fast: dropped={fast_stats['dropped']}, throttled={fast_stats['throttled']}")
+    print(f"   slow: dropped={slow_stats['dropped']}, throttled={slow_stats['throttled']}")
+    assert latest == b"chunk-4", "viewer lambat harus lompat ke chunk terbaru"
+    assert fast_stats["dropped"] == 0 and fast_stats["frames"] == 4
+    assert slow_stats["dropped"] == 2 and slow_stats["throttled"] == 0
+
+
+async def test_max_fps_throttled():
+    """Chunk yang terbit selama jeda ``max_fps`` dihitung ``throttled``, bukan ``dropped``."""
+    hub = FrameHub()
+    viewer = hub.subscribe(max_fps=10, client="limited")
+
+    hub.publish(b"chunk-1")
+    assert await hub.next(viewer, timeout=1.0) == b"chunk-1"
+
+    # Viewer siap lagi, tapi menunggu ~100 ms karena max_fps; chunk 2-4 terbit selama jeda
+    waiting = asyncio.ensure_future(hub.next(viewer, timeout=1.0))
+    for seq in range(2, 5):
+        await asyncio.sleep(0.01)
+        hub.publish(f"chunk-{seq}".encode())
+    latest = await waiting
+    stats = viewer.stats()
+
+    print(f"   Viewer max_fps=10 menerima: {latest}")
+    print(f"   dropped={stats['dropped']}, throttled={stats['throttled']}")
+    assert latest == b"chunk-4"
+    assert stats["throttled"] == 2, "chunk yang terlewat karena max_fps harus dihitung throttled"
+    assert stats["dropped"] == 0, "viewer yang tidak lambat tidak boleh dihitung dropped"
+
+
+async def test_producer_thread():
+    """Publish dari thread producer membangunkan viewer di event loop; urutan chunk terjaga."""
+    hub = FrameHub()
+    viewer = hub.subscribe()
+    received = []
+
+    def produce():
+        for seq in range(1, 51):
+            hub.publish(f"chunk-{seq}".encode())
+            time.sleep(0.002)
+
+    async def consume():
+        while True:
+            chunk = await hub.next(viewer, timeout=0.5)
+            if chunk is None:
+                return
+            received.append(chunk)
+            if chunk == b"chunk-50":
+                return
+
+    producer = threading.Thread(target=produce, daemon=True)
+    consumer = asyncio.ensure_future(consume())
+    producer.start()
+    await consumer
+    producer.join(1.0)
+    seqs = [chunk_seq(chunk) for chunk in received]
+
+    print(f"   Diterima: {len(received)}/50, chunk pertama: {seqs[0] if seqs else None}, "
+          f"dropped={viewer.dropped}, throttled={viewer.throttled}")
+    assert received and received[-1] == b"chunk-50", "publish dari thread lain harus membangunkan viewer"
+    assert seqs == sorted(set(seqs)), "viewer tidak boleh menerima chunk lama atau chunk yang sama dua kali"
+    assert viewer.stats()["frames"] == len(received) and hub.stats()["published"] == 50
+    # Setiap chunk sejak chunk pertama yang diterima harus terkirim atau terhitung terlewat
+    stats = viewer.stats()
+    assert stats["frames"] + stats["dropped"] + stats["throttled"] == 51 - seqs[0], "setiap chunk harus terhitung"
+
+
+async def test_many_viewers_on_event_loop():
+    """Ratusan viewer menunggu di event loop: tidak ada thread tambahan, satu callback per publish."""
+    hub = FrameHub()
+    loop = asyncio.get_running_loop()
+    scheduled = []
+    call_soon_threadsafe = loop.call_soon_threadsafe
+
+    def counting(callback, *args):
+        scheduled.append(callback)
+        return call_soon_threadsafe(callback, *args)
+
+    loop.call_soon_threadsafe = counting
+    threads_before = threading.active_count()
+    try:
+        viewers = [hub.subscribe() for _ in range(200)]
+        waiting = [asyncio.ensure_future(hub.next(viewer, timeout=2.0)) for viewer in viewers]
+        await asyncio.sleep(0.05)
+        threads_waiting = threading.active_count()
+
+        producer = threading.Thread(target=hub.publish, args=(b"chunk-1",))
+        producer.start()
+        producer.join(1.0)
+        chunks = await asyncio.gather(*waiting)
+    finally:
+        loop.call_soon_threadsafe = call_soon_threadsafe
+
+    print(f"   Thread sebelum: {threads_before}, selama 200 viewer menunggu: {threads_waiting}")
+    print(f"   Callback event loop per publish: {len(scheduled)}, viewer menerima chunk: {chunks.count(b'chunk-1')}")
+    assert threads_waiting == threads_before, "viewer tidak boleh memakai thread"
+    assert len(scheduled) == 1, "satu publish menjadwalkan satu callback, berapapun jumlah viewer"
+    assert chunks == [b"chunk-1"] * 200 and hub.stats()["delivered"] == 200
+
+
+async def test_timeout_and_close():
+    """Tanpa publish ``next`` timeout; ``close`` membangunkan semua viewer yang menunggu."""
+    hub = FrameHub()
+    viewer = hub.subscribe()
+    other = hub.subscribe()
+
+    assert await hub.next(viewer, timeout=0.02) is None, "tanpa publish, next harus timeout"
+    print("   Timeout tanpa publish: None")
+
+    waiting = [asyncio.ensure_future(hub.next(v)) for v in (viewer, other)]
+    await asyncio.sleep(0.01)
+    hub.close()
+    results = await asyncio.wait_for(asyncio.gather(*waiting), 1.0)
+    print(f"   Close membangunkan viewer yang menunggu: {results}")
+    assert results == [None, None] and hub.closed
+    assert await hub.next(viewer, timeout=1.0) is None, "setelah close next langsung selesai"
+
+    hub.unsubscribe(other)
+    hub.unsubscribe(other)
+    assert hub.subscribers == 1 and hub.stats()["peak_subscribers"] == 2
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI FRAME BROADCAST TESTING", [
+        ("Fan-out", test_fan_out),
+        ("Slow Viewer Dropped", test_slow_viewer_dropped),
+        ("Max FPS Throttled", test_max_fps_throttled),
+        ("Producer Thread", test_producer_thread),
+        ("Many Viewers On Event Loop", test_many_viewers_on_event_loop),
+        ("Timeout & Close", test_timeout_and_close),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
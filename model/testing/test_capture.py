@@ -0,0 +1,164 @@
+"""
+Test Camera Capture
+===================
+Unit test untuk ``capture.FrameGrabber`` tanpa kamera: ``cv2.VideoCapture``
+diganti kamera palsu yang hanya menghasilkan frame saat diizinkan test, jadi
+buffer frame terbaru, penghitungan frame ``dropped``, read gagal, dan
+``release`` (kamera di-release oleh thread capture setelah ``read()`` selesai,
+bukan oleh pemanggil) bisa diuji secara deterministik.
+
+Cara menjalankan:
+    python test_capture.py
+"""
+
+import sys
+from pathlib import Path
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+from capture import FrameGrabber
+from unit_helpers import main, run_tests
+
+
+class FakeCamera:
+    """Stand-in for ``cv2.VideoCapture``: ``read()`` blocks until the test allows a frame."""
+
+    def __init__(self):
+        self.ticks = threading.Semaphore(0)
+        self.fail = False
+        self.reads = 0
+        self.settings = {}
+        self.released_on = None
+        self.released_while_reading = False
+        self._reading = False
+
+    def allow(self, frames: int = 1):
+        for _ in range(frames):
+            self.ticks.release()
+
+    def set(self, prop, value) -> bool:
+        self.settings[prop] = value
+        return True
+
+    def read(self):
+        self._reading = True
+        try:
+            self.ticks.acquire()
+            self.reads += 1
+            if self.fail:
+                return False, None
+            return True, np.full((4, 4, 3), self.reads, dtype=np.uint8)
+        finally:
+            self._reading = False
+
+    def isOpened(self) -> bool:
+        return self.released_on is None
+
+    def release(self):
+        self.released_while_reading = self._reading
+        self.released_on = threading.current_thread().name
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    """Poll ``condition()`` until it is true (the grabber runs on its own thread)."""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+def shut_down(grabber: FrameGrabber, camera: FakeCamera):
+    camera.allow()
+    grabber.release()
+
+
+def test_latest_frame():
+    """Pipeline selalu mendapat frame terbaru; frame yang tertimpa dihitung ``dropped``."""
+    camera = FakeCamera()
+    grabber = FrameGrabber(camera, buffer_size=2, name="test-latest")
+    try:
+        camera.allow()
+        first = grabber.latest(after=0, timeout=1.0)
+        camera.allow(3)
+        assert wait_for(lambda: grabber.captured == 4)
+        newest = grabber.latest(after=first.seq, timeout=1.0)
+        nothing_new = grabber.latest(after=newest.seq, timeout=0.05)
+        stats = grabber.stats()
+    finally:
+        shut_down(grabber, camera)
+
+    print(f"   Frame pertama: seq={first.seq}, frame terbaru: seq={newest.seq}, tanpa frame baru: {nothing_new}")
+    print(f"   captured={stats['captured']}, processed={stats['processed']}, dropped={stats['dropped']}")
+    assert first.seq == 1 and newest.seq == 4 and int(newest.frame[0, 0, 0]) == 4
+    assert nothing_new is None, "latest harus timeout jika tidak ada frame lebih baru"
+    assert stats["dropped"] == 2, "frame 2 dan 3 tertimpa sebelum diambil"
+    assert stats["processed"] == 2 and stats["buffer_size"] == 2
+    assert first.captured_at <= newest.captured_at <= time.monotonic()
+    assert camera.settings.get(cv2.CAP_PROP_BUFFERSIZE) == 1, "buffer driver diperkecil"
+
+
+def test_read_failures():
+    """``read()`` gagal dihitung dan tidak menghasilkan frame."""
+    camera = FakeCamera()
+    camera.fail = True
+    grabber = FrameGrabber(camera, name="test-failures")
+    try:
+        camera.allow(3)
+        assert wait_for(lambda: grabber.stats()["read_failures"] == 3)
+        missing = grabber.latest(timeout=0.05)
+        camera.fail = False
+        camera.allow()
+        recovered = grabber.latest(timeout=1.0)
+        stats = grabber.stats()
+    finally:
+        shut_down(grabber, camera)
+
+    print(f"   read_failures={stats['read_failures']}, frame saat gagal: {missing}, setelah pulih: seq={recovered.seq}")
+    assert missing is None and recovered.seq == 1 and stats["captured"] == 1
+
+
+def test_release_on_capture_thread():
+    """``release`` tidak me-release kamera selagi ``read()`` berjalan; thread capture yang me-release."""
+    camera = FakeCamera()
+    grabber = FrameGrabber(camera, name="test-release")
+    waiter_result = []
+    waiter = threading.Thread(target=lambda: waiter_result.append(grabber.latest(timeout=2.0)))
+    waiter.start()
+    time.sleep(0.05)
+
+    # read() masih tertahan: release menunggu sampai timeout lalu mengembalikan False
+    stopped_in_time = grabber.release(timeout=0.05)
+    released_early = camera.released_on
+    waiter.join(1.0)
+    camera.allow()
+    stopped = wait_for(lambda: camera.released_on is not None)
+
+    print(f"   release selagi read() berjalan: {stopped_in_time}, kamera di-release oleh: {camera.released_on}")
+    print(f"   viewer yang menunggu: {waiter_result}, isOpened: {grabber.isOpened()}")
+    assert not stopped_in_time and released_early is None, "kamera tidak boleh di-release selagi read() berjalan"
+    assert stopped and camera.released_on == "capture-test-release", "kamera di-release oleh thread capture"
+    assert not camera.released_while_reading
+    assert waiter_result == [None], "release membangunkan caller latest()"
+    assert not grabber.isOpened() and grabber.latest(timeout=0.05) is None
+    assert wait_for(lambda: not grabber._thread.is_alive())
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI CAMERA CAPTURE TESTING", [
+        ("Latest Frame", test_latest_frame),
+        ("Read Failures", test_read_failures),
+        ("Release On Capture Thread", test_release_on_capture_thread),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
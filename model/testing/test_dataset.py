@@ -11,9 +11,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from collections import defaultdict
+from typing import Optional
 from ultralytics import YOLO
-import numpy as np
-from PIL import Image
+import cv2
+
+from postprocess import as_detections
 
 # Constants
 MODEL_PATH = Path(__file__).parent.parent / "best.pt"
@@ -97,6 +99,87 @@ def test_class_distribution():
     return len(class_counts) > 0
 
 
+def read_ground_truth(img_path: Path) -> Optional[int]:
+    """Kelas ground truth (baris pertama label) untuk satu gambar, atau None."""
+    label_path = LABELS_PATH / (img_path.stem + ".txt")
+    
+    if not label_path.exists():
+        return None
+    
+    try:
+        with open(label_path, 'r') as f:
+            lines = f.readlines()
+            if not lines:
+                return None
+            # Get first class (assuming single class per image for simplicity)
+            return int(lines[0].strip().split()[0])
+    except:
+        return None
+
+
+def predict_class(model, img_path: Path) -> Optional[int]:
+    """Kelas dengan confidence tertinggi, atau None jika tidak ada deteksi."""
+    # BGR seperti frame server dan data kalibrasi INT8 (quantization.CalibrationReader)
+    img_np = cv2.imread(str(img_path))
+    if img_np is None:
+        return None
+    results = model(img_np, verbose=False)
+    
+    # Detections terurut dari confidence tertinggi (semua backend, termasuk engine)
+    detections = as_detections(results[0]) if len(results) > 0 else None
+    if detections is not None and len(detections) > 0:
+        return int(detections.cls[0])
+    return None
+
+
+def evaluate_accuracy(model, images) -> dict:
+    """Top-1 accuracy of ``model`` on images with ground truth (dipakai juga oleh gate kuantisasi).
+    
+    ``accuracy`` hanya menghitung gambar yang terdeteksi (sama seperti test akurasi lama);
+    ``labelled_accuracy`` menghitung semua gambar berlabel, jadi gambar tanpa deteksi
+    dianggap salah. ``detection_rate`` = gambar terdeteksi / gambar berlabel.
+    """
+    class_names = model.names
+    labelled = 0
+    correct = 0
+    total = 0
+    confusion = defaultdict(lambda: defaultdict(int))
+    
+    for img_path in images:
+        gt_class = read_ground_truth(img_path)
+        if gt_class is None:
+            continue
+        labelled += 1
+        
+        try:
+            pred_class = predict_class(model, img_path)
+        except Exception as e:
+            print(f"   ⚠️ Error pada {img_path.name}: {e}")
+            continue
+        
+        if pred_class is None:
+            continue
+        
+        total += 1
+        if pred_class == gt_class:
+            correct += 1
+        
+        # Track confusion - gunakan model.names
+        gt_letter = class_names.get(gt_class, "?")
+        pred_letter = class_names.get(pred_class, "?")
+        confusion[gt_letter][pred_letter] += 1
+    
+    return {
+        "labelled": labelled,
+        "correct": correct,
+        "total": total,
+        "accuracy": correct / total if total else 0.0,
+        "labelled_accuracy": correct / labelled if labelled else 0.0,
+        "detection_rate": total / labelled if labelled else 0.0,
+        "confusion": confusion,
+    }
+
+
 def test_model_accuracy_sample():
     """Test akurasi model pada sample dari dataset."""
     print("\n" + "=" * 60)
@@ -121,51 +204,10 @@ def test_model_accuracy_sample():
         print("⚠️ Tidak ada gambar")
         return False
     
-    correct = 0
-    total = 0
-    confusion = defaultdict(lambda: defaultdict(int))
-    
     print(f"   Menguji {len(images)} gambar...")
     
-    for img_path in images:
-        # Find corresponding label
-        label_path = LABELS_PATH / (img_path.stem + ".txt")
-        
-        if not label_path.exists():
-            continue
-        
-        # Read ground truth
-        try:
-            with open(label_path, 'r') as f:
-                lines = f.readlines()
-                if not lines:
-                    continue
-                # Get first class (assuming single class per image for simplicity)
-                gt_class = int(lines[0].strip().split()[0])
-        except:
-            continue
-        
-        # Run inference
-        try:
-            img = Image.open(img_path).convert("RGB")
-            img_np = np.array(img)
-            results = model(img_np, verbose=False)
-            
-            if len(results) > 0 and results[0].boxes is not None and len(results[0].boxes) > 0:
-                boxes = results[0].boxes
-                best_idx = int(boxes.conf.argmax())
-                pred_class = int(boxes[best_idx].cls.item())
-                
-                total += 1
-                if pred_class == gt_class:
-                    correct += 1
-                
-                # Track confusion - gunakan model.names
-                gt_letter = class_names.get(gt_class, "?")
-                pred_letter = class_names.get(pred_class, "?")
-                confusion[gt_letter][pred_letter] += 1
-        except Exception as e:
-            print(f"   ⚠️ Error pada {img_path.name}: {e}")
+    evaluation = evaluate_accuracy(model, images)
+    correct, total, confusion = evaluation["correct"], evaluation["total"], evaluation["confusion"]
     
     if total == 0:
         print("   ⚠️ Tidak ada gambar yang berhasil diproses")
@@ -235,28 +277,10 @@ def test_per_class_accuracy():
         if not images:
             continue
         
-        correct = 0
-        total = 0
-        
-        for img_path in images:
-            try:
-                img = Image.open(img_path).convert("RGB")
-                img_np = np.array(img)
-                results = model(img_np, verbose=False)
-                
-                if len(results) > 0 and results[0].boxes is not None and len(results[0].boxes) > 0:
-                    boxes = results[0].boxes
-                    best_idx = int(boxes.conf.argmax())
-                    pred_class = int(boxes[best_idx].cls.item())
-                    
-                    total += 1
-                    if pred_class == class_id:
-                        correct += 1
-            except:
-                continue
+        evaluation = evaluate_accuracy(model, images)
         
-        if total > 0:
-            acc = correct / total
+        if evaluation["total"] > 0:
+            acc = evaluation["accuracy"]
             # Gunakan model.names untuk mendapatkan huruf yang benar
             letter = class_names.get(class_id, f"Class {class_id}")
             class_accuracy[letter] = acc
@@ -0,0 +1,168 @@
+"""
+Test Event Log
+==============
+Unit test untuk ``event_log.EventLog`` tanpa server: parsing ``SIBI_LOG_SAMPLE``,
+sampling per event, level minimum, write per batch ke file sementara, flush saat
+``close``, rate limit error per nama event (dengan jumlah ``suppressed``), dan
+event yang dibuang saat antrean penuh.
+
+Cara menjalankan:
+    python test_event_log.py
+"""
+
+import sys
+from pathlib import Path
+import json
+import random
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from event_log import EventLog, parse_sample_rates
+from unit_helpers import main, run_tests
+
+
+def read_lines(path: Path) -> list:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    """Poll ``condition()`` until it is true (the writer runs on its own thread)."""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_parse_sample_rates():
+    """``"detected=0.05,stale=0.1"`` -> rate per event, dibatasi ke 0..1."""
+    rates = parse_sample_rates(" detected=0.05, stale=2 ,,ws_error=-1")
+    print(f"   Rates: {rates}")
+    assert rates == {"detected": 0.05, "stale": 1.0, "ws_error": 0.0}
+    assert parse_sample_rates("") == {}
+
+
+def test_sampling_and_level():
+    """Event di luar sampel dan di bawah level minimum tidak ditulis; sampel membawa field ``sample``."""
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.log"
+        log = EventLog("test-sampling", level="INFO", sample={"detected": 0.5, "stale": 0.0}, path=str(path))
+        for _ in range(200):
+            log.event("detected", letter="A")
+            log.event("stale")
+        log.event("debug_only", level=10)
+        log.event("frame", letter="B")
+        log.close()
+        lines = read_lines(path)
+        stats = log.stats()
+
+    detected = [line for line in lines if line["event"] == "detected"]
+    print(f"   detected ditulis: {len(detected)}/200, stale ditulis: {sum(l['event'] == 'stale' for l in lines)}/200")
+    print(f"   sampled_out={stats['sampled_out']}, baris contoh: {detected[0]}")
+    assert 60 < len(detected) < 140, "rate 0.5 menulis kira-kira setengah event"
+    assert all(line["sample"] == 0.5 and line["letter"] == "A" for line in detected)
+    assert not any(line["event"] in ("stale", "debug_only") for line in lines)
+    assert stats["sampled_out"] == 400 - len(detected), "event debug di bawah level tidak dihitung sebagai sampel"
+    frame = [line for line in lines if line["event"] == "frame"][0]
+    assert "sample" not in frame and frame["source"] == "test-sampling" and frame["level"] == "info"
+
+
+def test_batched_writes():
+    """Writer menulis per ``batch_lines`` baris; sisa batch ditulis saat ``close``."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.log"
+        log = EventLog("test-batch", level="INFO", sample={}, batch_lines=10, flush_s=30, path=str(path))
+        for i in range(25):
+            log.event("frame", index=i)
+        assert wait_for(lambda: log.lines == 20), "dua batch penuh harus ditulis tanpa menunggu flush_s"
+        time.sleep(0.05)
+        before_close = dict(log.stats())
+        log.close()
+        lines = read_lines(path)
+        stats = log.stats()
+
+    print(f"   Sebelum close: lines={before_close['lines']}, writes={before_close['writes']}")
+    print(f"   Sesudah close: lines={stats['lines']}, writes={stats['writes']}")
+    assert before_close["lines"] == 20 and before_close["writes"] == 2, "batch belum penuh menunggu flush"
+    assert stats["lines"] == 25 and stats["writes"] == 3, "close harus menulis sisa batch"
+    assert [line["index"] for line in lines] == list(range(25))
+
+
+def test_flush_interval():
+    """Batch yang belum penuh tetap ditulis setelah ``flush_s``."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.log"
+        log = EventLog("test-flush", level="INFO", sample={}, batch_lines=100, flush_s=0.05, path=str(path))
+        log.event("frame")
+        flushed = wait_for(lambda: log.lines == 1)
+        log.close()
+
+    print(f"   Baris tertulis sebelum close: {log.stats()['lines']}")
+    assert flushed, "event harus ditulis dalam flush_s tanpa close"
+
+
+def test_error_rate_limit():
+    """Maksimum ``error_burst`` error per window; sisanya dihitung di field ``suppressed``."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.log"
+        log = EventLog("test-errors", level="INFO", sample={}, error_burst=2, error_interval_s=0.1,
+                       batch_lines=100, flush_s=30, path=str(path))
+        for i in range(5):
+            log.error("ws_error", ValueError(f"bad frame {i}"), client="c1")
+        log.error("decode_error")
+        # Error di-flush langsung, tanpa menunggu batch atau flush_s
+        urgent = wait_for(lambda: log.lines == 3)
+        time.sleep(0.15)
+        log.error("ws_error", client="c1")
+        log.close()
+        lines = read_lines(path)
+        stats = log.stats()
+
+    ws_errors = [line for line in lines if line["event"] == "ws_error"]
+    print(f"   ws_error ditulis: {len(ws_errors)}, suppressed_errors={stats['suppressed_errors']}")
+    print(f"   Baris setelah window baru: {ws_errors[-1]}")
+    assert urgent, "error harus di-flush langsung"
+    assert len(ws_errors) == 3 and stats["suppressed_errors"] == 3
+    assert ws_errors[0]["error"] == "ValueError: bad frame 0" and "traceback" in ws_errors[0]
+    assert ws_errors[-1]["suppressed"] == 3, "error yang ditahan dilaporkan di error berikutnya"
+    assert "suppressed" not in ws_errors[0] and ws_errors[0]["level"] == "error"
+    assert any(line["event"] == "decode_error" for line in lines), "rate limit per nama event"
+
+
+def test_queue_full_drops():
+    """Antrean penuh: event dibuang dan dihitung, caller tidak menunggu."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "events.log"
+        log = EventLog("test-queue", level="INFO", sample={}, queue_size=2, path=str(path))
+        # Tanpa writer yang berjalan, antrean tidak pernah dikosongkan
+        log.close()
+        start = time.perf_counter()
+        for _ in range(5):
+            log.event("frame")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats = log.stats()
+
+    print(f"   queued={stats['queued']}, dropped={stats['dropped']}, 5 event dalam {elapsed_ms:.2f} ms")
+    assert stats["queued"] == 2 and stats["dropped"] == 3
+    assert elapsed_ms < 100, "caller tidak boleh menunggu antrean"
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI EVENT LOG TESTING", [
+        ("Parse Sample Rates", test_parse_sample_rates),
+        ("Sampling & Level", test_sampling_and_level),
+        ("Batched Writes", test_batched_writes),
+        ("Flush Interval", test_flush_interval),
+        ("Error Rate Limit", test_error_rate_limit),
+        ("Queue Full Drops", test_queue_full_drops),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
@@ -0,0 +1,205 @@
+"""
+Test Inference Pool
+===================
+Unit test untuk ``inference_pool.InferencePool`` tanpa model: ``model_factory``
+palsu membuat satu "replika" per worker, dan job bisa ditahan dengan
+``threading.Event`` untuk menguji antrean terbatas dan pembatalan job saat
+caller pergi.
+
+Cara menjalankan:
+    python test_inference_pool.py
+"""
+
+import sys
+from pathlib import Path
+import asyncio
+import queue
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from inference_pool import InferencePool
+from unit_helpers import main, run_tests
+
+
+def replica_factory(index: int) -> dict:
+    return {"index": index, "thread": threading.current_thread().name}
+
+
+def blocking_job(release: threading.Event, started: threading.Event = None):
+    def job(model):
+        if started is not None:
+            started.set()
+        release.wait(5)
+        return model["index"]
+    return job
+
+
+def test_replica_per_worker():
+    """Setiap worker memuat replikanya sendiri di thread-nya dan job berjalan di luar caller."""
+    pool = InferencePool(replica_factory, workers=2, threads_per_worker=1)
+    pool.start()
+    try:
+        models = [pool.submit(lambda model: dict(model)).result(5) for _ in range(6)]
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+
+    print(f"   Replika terpakai: {sorted({(m['index'], m['thread']) for m in models})}")
+    assert all(m["thread"] == f"inference-{m['index']}" for m in models), "replika harus dibuat di thread worker-nya"
+    assert threading.current_thread().name not in {m["thread"] for m in models}
+    assert stats["completed"] == 6 and stats["busy"] == 0
+
+
+def test_bounded_queue():
+    """Antrean penuh langsung menolak dengan ``queue.Full`` (429 di server)."""
+    pool = InferencePool(replica_factory, workers=1, threads_per_worker=1, queue_size=1)
+    pool.start()
+    release, started = threading.Event(), threading.Event()
+    try:
+        running = pool.submit(blocking_job(release, started))
+        assert started.wait(5)
+        queued = pool.submit(blocking_job(release))
+        try:
+            pool.submit(blocking_job(release))
+            raise AssertionError("job ketiga seharusnya ditolak")
+        except queue.Full:
+            print("   Job ketiga ditolak: queue.Full")
+        stats = pool.stats()
+        release.set()
+        assert running.result(5) == 0 and queued.result(5) == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+    print(f"   queued={stats['queued']}, busy={stats['busy']}, rejected={stats['rejected']}")
+    assert stats["queued"] == 1 and stats["busy"] == 1 and stats["rejected"] == 1
+
+
+def test_job_error():
+    """Exception job diteruskan ke caller; worker tetap melayani job berikutnya."""
+    pool = InferencePool(replica_factory, workers=1, threads_per_worker=1)
+    pool.start()
+    try:
+        def failing(model):
+            raise ValueError("bad frame")
+        try:
+            pool.submit(failing).result(5)
+            raise AssertionError("exception job seharusnya diteruskan")
+        except ValueError as e:
+            print(f"   Error job: {e}")
+        after = pool.submit(lambda model: "ok").result(5)
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+
+    assert after == "ok"
+    assert stats["failed"] == 1 and stats["completed"] == 1
+
+
+def test_load_error():
+    """Replika yang gagal dimuat membuat ``start`` gagal, bukan menggantung."""
+    def broken_factory(index: int):
+        raise OSError("best.pt tidak ditemukan")
+
+    pool = InferencePool(broken_factory, workers=2, threads_per_worker=1)
+    try:
+        pool.start()
+        raise AssertionError("start seharusnya gagal")
+    except RuntimeError as e:
+        print(f"   start: {e}")
+
+
+async def test_async_run():
+    """``run`` menjalankan job di worker tanpa memblokir event loop."""
+    pool = InferencePool(replica_factory, workers=1, threads_per_worker=1)
+    pool.start()
+    release = threading.Event()
+    try:
+        job = asyncio.ensure_future(pool.run(blocking_job(release)))
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not job.done() and ticks == 5, "event loop harus tetap berjalan selama job"
+        release.set()
+        assert await asyncio.wait_for(job, 5) == 0
+    finally:
+        release.set()
+        pool.shutdown()
+    print("   Event loop tetap berjalan selama job di worker")
+
+
+async def test_cancel_queued_job():
+    """Caller ``run`` yang pergi selagi job antre: job dibuang tanpa dijalankan."""
+    pool = InferencePool(replica_factory, workers=1, threads_per_worker=1)
+    pool.start()
+    release, started = threading.Event(), threading.Event()
+    ran = []
+    try:
+        busy = asyncio.ensure_future(pool.run(blocking_job(release, started)))
+        assert await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        queued = asyncio.ensure_future(pool.run(lambda model: ran.append(model["index"])))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        await asyncio.sleep(0.01)
+        cancelled_at_once = queued.done()
+        release.set()
+        assert await asyncio.wait_for(busy, 5) == 0
+        # Job berikutnya membuktikan worker sudah melewati job yang dibuang
+        assert await asyncio.wait_for(pool.run(lambda model: "ok"), 5) == "ok"
+        stats = pool.stats()
+    finally:
+        release.set()
+        pool.shutdown()
+
+    print(f"   Batal langsung: {cancelled_at_once}, job dijalankan: {ran}, cancelled={stats['cancelled']}")
+    assert cancelled_at_once, "job yang masih antre langsung dibatalkan"
+    assert ran == [], "job yang dibatalkan tidak boleh dijalankan worker"
+    assert stats["cancelled"] == 1 and stats["completed"] == 2
+
+
+async def test_cancel_running_job():
+    """Job yang sudah berjalan tidak dihentikan: pembatalan caller menunggu job selesai."""
+    pool = InferencePool(replica_factory, workers=1, threads_per_worker=1)
+    pool.start()
+    release, started = threading.Event(), threading.Event()
+    try:
+        job = asyncio.ensure_future(pool.run(blocking_job(release, started)))
+        assert await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        job.cancel()
+        await asyncio.sleep(0.05)
+        waiting = not job.done()
+        busy = pool.stats()["busy"]
+        release.set()
+        try:
+            await asyncio.wait_for(job, 5)
+            raise AssertionError("caller yang dibatalkan seharusnya menerima CancelledError")
+        except asyncio.CancelledError:
+            pass
+        stats = pool.stats()
+    finally:
+        release.set()
+        pool.shutdown()
+
+    print(f"   Pembatalan menunggu job: {waiting} (busy={busy}), completed={stats['completed']}, cancelled={stats['cancelled']}")
+    assert waiting and busy == 1, "caller tidak boleh selesai selagi worker masih menjalankan job"
+    assert stats["completed"] == 1 and stats["cancelled"] == 0
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI INFERENCE POOL TESTING", [
+        ("Replica Per Worker", test_replica_per_worker),
+        ("Bounded Queue", test_bounded_queue),
+        ("Job Error", test_job_error),
+        ("Load Error", test_load_error),
+        ("Async Run", test_async_run),
+        ("Cancel Queued Job", test_cancel_queued_job),
+        ("Cancel Running Job", test_cancel_running_job),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
@@ -0,0 +1,133 @@
+"""
+Test Metrics
+============
+Unit test untuk ``metrics`` tanpa server: format teks Prometheus untuk
+histogram (bucket kumulatif, ``_sum``, ``_count``), counter berlabel, gauge,
+penggabungan shard dari banyak thread, dan shard thread yang sudah selesai
+yang dilebur ke total retired (jumlah shard tidak tumbuh terus).
+
+Cara menjalankan:
+    python test_metrics.py
+"""
+
+import sys
+from pathlib import Path
+import gc
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metrics import Counter, CounterFunc, Gauge, Histogram, Registry
+from unit_helpers import main, run_tests
+
+
+def run_threads(count: int, work):
+    """Run ``work`` on ``count`` short-lived threads, started in batches of 8."""
+    for start in range(0, count, 8):
+        threads = [threading.Thread(target=work) for _ in range(min(8, count - start))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    gc.collect()
+
+
+def test_histogram_render():
+    """Bucket kumulatif per label, ``+Inf`` = ``_count``, ``_sum`` = total nilai."""
+    histogram = Histogram("sibi_stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, "decode")
+    histogram.observe(0.1, "inference")
+    lines = histogram.render()
+
+    for line in lines:
+        print(f"   {line}")
+    assert lines[:2] == ["# HELP sibi_stage_seconds Stage latency", "# TYPE sibi_stage_seconds histogram"]
+    assert 'sibi_stage_seconds_bucket{stage="decode",le="0.1"} 1' in lines
+    assert 'sibi_stage_seconds_bucket{stage="decode",le="1.0"} 2' in lines
+    assert 'sibi_stage_seconds_bucket{stage="decode",le="+Inf"} 3' in lines
+    assert 'sibi_stage_seconds_sum{stage="decode"} 2.550000' in lines
+    assert 'sibi_stage_seconds_count{stage="decode"} 3' in lines
+    assert 'sibi_stage_seconds_bucket{stage="inference",le="0.1"} 1' in lines, "batas bucket inklusif (le)"
+
+
+def test_counter_and_gauges():
+    """Counter ``_total`` per label; Gauge dan CounterFunc dibaca dari callback saat scrape."""
+    counter = Counter("sibi_requests", "Requests", ["route"])
+    counter.inc("/detect")
+    counter.inc("/detect", amount=2)
+    counter.inc("/ws")
+    registry = Registry()
+    registry.register(counter)
+    registry.register(Gauge("sibi_queue_depth", "Queue depth", lambda: 4))
+    registry.register(CounterFunc("sibi_frames_cancelled", "Cancelled frames", lambda: 7))
+    text = registry.render()
+
+    print("   " + text.strip().replace("\n", "\n   "))
+    assert 'sibi_requests_total{route="/detect"} 3' in text.splitlines()
+    assert 'sibi_requests_total{route="/ws"} 1' in text.splitlines()
+    assert "sibi_queue_depth 4" in text.splitlines()
+    assert "# TYPE sibi_frames_cancelled_total counter" in text and "sibi_frames_cancelled_total 7" in text
+    assert text.endswith("\n")
+
+
+def test_threads_merged():
+    """Observasi dari banyak thread yang masih hidup digabung saat scrape."""
+    counter = Counter("sibi_frames", "Frames")
+    ready, release = threading.Barrier(5), threading.Event()
+
+    def work():
+        counter.inc(amount=10)
+        ready.wait()
+        release.wait()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    live = list(counter.render())
+    shards = len(counter._shards)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"   4 thread hidup: shard={shards}, {live[-1]}")
+    assert shards == 4 and live[-1] == "sibi_frames_total 40"
+
+
+def test_dead_threads_retired():
+    """Shard thread yang sudah selesai dilebur ke total retired tanpa kehilangan nilai."""
+    histogram = Histogram("sibi_decode_seconds", "Decode latency", buckets=(0.1, 1.0))
+    counter = Counter("sibi_decoded", "Decoded frames", ["kind"])
+
+    def work():
+        histogram.observe(0.05)
+        counter.inc("jpeg")
+
+    run_threads(200, work)
+    histogram.observe(0.5)
+    lines = histogram.render()
+    total = counter.render()[-1]
+
+    print(f"   200 thread pendek: shard histogram={len(histogram._shards)}, shard counter={len(counter._shards)}")
+    print(f"   {total}, {lines[-1]}")
+    assert len(histogram._shards) == 1, "hanya shard thread yang masih hidup (thread ini)"
+    assert counter._shards == [], "shard thread yang sudah selesai tidak boleh tertinggal"
+    assert total == 'sibi_decoded_total{kind="jpeg"} 200', "nilai thread yang sudah selesai tetap dihitung"
+    assert "sibi_decode_seconds_bucket{le=\"0.1\"} 200" in lines
+    assert lines[-1] == "sibi_decode_seconds_count 201"
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI METRICS TESTING", [
+        ("Histogram Render", test_histogram_render),
+        ("Counter & Gauges", test_counter_and_gauges),
+        ("Threads Merged", test_threads_merged),
+        ("Dead Threads Retired", test_dead_threads_retired),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
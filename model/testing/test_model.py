@@ -14,6 +14,8 @@ from ultralytics import YOLO
 import numpy as np
 from PIL import Image
 
+from postprocess import as_detections, best
+
 # Constants
 MODEL_PATH = Path(__file__).parent.parent / "best.pt"
 
@@ -72,13 +74,10 @@ def test_inference_dummy_image(model):
         print(f"   Jumlah hasil: {len(results)}")
         
         if len(results) > 0:
-            result = results[0]
-            boxes = result.boxes
-            if boxes is not None and len(boxes) > 0:
-                print(f"   Deteksi ditemukan: {len(boxes)} objek")
-                for i, box in enumerate(boxes):
-                    cls_idx = int(box.cls.item())
-                    conf = float(box.conf.item())
+            detections = as_detections(results[0])
+            if len(detections) > 0:
+                print(f"   Deteksi ditemukan: {len(detections)} objek")
+                for i, (cls_idx, conf) in enumerate(zip(detections.cls.tolist(), detections.conf.tolist())):
                     # Gunakan model.names untuk mendapatkan huruf yang benar
                     letter = model.names.get(cls_idx, "?")
                     print(f"      [{i+1}] Huruf: {letter}, Confidence: {conf:.2%}")
@@ -123,13 +122,9 @@ def test_inference_with_dataset(model):
             results = model(img_np, verbose=False)
             
             if len(results) > 0:
-                result = results[0]
-                boxes = result.boxes
-                if boxes is not None and len(boxes) > 0:
-                    best_idx = int(boxes.conf.argmax())
-                    best_box = boxes[best_idx]
-                    cls_idx = int(best_box.cls.item())
-                    conf = float(best_box.conf.item())
+                top = best(as_detections(results[0]))
+                if top is not None:
+                    cls_idx, conf, _ = top
                     # Gunakan model.names untuk mendapatkan huruf yang benar
                     letter = model.names.get(cls_idx, "?")
                     print(f"   ✅ {img_path.name[:30]}... -> Huruf: {letter} ({conf:.2%})")
@@ -0,0 +1,130 @@
+"""
+Test Motion Gate
+================
+Unit test untuk ``motion_gate.MotionGate`` tanpa model dan tanpa server: frame
+identik atau hampir identik memakai hasil sebelumnya, frame dengan gerakan
+di-inference ulang, refresh interval memaksa inference, dan sesi terpisah
+satu sama lain (termasuk batas jumlah sesi dan TTL).
+
+Cara menjalankan:
+    python test_motion_gate.py
+"""
+
+import sys
+from pathlib import Path
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from motion_gate import MotionGate, motion_score, motion_thumbnail
+from unit_helpers import main, run_tests
+
+
+def scene(value: int = 100) -> np.ndarray:
+    """Static 640x480 BGR scene with a uniform background."""
+    return np.full((480, 640, 3), value, dtype=np.uint8)
+
+
+def test_reuse_identical_frame():
+    """Frame identik memakai hasil sebelumnya tanpa inference."""
+    gate = MotionGate(threshold=0.02, refresh_s=10)
+    thumbnail = motion_thumbnail(scene())
+
+    first = gate.lookup("session", thumbnail)
+    gate.update("session", thumbnail, "response-1")
+    second = gate.lookup("session", motion_thumbnail(scene()))
+    stats = gate.stats()
+
+    print(f"   Frame pertama: {first!r}, frame identik: {second!r}")
+    print(f"   frames={stats['frames']}, skipped={stats['skipped']}, skip_rate={stats['skip_rate']}")
+    assert first is None, "sesi baru harus di-inference"
+    assert second == "response-1", "frame identik harus memakai hasil sebelumnya"
+    assert stats["skipped"] == 1
+
+
+def test_small_noise_reused():
+    """Noise sensor kecil (di bawah threshold) tidak memicu inference."""
+    gate = MotionGate(threshold=0.02, refresh_s=10)
+    base = scene()
+    noisy = base + np.random.default_rng(0).integers(0, 3, base.shape, dtype=np.uint8)
+
+    score = motion_score(motion_thumbnail(base), motion_thumbnail(noisy))
+    gate.update("session", motion_thumbnail(base), "response-1")
+    reused = gate.lookup("session", motion_thumbnail(noisy))
+
+    print(f"   Skor beda: {score:.4f} (threshold {gate.threshold}), hasil lookup: {reused!r}")
+    assert score < gate.threshold
+    assert reused == "response-1", "noise kecil tidak boleh memicu inference"
+
+
+def test_motion_triggers_inference():
+    """Gerakan (tangan masuk frame) memaksa inference ulang."""
+    gate = MotionGate(threshold=0.02, refresh_s=10)
+    base = scene()
+    moved = base.copy()
+    moved[120:360, 160:480] = 255
+
+    score = motion_score(motion_thumbnail(base), motion_thumbnail(moved))
+    gate.update("session", motion_thumbnail(base), "response-1")
+    result = gate.lookup("session", motion_thumbnail(moved))
+
+    print(f"   Skor beda: {score:.4f} (threshold {gate.threshold}), hasil lookup: {result!r}")
+    assert score >= gate.threshold
+    assert result is None, "frame dengan gerakan tidak boleh memakai hasil lama"
+    assert gate.stats()["skipped"] == 0
+
+
+def test_refresh_interval():
+    """Scene statis tetap di-inference minimal tiap ``refresh_s``."""
+    gate = MotionGate(threshold=0.02, refresh_s=0.05)
+    thumbnail = motion_thumbnail(scene())
+    gate.update("session", thumbnail, "response-1")
+
+    before = gate.lookup("session", thumbnail)
+    time.sleep(0.1)
+    after = gate.lookup("session", thumbnail)
+    stats = gate.stats()
+
+    print(f"   Sebelum refresh: {before!r}, sesudah refresh: {after!r}")
+    print(f"   forced_refreshes={stats['forced_refreshes']}")
+    assert before == "response-1"
+    assert after is None, "inference harus dipaksa setelah refresh interval"
+    assert stats["forced_refreshes"] == 1
+
+
+def test_sessions():
+    """Sesi tidak berbagi hasil; sesi terlama dan sesi idle dilupakan."""
+    thumbnail = motion_thumbnail(scene())
+
+    gate = MotionGate(threshold=0.02, refresh_s=10, max_sessions=2)
+    gate.update("a", thumbnail, "response-a")
+    assert gate.lookup("b", thumbnail) is None, "sesi lain tidak boleh memakai hasil sesi a"
+    gate.update("b", thumbnail, "response-b")
+    gate.update("c", thumbnail, "response-c")
+    print(f"   max_sessions=2: sessions={gate.stats()['sessions']}, sesi a={gate.last_response('a')!r}")
+    assert gate.last_response("a") is None, "sesi terlama harus dibuang"
+    assert gate.lookup("c", thumbnail) == "response-c"
+
+    idle_gate = MotionGate(threshold=0.02, refresh_s=10, session_ttl_s=0.05)
+    idle_gate.update("a", thumbnail, "response-a")
+    time.sleep(0.1)
+    print(f"   session_ttl_s=0.05: sesi idle={idle_gate.last_response('a')!r}")
+    assert idle_gate.lookup("a", thumbnail) is None and idle_gate.last_response("a") is None
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI MOTION GATE TESTING", [
+        ("Reuse Identical Frame", test_reuse_identical_frame),
+        ("Small Noise Reused", test_small_noise_reused),
+        ("Motion Triggers Inference", test_motion_triggers_inference),
+        ("Refresh Interval", test_refresh_interval),
+        ("Sessions", test_sessions),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
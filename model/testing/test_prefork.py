@@ -0,0 +1,115 @@
+"""
+Test Pre-fork
+=============
+Unit test untuk ``prefork`` tanpa model dan tanpa server (Linux): pembagian
+CPU set per worker, laporan memori, dan ``stop_workers`` yang menunggu setiap
+worker keluar serta SIGKILL worker yang mengabaikan SIGTERM. Worker diganti
+proses anak kecil hasil ``os.fork``.
+
+Cara menjalankan:
+    python test_prefork.py
+"""
+
+import sys
+from pathlib import Path
+import os
+import signal
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from prefork import memory_report, split_cpus, stop_workers
+from unit_helpers import main, run_tests
+
+
+def fork_worker(ignore_sigterm: bool = False) -> int:
+    """Fork a child that sleeps until signalled; returns once it is ready."""
+    ready_r, ready_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(ready_r)
+            signal.signal(signal.SIGTERM, signal.SIG_IGN if ignore_sigterm else signal.SIG_DFL)
+            os.write(ready_w, b"1")
+            time.sleep(30)
+        finally:
+            os._exit(0)
+    os.close(ready_w)
+    os.read(ready_r, 1)
+    os.close(ready_r)
+    return pid
+
+
+def is_child(pid: int) -> bool:
+    """True while ``pid`` is still an unreaped child of this process."""
+    try:
+        os.waitpid(pid, os.WNOHANG)
+        return True
+    except ChildProcessError:
+        return False
+
+
+def test_split_cpus():
+    """CPU set per worker disjoint, berurutan, dan ukurannya hampir sama."""
+    sets = split_cpus(list(range(8)), 3)
+    capped = split_cpus([0, 1], 4)
+
+    print(f"   8 CPU / 3 worker: {sets}, 2 CPU / 4 worker: {capped}")
+    assert sets == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert capped == [[0], [1]], "jumlah worker dibatasi jumlah CPU"
+    assert split_cpus([0, 1, 2, 3], 1) == [[0, 1, 2, 3]]
+
+
+def test_memory_report():
+    """Laporan memori proses ini; tanpa master hanya proses sendiri."""
+    report = memory_report()
+    print(f"   pid={report['pid']}, rss_mb={report.get('rss_mb')}, pss_mb={report.get('pss_mb')}")
+    assert report["pid"] == os.getpid()
+    assert "processes" not in report
+    if Path(f"/proc/{os.getpid()}/smaps_rollup").exists():
+        assert report["rss_mb"] > 0 and report["pss_mb"] > 0
+
+
+def test_stop_workers_reaps():
+    """Worker yang menurut SIGTERM ditunggu sampai keluar (tidak ada zombie tersisa)."""
+    children = {fork_worker(): index for index in range(3)}
+    pids = list(children)
+    start = time.monotonic()
+    killed = stop_workers(children, timeout=5)
+    elapsed = time.monotonic() - start
+
+    print(f"   {len(pids)} worker berhenti dalam {elapsed * 1000:.0f} ms, SIGKILL: {killed}")
+    assert killed == [] and children == {}
+    assert not any(is_child(pid) for pid in pids), "semua worker harus sudah di-reap"
+    assert elapsed < 5, "tidak perlu menunggu timeout jika worker sudah keluar"
+
+
+def test_stop_workers_escalates():
+    """Worker yang mengabaikan SIGTERM di-SIGKILL setelah timeout, lalu di-reap."""
+    stubborn = fork_worker(ignore_sigterm=True)
+    polite = fork_worker()
+    children = {stubborn: 0, polite: 1}
+    start = time.monotonic()
+    killed = stop_workers(children, timeout=0.3)
+    elapsed = time.monotonic() - start
+
+    print(f"   SIGKILL: {killed} setelah {elapsed * 1000:.0f} ms")
+    assert killed == [stubborn], "hanya worker yang mengabaikan SIGTERM yang di-SIGKILL"
+    assert children == {}
+    assert not is_child(stubborn) and not is_child(polite)
+    assert elapsed >= 0.3
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI PRE-FORK TESTING", [
+        ("Split CPUs", test_split_cpus),
+        ("Memory Report", test_memory_report),
+        ("Stop Workers Reaps", test_stop_workers_reaps),
+        ("Stop Workers Escalates", test_stop_workers_escalates),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
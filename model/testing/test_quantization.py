@@ -0,0 +1,173 @@
+"""
+Test INT8 Quantization Gate
+===========================
+Script untuk membuat model INT8 (``SIBI_BACKEND=int8``) dan memastikan akurasinya
+tidak turun terlalu jauh dari model FP32 ``best.pt``:
+    - Kuantisasi ``best.onnx`` -> kandidat INT8 (static dengan kalibrasi, atau dynamic)
+    - Akurasi top-1 PyTorch FP32, ONNX FP32 dan ONNX INT8 pada ``dataset/valid``
+      (logika sama dengan ``test_dataset.py``, gambar kalibrasi tidak ikut dievaluasi).
+      Gate memakai akurasi atas semua gambar berlabel (tanpa deteksi = salah), jadi
+      model yang berhenti mendeteksi tidak bisa lolos; detection rate ikut ditampilkan
+    - Latency per frame ketiganya, ditampilkan berdampingan dengan akurasi
+    - Kandidat hanya disimpan sebagai ``best.int8.onnx`` jika penurunan akurasi
+      <= toleransi; jika tidak, kandidat dihapus dan script keluar dengan status 1
+
+Cara menjalankan:
+    python test_quantization.py
+    python test_quantization.py --mode dynamic --tolerance 0.01 --frames 300
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+
+from backends import export_onnx, load_backend, quantized_path, OnnxModel
+from quantization import DEFAULT_CALIBRATION_DIR, calibration_images, quantize_model
+from test_dataset import evaluate_accuracy
+
+# Constants
+MODEL_PATH = Path(__file__).parent.parent / "best.pt"
+DEFAULT_TOLERANCE = 0.02  # Penurunan akurasi top-1 maksimum (absolut)
+
+
+def test_quantize(mode: str, calib_images):
+    """Test kuantisasi ke kandidat INT8."""
+    print("=" * 60)
+    print(f"TEST 1: INT8 Quantization ({mode})")
+    print("=" * 60)
+
+    candidate = quantized_path(MODEL_PATH).with_suffix(".candidate.onnx")
+    try:
+        quantize_model(MODEL_PATH, candidate, mode=mode, images=calib_images)
+        fp32_size = export_onnx(MODEL_PATH).stat().st_size / 1e6
+        print(f"✅ Kandidat INT8: {candidate.name} ({candidate.stat().st_size / 1e6:.1f} MB, FP32 {fp32_size:.1f} MB)")
+        return candidate
+    except ImportError as e:
+        print(f"⚠️ onnx/onnxruntime belum terinstall: {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Gagal kuantisasi: {e}")
+        return None
+
+
+def measure_latency(model, frames) -> float:
+    """Rata-rata ms per frame setelah warm-up."""
+    model(frames[0], verbose=False)
+    start = time.perf_counter()
+    for frame in frames:
+        model(frame, verbose=False)
+    return (time.perf_counter() - start) / len(frames) * 1000
+
+
+def test_accuracy_latency(models, images):
+    """Akurasi top-1 dan latency semua model, berdampingan."""
+    print("\n" + "=" * 60)
+    print("TEST 2: Accuracy & Latency (dataset/valid)")
+    print("=" * 60)
+
+    frames = [cv2.imread(str(p)) for p in images]
+    report = {}
+    for name, model in models.items():
+        evaluation = evaluate_accuracy(model, images)
+        report[name] = {
+            "accuracy": evaluation["accuracy"],
+            "labelled_accuracy": evaluation["labelled_accuracy"],
+            "detection_rate": evaluation["detection_rate"],
+            "total": evaluation["total"],
+            "ms": measure_latency(model, frames),
+        }
+
+    baseline = report["torch fp32"]
+    # Top-1: semua gambar berlabel (dipakai gate); Top-1 det: hanya gambar yang terdeteksi
+    print(f"\n   {'Model':<12} {'Top-1':>8} {'Δ':>8} {'Top-1 det':>10} {'Det rate':>9} {'ms/frame':>10} {'Speedup':>8}")
+    for name, row in report.items():
+        delta = row["labelled_accuracy"] - baseline["labelled_accuracy"]
+        speedup = baseline["ms"] / row["ms"] if row["ms"] else 0.0
+        print(f"   {name:<12} {row['labelled_accuracy']:>8.2%} {delta:>+8.2%} {row['accuracy']:>10.2%}"
+              f" {row['detection_rate']:>9.2%} {row['ms']:>10.1f} {speedup:>7.2f}x")
+    return report
+
+
+def test_gate(report, candidate: Path, tolerance: float):
+    """Simpan kandidat sebagai ``best.int8.onnx`` hanya jika lolos toleransi akurasi."""
+    print("\n" + "=" * 60)
+    print(f"TEST 3: Accuracy Gate (toleransi {tolerance:.2%})")
+    print("=" * 60)
+
+    # Akurasi atas semua gambar berlabel: gambar yang tidak lagi terdeteksi ikut menurunkan skor
+    drop = report["torch fp32"]["labelled_accuracy"] - report["onnx int8"]["labelled_accuracy"]
+    target = quantized_path(MODEL_PATH)
+    if drop > tolerance:
+        candidate.unlink(missing_ok=True)
+        print(f"❌ Akurasi INT8 turun {drop:.2%} (> {tolerance:.2%}), model INT8 TIDAK disimpan")
+        if target.exists():
+            print(f"   {target.name} lama tetap dipakai (hapus manual jika sudah tidak valid)")
+        return False
+
+    os.replace(candidate, target)
+    print(f"✅ Akurasi INT8 turun {drop:.2%} (<= {tolerance:.2%}), disimpan ke {target.name}")
+    print("   Jalankan server dengan SIBI_BACKEND=int8 untuk memakainya")
+    return True
+
+
+def run_all_tests(mode: str = "static", tolerance: float = DEFAULT_TOLERANCE,
+                  frames: int = 200, calib: int = 200):
+    """Jalankan semua test."""
+    print("\n")
+    print("╔" + "═" * 58 + "╗")
+    print("║" + " SIBI INT8 QUANTIZATION GATE ".center(58) + "║")
+    print("╚" + "═" * 58 + "╝")
+    print()
+
+    results = {}
+
+    # Gambar kalibrasi dan evaluasi tidak boleh sama
+    calib_images = calibration_images(DEFAULT_CALIBRATION_DIR, calib) if mode == "static" else []
+    calib_set = set(calib_images)
+    images = [p for p in sorted(DEFAULT_CALIBRATION_DIR.glob("*.jpg")) if p not in calib_set][:frames]
+    if not images:
+        print(f"⚠️ Tidak ada gambar evaluasi di dataset: {DEFAULT_CALIBRATION_DIR}")
+        return results
+
+    candidate = test_quantize(mode, calib_images)
+    results["INT8 Quantization"] = candidate is not None
+    if candidate is None:
+        return results
+
+    models = {
+        "torch fp32": load_backend(MODEL_PATH, backend="torch"),
+        "onnx fp32": load_backend(MODEL_PATH, backend="onnx"),
+        "onnx int8": OnnxModel(candidate),
+    }
+    report = test_accuracy_latency(models, images)
+    results["Accuracy & Latency"] = report["onnx int8"]["total"] > 0
+    results["Accuracy Gate"] = test_gate(report, candidate, tolerance)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"   {test_name}: {status}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an INT8 model and gate it on top-1 accuracy")
+    parser.add_argument("--mode", choices=["static", "dynamic"], default="static", help="Mode kuantisasi")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Penurunan akurasi top-1 maksimum (mis. 0.02 = 2 poin)")
+    parser.add_argument("--frames", type=int, default=200, help="Jumlah gambar evaluasi")
+    parser.add_argument("--calib", type=int, default=200, help="Jumlah gambar kalibrasi (mode static)")
+    args = parser.parse_args()
+    results = run_all_tests(args.mode, args.tolerance, args.frames, args.calib)
+    sys.exit(0 if results and all(results.values()) else 1)
@@ -0,0 +1,268 @@
+"""
+Test Result Cache
+=================
+Unit test untuk ``result_cache.ResultCache`` tanpa model dan tanpa server:
+key berbasis isi frame, single-flight (request identik bersamaan = satu
+``compute``), pembatalan oleh caller terakhir, error yang tidak di-cache,
+kedaluwarsa TTL, eviction LRU berdasarkan batas memori, dan cache + micro-batcher
+seperti ``detect_server.detect_cached`` (frame identik dari sesi lain tetap
+mendapat hasil walau frame pemilik digantikan atau kedaluwarsa).
+
+Cara menjalankan:
+    python test_result_cache.py
+"""
+
+import sys
+from pathlib import Path
+import asyncio
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from batching import FrameExpired, FrameSuperseded, MicroBatcher
+from result_cache import ResultCache, frame_key
+from unit_helpers import Gated, main, outcome, run_tests, settle
+
+MB = 1024 * 1024
+
+
+def test_frame_key():
+    """Key sama untuk piksel identik, berbeda untuk piksel atau versi model lain."""
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    changed = frame.copy()
+    changed[0, 0, 0] = 1
+
+    same = frame_key(frame, "v1") == frame_key(frame.copy(), "v1")
+    pixel = frame_key(frame, "v1") != frame_key(changed, "v1")
+    version = frame_key(frame, "v1") != frame_key(frame, "v2")
+    shape = frame_key(frame, "v1") != frame_key(frame.reshape(64, 48, 3), "v1")
+    print(f"   identik={same}, piksel beda={pixel}, versi beda={version}, shape beda={shape}")
+    assert same and pixel and version and shape
+    # View non-contiguous (mis. hasil flip) tetap bisa di-hash
+    assert frame_key(frame[:, ::-1], "v1") == frame_key(frame, "v1")
+
+
+async def test_single_flight():
+    """Request identik bersamaan menjalankan satu ``compute``; berikutnya hit dari cache."""
+    cache = ResultCache(max_bytes=MB, ttl_s=30)
+    compute = Gated(lambda: "result")
+    callers = [asyncio.ensure_future(cache.get_or_compute("frame", compute)) for _ in range(3)]
+    await settle()
+    waiters = cache.waiters("frame")
+    compute.open()
+    results = await asyncio.gather(*callers)
+
+    again = await cache.get_or_compute("frame", Gated(lambda: "tidak dipakai", open_gate=True))
+    stats = cache.stats()
+
+    print(f"   compute dipanggil: {len(compute.calls)}x, waiters saat in-flight: {waiters}")
+    print(f"   misses={stats['misses']}, coalesced={stats['coalesced']}, hits={stats['hits']}")
+    assert len(compute.calls) == 1, "request identik bersamaan harus digabung menjadi satu compute"
+    assert waiters == 3 and cache.waiters("frame") == 0
+    assert results == ["result"] * 3 and again == "result"
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 2, 1)
+
+
+async def test_last_caller_cancels():
+    """``compute`` bersama hanya dibatalkan jika semua caller yang menunggu sudah pergi."""
+    cache = ResultCache(max_bytes=MB, ttl_s=30)
+    compute = Gated(lambda: "result")
+    first = asyncio.ensure_future(cache.get_or_compute("frame", compute))
+    second = asyncio.ensure_future(cache.get_or_compute("frame", compute))
+    await settle()
+
+    first.cancel()
+    await settle()
+    print(f"   Satu caller pergi: waiters={cache.waiters('frame')}, compute dibatalkan={compute.cancelled}")
+    assert cache.waiters("frame") == 1
+    assert compute.cancelled == 0, "caller yang pergi tidak boleh membatalkan compute milik caller lain"
+
+    second.cancel()
+    await settle()
+    print(f"   Semua caller pergi: waiters={cache.waiters('frame')}, compute dibatalkan={compute.cancelled}")
+    assert compute.cancelled == 1, "caller terakhir yang pergi harus membatalkan compute"
+    assert cache.waiters("frame") == 0 and cache.get("frame") is None
+
+    # Compute yang dibatalkan tidak menghalangi request berikutnya
+    assert await cache.get_or_compute("frame", Gated(lambda: "baru", open_gate=True)) == "baru"
+
+
+async def test_error_not_cached():
+    """Error ``compute`` diteruskan ke semua caller dan tidak di-cache."""
+    cache = ResultCache(max_bytes=MB, ttl_s=30)
+    failing = Gated(error=RuntimeError("inference gagal"))
+    callers = [asyncio.ensure_future(cache.get_or_compute("frame", failing)) for _ in range(2)]
+    await settle()
+    failing.open()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    print(f"   Hasil caller: {[outcome(r) for r in results]}")
+    assert all(isinstance(r, RuntimeError) for r in results), "error compute diteruskan ke semua caller"
+    assert cache.get("frame") is None, "error tidak boleh di-cache"
+
+    retry = Gated(lambda: "ok", open_gate=True)
+    assert await cache.get_or_compute("frame", retry) == "ok" and len(retry.calls) == 1
+
+
+async def test_ttl_expiry():
+    """Entry yang lebih tua dari ``ttl_s`` dibuang saat dibaca."""
+    cache = ResultCache(max_bytes=MB, ttl_s=0.05)
+    cache.put("frame", "result")
+    fresh = cache.get("frame")
+    await asyncio.sleep(0.1)
+    expired = cache.get("frame")
+    stats = cache.stats()
+
+    print(f"   Sebelum TTL: {fresh!r}, sesudah TTL: {expired!r}")
+    print(f"   expirations={stats['expirations']}, entries={stats['entries']}, bytes={stats['bytes']}")
+    assert fresh == "result" and expired is None
+    assert stats["expirations"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+
+
+async def test_lru_eviction():
+    """Di atas batas memori, entry yang paling lama tidak dipakai dibuang."""
+    cache = ResultCache(max_bytes=300, ttl_s=30, sizeof=lambda value: 100)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.upper())
+    # "a" baru dipakai, jadi "b" yang paling lama tidak dipakai
+    cache.get("a")
+    cache.put("d", "D")
+    stats = cache.stats()
+
+    kept = [key for key in ("a", "b", "c", "d") if cache.get(key) is not None]
+    print(f"   Entry tersisa: {kept}, evictions={stats['evictions']}, bytes={stats['bytes']}")
+    assert kept == ["a", "c", "d"], "entry yang paling lama tidak dipakai harus dibuang"
+    assert stats["evictions"] == 1 and stats["bytes"] == 300
+
+    # Nilai yang lebih besar dari seluruh cache tidak disimpan
+    small = ResultCache(max_bytes=50, ttl_s=30, sizeof=lambda value: 100)
+    small.put("frame", "result")
+    assert small.get("frame") is None and small.stats()["bytes"] == 0
+
+    # max_bytes=0: cache nonaktif, compute selalu dijalankan
+    disabled = ResultCache(max_bytes=0)
+    compute = Gated(lambda: "result", open_gate=True)
+    await disabled.get_or_compute("frame", compute)
+    await disabled.get_or_compute("frame", compute)
+    assert not disabled.enabled and len(compute.calls) == 2
+
+
+class SharedDetect:
+    """Cache + batcher wired like ``detect_server.detect_cached``: cache key = frame, batcher key = session."""
+
+    def __init__(self, infer: Gated):
+        self.batcher = MicroBatcher(infer, max_batch_size=4, max_wait_ms=0)
+        self.cache = ResultCache(max_bytes=MB, ttl_s=30)
+        self.deadlines = {}
+
+    def latest_deadline(self, frame: str):
+        deadlines = self.deadlines.get(frame, [])
+        return None if not deadlines or None in deadlines else max(deadlines)
+
+    def __call__(self, frame: str, session_id: str, deadline=None) -> asyncio.Future:
+        async def infer_shared():
+            try:
+                return await self.batcher.submit(frame, deadline=deadline, key=session_id)
+            except (FrameSuperseded, FrameExpired):
+                if self.cache.waiters(frame) <= 1:
+                    raise
+                retry_deadline = self.latest_deadline(frame)
+                if retry_deadline is not None and time.monotonic() >= retry_deadline:
+                    raise
+                return await self.batcher.submit(frame, deadline=retry_deadline)
+
+        async def detect():
+            waiting = self.deadlines.setdefault(frame, [])
+            waiting.append(deadline)
+            try:
+                return await self.cache.get_or_compute(frame, infer_shared)
+            finally:
+                waiting.remove(deadline)
+                if not waiting:
+                    del self.deadlines[frame]
+
+        return asyncio.ensure_future(detect())
+
+
+def show(names, results):
+    for name, result in zip(names, results):
+        print(f"   {name}: {outcome(result)}")
+
+
+async def test_superseded_shared_frame():
+    """Frame sesi yang digantikan tetap di-inference jika sesi lain menunggu frame identik."""
+    infer = Gated(lambda images: [f"hasil-{image}" for image in images])
+    detect = SharedDetect(infer)
+    try:
+        busy = asyncio.ensure_future(detect.batcher.submit("busy"))
+        await settle()
+        # Sesi A dan B mengirim frame identik (digabung di cache), lalu sesi A mengirim frame baru
+        a_old = detect("frame-x", "session-a")
+        b_same = detect("frame-x", "session-b")
+        await settle()
+        a_new = detect("frame-y", "session-a")
+        # Sesi C: frame lama tanpa caller lain memang boleh digantikan
+        c_old = detect("frame-z", "session-c")
+        await settle()
+        c_new = detect("frame-w", "session-c")
+        await settle()
+        infer.open()
+        results = await asyncio.gather(busy, a_old, b_same, a_new, c_old, c_new, return_exceptions=True)
+    finally:
+        await detect.batcher.stop()
+
+    show(["busy", "A lama", "B (frame sama)", "A baru", "C lama", "C baru"], results)
+    assert results[2] == "hasil-frame-x", "sesi lain yang menunggu frame identik tetap harus dapat hasil"
+    assert results[1] == "hasil-frame-x" and results[3] == "hasil-frame-y"
+    assert isinstance(results[4], FrameSuperseded) and results[5] == "hasil-frame-w"
+    assert detect.deadlines == {}
+
+
+async def test_expired_shared_frame():
+    """Deadline pemilik lewat: caller lain dengan deadline yang masih hidup tetap dapat hasil."""
+    infer = Gated(lambda images: [f"hasil-{image}" for image in images])
+    detect = SharedDetect(infer)
+    try:
+        busy = asyncio.ensure_future(detect.batcher.submit("busy"))
+        await settle()
+        now = time.monotonic()
+        # Pemilik komputasi (sesi A) punya deadline pendek, sesi B menunggu frame identik lebih lama
+        a_short = detect("frame-x", "session-a", deadline=now + 0.02)
+        b_long = detect("frame-x", "session-b", deadline=now + 10)
+        # Semua caller frame-z kedaluwarsa: tidak ada yang perlu hasilnya lagi
+        c_short = detect("frame-z", "session-c", deadline=now + 0.02)
+        d_short = detect("frame-z", "session-d", deadline=now + 0.03)
+        await asyncio.sleep(0.05)
+        infer.open()
+        results = await asyncio.gather(busy, a_short, b_long, c_short, d_short, return_exceptions=True)
+        stats = detect.batcher.stats()
+    finally:
+        await detect.batcher.stop()
+
+    show(["busy", "A (deadline lewat)", "B (deadline hidup)", "C (deadline lewat)", "D (deadline lewat)"], results)
+    print(f"   Batches: {[list(images) for images, in infer.calls]}, expired: {stats['expired']}")
+    assert results[2] == "hasil-frame-x", "caller dengan deadline hidup tidak boleh menerima FrameExpired"
+    assert isinstance(results[3], FrameExpired) and isinstance(results[4], FrameExpired)
+    assert all("frame-z" not in images for images, in infer.calls), "frame yang semua caller-nya kedaluwarsa tidak di-inference"
+    assert detect.deadlines == {}
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI RESULT CACHE TESTING", [
+        ("Frame Key", test_frame_key),
+        ("Single-flight", test_single_flight),
+        ("Last Caller Cancels", test_last_caller_cancels),
+        ("Error Not Cached", test_error_not_cached),
+        ("TTL Expiry", test_ttl_expiry),
+        ("LRU Eviction", test_lru_eviction),
+        ("Superseded Shared Frame", test_superseded_shared_frame),
+        ("Expired Shared Frame", test_expired_shared_frame),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
@@ -0,0 +1,125 @@
+"""
+Test ROI Tracking
+=================
+Unit test untuk ``roi_tracking`` tanpa model dan tanpa server: jendela crop di
+sekitar box sebelumnya, pemetaan koordinat crop -> frame penuh, dan kapan
+``RoiTracker`` kembali ke inference full-frame (confidence rendah, tidak ada
+deteksi, box menyentuh tepi crop, sesi hilang).
+
+Cara menjalankan:
+    python test_roi_tracking.py
+"""
+
+import sys
+from pathlib import Path
+import time
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from roi_tracking import RoiTracker, crop, expand_roi, roi_to_frame
+from unit_helpers import main, run_tests
+
+FRAME_W, FRAME_H = 640, 480
+
+
+def tracker(**kwargs) -> RoiTracker:
+    options = {"expand": 2.0, "min_conf": 0.4, "min_size": 160}
+    options.update(kwargs)
+    return RoiTracker(**options)
+
+
+def test_expand_roi():
+    """Jendela persegi di sekitar box, digeser agar tetap di dalam frame."""
+    centered = expand_roi((300, 200, 380, 280), FRAME_W, FRAME_H, 2.0, 160)
+    corner = expand_roi((0, 0, 60, 60), FRAME_W, FRAME_H, 2.0, 160)
+    edge = expand_roi((600, 400, 640, 480), FRAME_W, FRAME_H, 2.0, 160)
+    too_big = expand_roi((100, 50, 500, 450), FRAME_W, FRAME_H, 2.0, 160)
+
+    print(f"   Tengah: {centered}, sudut: {corner}, tepi kanan bawah: {edge}, box besar: {too_big}")
+    assert centered == (260, 160, 420, 320), "sisi = sisi terpanjang box x expand, berpusat di box"
+    assert corner == (0, 0, 160, 160), "sisi minimum min_size, digeser ke dalam frame"
+    assert edge == (480, 320, 640, 480)
+    assert too_big is None, "crop yang menutupi sebagian besar frame tidak dipakai"
+
+
+def test_crop_mapping():
+    """Crop berukuran jendela, dan box di crop dipetakan kembali ke piksel frame penuh."""
+    frame = np.arange(FRAME_H * FRAME_W * 3, dtype=np.uint32).reshape(FRAME_H, FRAME_W, 3)
+    roi = (260, 160, 420, 320)
+    patch = crop(frame, roi)
+    mapped = roi_to_frame((10, 20, 30, 40), roi)
+
+    print(f"   Crop: {patch.shape}, box (10, 20, 30, 40) -> {mapped}")
+    assert patch.shape == (160, 160, 3) and patch.flags["C_CONTIGUOUS"]
+    assert (patch[0, 0] == frame[160, 260]).all()
+    assert mapped == (270, 180, 290, 200)
+
+
+def test_tracking_lifecycle():
+    """ROI hanya dipakai setelah ada box; box ``None`` menghentikan tracking."""
+    roi_tracker = tracker()
+    first = roi_tracker.roi_for("session", FRAME_W, FRAME_H)
+    roi_tracker.update("session", (300, 200, 380, 280))
+    tracked = roi_tracker.roi_for("session", FRAME_W, FRAME_H)
+    other = roi_tracker.roi_for("other", FRAME_W, FRAME_H)
+    roi_tracker.update("session", None)
+    lost = roi_tracker.roi_for("session", FRAME_W, FRAME_H)
+    stats = roi_tracker.stats()
+
+    print(f"   Tanpa box: {first}, dengan box: {tracked}, sesi lain: {other}, tangan hilang: {lost}")
+    print(f"   frames={stats['frames']}, roi_frames={stats['roi_frames']}, tracked={stats['tracked']}")
+    assert first is None and other is None and lost is None
+    assert tracked == (260, 160, 420, 320)
+    assert stats["frames"] == 4 and stats["roi_frames"] == 1 and stats["tracked"] == 0
+
+
+def test_accept_and_fallback():
+    """Hasil crop ditolak jika confidence rendah, kosong, atau box menyentuh tepi crop."""
+    roi_tracker = tracker()
+    roi = (260, 160, 420, 320)
+
+    inside = roi_tracker.accept(roi, (300, 200, 380, 280), 0.9, FRAME_W, FRAME_H)
+    low_conf = roi_tracker.accept(roi, (300, 200, 380, 280), 0.2, FRAME_W, FRAME_H)
+    missing = roi_tracker.accept(roi, None, 0.0, FRAME_W, FRAME_H)
+    touching = roi_tracker.accept(roi, (261, 200, 340, 280), 0.9, FRAME_W, FRAME_H)
+    # Tepi crop yang juga tepi frame tidak berarti tangan keluar jendela
+    frame_edge = roi_tracker.accept((0, 0, 160, 160), (0, 20, 80, 100), 0.9, FRAME_W, FRAME_H)
+    stats = roi_tracker.stats()
+
+    print(f"   di dalam={inside}, conf rendah={low_conf}, tanpa deteksi={missing}, "
+          f"menyentuh tepi crop={touching}, di tepi frame={frame_edge}")
+    assert inside and frame_edge
+    assert not (low_conf or missing or touching)
+    assert stats["fallbacks"] == 3
+
+
+def test_sessions_bounded():
+    """Sesi idle lebih dari TTL dan sesi terlama di atas ``max_sessions`` dilupakan."""
+    roi_tracker = tracker(max_sessions=2, session_ttl_s=0.05)
+    for key in ("a", "b", "c"):
+        roi_tracker.update(key, (300, 200, 380, 280))
+    evicted = roi_tracker.roi_for("a", FRAME_W, FRAME_H)
+    kept = roi_tracker.roi_for("c", FRAME_W, FRAME_H)
+    time.sleep(0.1)
+    idle = roi_tracker.roi_for("c", FRAME_W, FRAME_H)
+
+    print(f"   Sesi terlama: {evicted}, sesi terbaru: {kept}, sesi idle: {idle}")
+    assert evicted is None and kept is not None and idle is None
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI ROI TRACKING TESTING", [
+        ("Expand ROI", test_expand_roi),
+        ("Crop Mapping", test_crop_mapping),
+        ("Tracking Lifecycle", test_tracking_lifecycle),
+        ("Accept & Fallback", test_accept_and_fallback),
+        ("Sessions Bounded", test_sessions_bounded),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
@@ -0,0 +1,116 @@
+"""
+Test Startup
+============
+Unit test untuk ``startup`` tanpa model: ``warm_up`` dengan model palsu yang
+mencatat setiap panggilan (setiap imgsz x ukuran batch), ``StartupTimer``, dan
+artefak yang disiapkan ``prepare`` per backend.
+
+Cara menjalankan:
+    python test_startup.py
+"""
+
+import sys
+from pathlib import Path
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from startup import WARMUP_FRAME, StartupTimer, prepare, warm_up
+from unit_helpers import main, run_tests
+
+
+class RecordingModel:
+    """Fake model: records (batch size, imgsz) of every call."""
+
+    def __init__(self, batch_sizes=None):
+        if batch_sizes is not None:
+            self.batch_sizes = batch_sizes
+        self.calls = []
+        self.shapes = set()
+
+    def __call__(self, source, imgsz=None, verbose=True):
+        frames = source if isinstance(source, list) else [source]
+        self.calls.append((len(frames), imgsz))
+        self.shapes.update(frame.shape for frame in frames)
+        return []
+
+
+def test_warm_up_every_batch_size():
+    """Setiap imgsz di-warm-up untuk setiap ukuran batch yang bisa dikirim micro-batcher."""
+    model = RecordingModel(batch_sizes=(1, 2, 4, 8))
+    warm_up(model, [640, 320], runs=2)
+
+    print(f"   Panggilan (batch, imgsz): {sorted(set(model.calls))}")
+    expected = {(batch, imgsz) for batch in (1, 2, 4, 8) for imgsz in (640, 320)}
+    assert set(model.calls) == expected, "semua kombinasi imgsz x batch harus di-warm-up"
+    assert len(model.calls) == 2 * len(expected), "runs per kombinasi"
+    width, height = WARMUP_FRAME
+    assert model.shapes == {(height, width, 3)}, "frame dummy seukuran SIBI_WARMUP_FRAME"
+
+
+def test_warm_up_defaults():
+    """Tanpa ``batch_sizes`` hanya batch 1; ``runs=0`` mematikan warm-up."""
+    plain = RecordingModel()
+    warm_up(plain, [640], runs=1)
+    explicit = RecordingModel(batch_sizes=(1, 2))
+    warm_up(explicit, [640], runs=1, batch_sizes=(1,))
+    disabled = RecordingModel(batch_sizes=(1, 2))
+    warm_up(disabled, [640], runs=0)
+
+    print(f"   Tanpa batch_sizes: {plain.calls}, batch_sizes=(1,): {explicit.calls}, runs=0: {disabled.calls}")
+    assert plain.calls == [(1, 640)]
+    assert explicit.calls == [(1, 640)], "argumen batch_sizes mengalahkan model.batch_sizes"
+    assert disabled.calls == []
+
+
+def test_startup_timer():
+    """Durasi fase tercatat, juga jika fase gagal."""
+    timer = StartupTimer()
+    with timer.phase("load model"):
+        pass
+    try:
+        with timer.phase("warmup"):
+            raise RuntimeError("warm-up gagal")
+    except RuntimeError:
+        pass
+    stats = timer.stats()
+
+    print(f"   Fase: {stats['phases_ms']}")
+    assert set(stats["phases_ms"]) == {"load model", "warmup"}
+    assert stats["since_start_ms"] >= max(stats["phases_ms"].values())
+
+
+def test_prepare():
+    """``prepare`` mengembalikan artefak per backend, dan menolak backend tak dikenal."""
+    with tempfile.TemporaryDirectory() as tmp:
+        weights = Path(tmp) / "best.pt"
+        weights.write_bytes(b"weights")
+
+        assert prepare(weights, "torch") == weights and prepare(weights, "engine") == weights
+        try:
+            prepare(weights, "int8")
+            raise AssertionError("int8 tanpa best.int8.onnx seharusnya gagal")
+        except FileNotFoundError as e:
+            print(f"   int8 tanpa model gated: {e}")
+        (Path(tmp) / "best.int8.onnx").write_bytes(b"int8")
+        assert prepare(weights, "int8") == Path(tmp) / "best.int8.onnx"
+        try:
+            prepare(weights, "tensorrt")
+            raise AssertionError("backend tak dikenal seharusnya ditolak")
+        except ValueError as e:
+            print(f"   Backend tak dikenal: {e}")
+
+
+def run_all_tests():
+    """Jalankan semua test."""
+    return run_tests("SIBI STARTUP TESTING", [
+        ("Warm-up Every Batch Size", test_warm_up_every_batch_size),
+        ("Warm-up Defaults", test_warm_up_defaults),
+        ("Startup Timer", test_startup_timer),
+        ("Prepare", test_prepare),
+    ])
+
+
+if __name__ == "__main__":
+    main(run_all_tests)
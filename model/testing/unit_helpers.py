@@ -0,0 +1,114 @@
+"""
+Unit Test Helpers
+=================
+Kerangka bersama untuk script unit test komponen server (``test_batching.py``,
+``test_result_cache.py``, dst.) yang tidak butuh model maupun server berjalan:
+    - ``run_tests`` menjalankan setiap test sebagai "TEST N" (fungsi biasa atau
+      coroutine), menangkap assertion, lalu mencetak summary PASS/FAIL
+    - ``Gated`` adalah pengganti async untuk inference/compute yang mencatat setiap
+      panggilan dan bisa ditahan, sehingga antrean dan pembatalan bisa diuji
+"""
+
+import asyncio
+import inspect
+import sys
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class Gated:
+    """Fake async call: records its arguments and blocks while the gate is closed."""
+
+    def __init__(self, result: Optional[Callable[..., Any]] = None, error: Optional[Exception] = None,
+                 open_gate: bool = False):
+        """
+        Args:
+            result: Fungsi ``result(*args)`` yang menghasilkan nilai kembali (default: None)
+            error: Exception yang di-raise setelah gate dibuka (menggantikan ``result``)
+            open_gate: True = tidak menahan panggilan sama sekali
+        """
+        self.result = result
+        self.error = error
+        self.calls: List[tuple] = []
+        self.cancelled = 0
+        self.gate = asyncio.Event()
+        if open_gate:
+            self.gate.set()
+
+    def open(self):
+        self.gate.set()
+
+    async def __call__(self, *args):
+        self.calls.append(args)
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result(*args) if self.result is not None else None
+
+
+async def settle(seconds: float = 0.05):
+    """Give background tasks (batching loop, callbacks) time to pick up queued work."""
+    steps = 5
+    for _ in range(steps):
+        await asyncio.sleep(seconds / steps)
+
+
+def outcome(value: Any) -> Any:
+    """Printable form of a ``gather(..., return_exceptions=True)`` result."""
+    return type(value).__name__ if isinstance(value, BaseException) else value
+
+
+def run_test(number: int, name: str, test: Callable[[], Any]) -> bool:
+    """Run one test (sync or ``async def``); passes unless it raises."""
+    print("\n" + "=" * 60)
+    print(f"TEST {number}: {name}")
+    print("=" * 60)
+    try:
+        if inspect.iscoroutinefunction(test):
+            asyncio.run(test())
+        else:
+            test()
+    except AssertionError as e:
+        print(f"❌ {e or 'Assertion gagal'}")
+        return False
+    except Exception as e:
+        print(f"❌ Error: {type(e).__name__}: {e}")
+        return False
+    print("✅ OK")
+    return True
+
+
+def run_tests(title: str, tests: Sequence[Tuple[str, Callable[[], Any]]]) -> Dict[str, bool]:
+    """Run ``(name, test)`` pairs under a header box and print the PASS/FAIL summary."""
+    print("\n")
+    print("╔" + "═" * 58 + "╗")
+    print("║" + f" {title} ".center(58) + "║")
+    print("╚" + "═" * 58 + "╝")
+
+    results = {name: run_test(i, name, test) for i, (name, test) in enumerate(tests, 1)}
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"   {test_name}: {status}")
+
+    print()
+    if all(results.values()):
+        print("🎉 Semua test berhasil!")
+    else:
+        print("⚠️ Beberapa test gagal. Periksa output di atas.")
+
+    return results
+
+
+def main(run_all_tests: Callable[[], Dict[str, bool]]):
+    """Script entry point: exit status 1 if any test failed."""
+    results = run_all_tests()
+    sys.exit(0 if all(results.values()) else 1)
@@ -16,6 +16,8 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import random
 
+from postprocess import as_detections, best
+
 # Constants
 MODEL_PATH = Path(__file__).parent.parent / "best.pt"
 DATASET_PATH = Path(__file__).parent.parent.parent / "dataset" / "valid" / "images"
@@ -59,16 +61,13 @@ def visualize_single_image(model, img_path: Path, output_name: str = None):
             font_small = font
         
         # Draw detections
-        if len(results) > 0 and results[0].boxes is not None:
-            boxes = results[0].boxes
+        if len(results) > 0:
+            detections = as_detections(results[0])
             
-            for i, box in enumerate(boxes):
-                # Get box coordinates (xyxy format)
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
+            for xyxy, cls_idx, conf in zip(detections.xyxy.tolist(), detections.cls.tolist(), detections.conf.tolist()):
+                # Box coordinates (xyxy format)
+                x1, y1, x2, y2 = xyxy
                 
-                # Get class and confidence
-                cls_idx = int(box.cls.item())
-                conf = float(box.conf.item())
                 # Gunakan model.names untuk mendapatkan huruf yang benar
                 letter = model.names.get(cls_idx, "?")
                 
@@ -217,11 +216,9 @@ def create_grid_visualization(model, grid_size: int = 4):
             draw = ImageDraw.Draw(img_thumb)
             
             # Add detection label
-            if len(results) > 0 and results[0].boxes is not None and len(results[0].boxes) > 0:
-                boxes = results[0].boxes
-                best_idx = int(boxes.conf.argmax())
-                cls_idx = int(boxes[best_idx].cls.item())
-                conf = float(boxes[best_idx].conf.item())
+            top = best(as_detections(results[0])) if len(results) > 0 else None
+            if top is not None:
+                cls_idx, conf, _ = top
                 # Gunakan model.names untuk mendapatkan huruf yang benar
                 letter = model.names.get(cls_idx, "?")
                 